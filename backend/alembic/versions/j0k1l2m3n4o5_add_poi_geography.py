@@ -0,0 +1,30 @@
+"""Add geography column with GiST index to POI
+
+Revision ID: j0k1l2m3n4o5
+Revises: i9j0k1l2m3n4
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = 'j0k1l2m3n4o5'
+down_revision = 'i9j0k1l2m3n4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    # Generated column: always in sync with latitude/longitude, no app-side writes needed
+    op.execute("""
+        ALTER TABLE point_of_interest
+        ADD COLUMN geog geography(Point, 4326)
+        GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography) STORED
+    """)
+    op.execute(
+        "CREATE INDEX idx_point_of_interest_geog ON point_of_interest USING gist (geog)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_point_of_interest_geog")
+    op.drop_column('point_of_interest', 'geog')
@@ -0,0 +1,39 @@
+"""Add cached length and walking time to route
+
+Revision ID: k1l2m3n4o5p6
+Revises: j0k1l2m3n4o5
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'k1l2m3n4o5p6'
+down_revision = 'j0k1l2m3n4o5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('route', sa.Column('length_m', sa.Float(), nullable=True))
+    op.add_column('route', sa.Column('walking_minutes', sa.Integer(), nullable=True))
+    # Backfill: sum of great-circle legs between consecutive points (sphere, как в app.core.geo)
+    op.execute("""
+        WITH legs AS (
+            SELECT rp.route_id,
+                   ST_Distance(p.geog, LAG(p.geog) OVER (PARTITION BY rp.route_id ORDER BY rp."order"), false) AS d
+            FROM route_poi rp
+            JOIN point_of_interest p ON p.id = rp.poi_id
+        ), totals AS (
+            SELECT route_id, COALESCE(SUM(d), 0) AS total FROM legs GROUP BY route_id
+        )
+        UPDATE route
+        SET length_m = totals.total, walking_minutes = CEIL(totals.total / 75.0)
+        FROM totals
+        WHERE route.id = totals.route_id
+    """)
+    op.execute("UPDATE route SET length_m = 0, walking_minutes = 0 WHERE length_m IS NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('route', 'walking_minutes')
+    op.drop_column('route', 'length_m')
@@ -0,0 +1,43 @@
+"""Add time_photo_job queue table
+
+Revision ID: l2m3n4o5p6q7
+Revises: k1l2m3n4o5p6
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'l2m3n4o5p6q7'
+down_revision = 'k1l2m3n4o5p6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Колонки модели TimePhoto, которых не было в миграции i9j0k1l2m3n4
+    op.execute("ALTER TABLE time_photo ADD COLUMN IF NOT EXISTS provider VARCHAR NOT NULL DEFAULT 'geminigen'")
+    op.execute("ALTER TABLE time_photo ADD COLUMN IF NOT EXISTS transformation_mode VARCHAR NOT NULL DEFAULT 'full_vintage'")
+
+    op.create_table(
+        'time_photo_job',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('photo_id', sa.Integer(), sa.ForeignKey('time_photo.id', ondelete='CASCADE'), nullable=False, unique=True),
+        sa.Column('stage', sa.String(), server_default='submit', nullable=False),
+        sa.Column('status', sa.String(), server_default='queued', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('run_after', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_time_photo_job_id', 'time_photo_job', ['id'])
+    # Очередь выбирает только ожидающие задачи по времени запуска
+    op.execute(
+        "CREATE INDEX ix_time_photo_job_queued ON time_photo_job (run_after) WHERE status = 'queued'"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_time_photo_job_queued', table_name='time_photo_job')
+    op.drop_index('ix_time_photo_job_id', table_name='time_photo_job')
+    op.drop_table('time_photo_job')
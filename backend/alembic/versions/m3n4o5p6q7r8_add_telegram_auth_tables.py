@@ -0,0 +1,54 @@
+"""Bring telegram_auth_sessions / telegram_auth_codes under alembic
+
+Revision ID: m3n4o5p6q7r8
+Revises: l2m3n4o5p6q7
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = 'm3n4o5p6q7r8'
+down_revision = 'l2m3n4o5p6q7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Таблицы раньше создавались из start.sh, поэтому IF NOT EXISTS
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS telegram_auth_sessions (
+            id SERIAL PRIMARY KEY,
+            session_id VARCHAR NOT NULL UNIQUE,
+            telegram_id BIGINT,
+            telegram_username VARCHAR,
+            telegram_first_name VARCHAR,
+            telegram_photo_url VARCHAR,
+            created_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS telegram_auth_codes (
+            id SERIAL PRIMARY KEY,
+            code VARCHAR NOT NULL UNIQUE,
+            telegram_id BIGINT NOT NULL,
+            telegram_username VARCHAR,
+            telegram_first_name VARCHAR,
+            telegram_photo_url VARCHAR,
+            created_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+    # Для проверки срока жизни и для sweeper'а
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_telegram_auth_sessions_created_at "
+        "ON telegram_auth_sessions (created_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_telegram_auth_codes_created_at "
+        "ON telegram_auth_codes (created_at)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_telegram_auth_codes_created_at', table_name='telegram_auth_codes')
+    op.drop_index('ix_telegram_auth_sessions_created_at', table_name='telegram_auth_sessions')
+    op.drop_table('telegram_auth_codes')
+    op.drop_table('telegram_auth_sessions')
@@ -0,0 +1,50 @@
+"""Add user_stats counters and backfill them from history
+
+Revision ID: n4o5p6q7r8s9
+Revises: m3n4o5p6q7r8
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'n4o5p6q7r8s9'
+down_revision = 'm3n4o5p6q7r8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_stats',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('checked_in_points', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('completed_routes', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('correct_quizzes', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    # Начальные значения из истории (то же, что app.core.user_stats.reconcile_user_stats)
+    op.execute("""
+        INSERT INTO user_stats (user_id, checked_in_points, completed_routes, correct_quizzes)
+        SELECT u.id,
+               COALESCE(p.points, 0),
+               COALESCE(p.routes, 0),
+               COALESCE(q.quizzes, 0)
+        FROM "user" u
+        LEFT JOIN (
+            SELECT user_id,
+                   SUM(completed_points_count) AS points,
+                   COUNT(*) FILTER (WHERE status = 'completed') AS routes
+            FROM user_progress
+            GROUP BY user_id
+        ) p ON p.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS quizzes
+            FROM user_quiz_progress
+            WHERE is_correct
+            GROUP BY user_id
+        ) q ON q.user_id = u.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_stats')
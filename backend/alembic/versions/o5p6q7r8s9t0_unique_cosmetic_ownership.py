@@ -0,0 +1,37 @@
+"""Unique (user, item) on cosmetic ownership tables
+
+Revision ID: o5p6q7r8s9t0
+Revises: n4o5p6q7r8s9
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = 'o5p6q7r8s9t0'
+down_revision = 'n4o5p6q7r8s9'
+branch_labels = None
+depends_on = None
+
+# (таблица, колонка предмета, имя ограничения)
+OWNERSHIP_TABLES = (
+    ('user_title', 'title_id', 'uq_user_title'),
+    ('user_frame', 'frame_id', 'uq_user_frame'),
+    ('user_badge', 'badge_id', 'uq_user_badge'),
+)
+
+
+def upgrade() -> None:
+    for table, column, constraint in OWNERSHIP_TABLES:
+        # Старый код мог выдать один предмет дважды — оставляем самую раннюю запись
+        op.execute(f"""
+            DELETE FROM {table} a
+            USING {table} b
+            WHERE a.user_id = b.user_id
+              AND a.{column} = b.{column}
+              AND a.id > b.id
+        """)
+        op.create_unique_constraint(constraint, table, ['user_id', column])
+
+
+def downgrade() -> None:
+    for table, _, constraint in OWNERSHIP_TABLES:
+        op.drop_constraint(constraint, table, type_='unique')
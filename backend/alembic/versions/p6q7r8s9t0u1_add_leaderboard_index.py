@@ -0,0 +1,26 @@
+"""Partial (xp DESC, id) index over players shown on the leaderboard
+
+Revision ID: p6q7r8s9t0u1
+Revises: o5p6q7r8s9t0
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'p6q7r8s9t0u1'
+down_revision = 'o5p6q7r8s9t0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_user_leaderboard',
+        'user',
+        [sa.text('xp DESC'), 'id'],
+        postgresql_where=sa.text('show_on_leaderboard IS NOT FALSE AND is_active IS NOT FALSE'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_leaderboard', table_name='user')
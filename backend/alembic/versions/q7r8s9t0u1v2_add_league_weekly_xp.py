@@ -0,0 +1,55 @@
+"""Add league_weekly_xp and seed it with the current week
+
+Revision ID: q7r8s9t0u1v2
+Revises: p6q7r8s9t0u1
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'q7r8s9t0u1v2'
+down_revision = 'p6q7r8s9t0u1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'league_weekly_xp',
+        sa.Column('week_start', sa.Date(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('league', sa.String(), nullable=False),
+        sa.Column('xp', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('outcome', sa.String(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index(
+        'ix_league_weekly_xp_ranking',
+        'league_weekly_xp',
+        ['week_start', 'league', sa.text('xp DESC'), 'user_id'],
+    )
+    op.create_index(
+        'ix_league_weekly_xp_open',
+        'league_weekly_xp',
+        ['week_start'],
+        postgresql_where=sa.text('outcome IS NULL'),
+    )
+    # Текущая неделя (понедельник, UTC) из уже завершённых сессий
+    op.execute("""
+        INSERT INTO league_weekly_xp (week_start, user_id, league, xp)
+        SELECT date_trunc('week', NOW() AT TIME ZONE 'UTC')::date,
+               s.user_id,
+               COALESCE(p.league, 'bronze'),
+               SUM(s.xp_earned)
+        FROM learning_session s
+        LEFT JOIN user_learning_progress p ON p.user_id = s.user_id
+        WHERE s.completed_at >= date_trunc('week', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        GROUP BY s.user_id, p.league
+        HAVING SUM(s.xp_earned) > 0
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_league_weekly_xp_open', table_name='league_weekly_xp')
+    op.drop_index('ix_league_weekly_xp_ranking', table_name='league_weekly_xp')
+    op.drop_table('league_weekly_xp')
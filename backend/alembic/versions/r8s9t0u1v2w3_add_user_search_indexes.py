@@ -0,0 +1,35 @@
+"""pg_trgm and prefix indexes for user search
+
+Revision ID: r8s9t0u1v2w3
+Revises: q7r8s9t0u1v2
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = 'r8s9t0u1v2w3'
+down_revision = 'q7r8s9t0u1v2'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = ('username', 'display_name')
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in SEARCH_COLUMNS:
+        # Подстрока (LIKE '%q%') и похожесть (%, similarity) — запросы от 3 символов
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_user_{column}_trgm '
+            f'ON "user" USING gin (lower({column}) gin_trgm_ops)'
+        )
+        # Префикс (LIKE 'q%') для коротких запросов, независимо от collation
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_user_{column}_prefix '
+            f'ON "user" (lower({column}) text_pattern_ops)'
+        )
+
+
+def downgrade() -> None:
+    for column in SEARCH_COLUMNS:
+        op.execute(f'DROP INDEX IF EXISTS ix_user_{column}_prefix')
+        op.execute(f'DROP INDEX IF EXISTS ix_user_{column}_trgm')
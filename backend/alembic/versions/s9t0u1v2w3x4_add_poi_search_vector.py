@@ -0,0 +1,34 @@
+"""Add weighted Russian tsvector with GIN index to POI
+
+Revision ID: s9t0u1v2w3x4
+Revises: r8s9t0u1v2w3
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = 's9t0u1v2w3x4'
+down_revision = 'r8s9t0u1v2w3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Generated column (как geog): БД пересчитывает её при каждом INSERT/UPDATE
+    op.execute("""
+        ALTER TABLE point_of_interest
+        ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('russian', coalesce(full_article, '')), 'C')
+        ) STORED
+    """)
+    op.execute(
+        "CREATE INDEX ix_point_of_interest_search_vector "
+        "ON point_of_interest USING gin (search_vector)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_point_of_interest_search_vector")
+    op.drop_column('point_of_interest', 'search_vector')
@@ -0,0 +1,25 @@
+"""Drop stage from time_photo_job
+
+Revision ID: t0u1v2w3x4y5
+Revises: s9t0u1v2w3x4
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 't0u1v2w3x4y5'
+down_revision = 's9t0u1v2w3x4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Опрос GeminiGen перенесён в центральный poller, задача очереди только отправляет фото
+    op.drop_column('time_photo_job', 'stage')
+
+
+def downgrade() -> None:
+    op.add_column(
+        'time_photo_job',
+        sa.Column('stage', sa.String(), server_default='submit', nullable=False),
+    )
@@ -0,0 +1,29 @@
+"""Add next_poll_at to time_photo
+
+Revision ID: u1v2w3x4y5z6
+Revises: t0u1v2w3x4y5
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'u1v2w3x4y5z6'
+down_revision = 't0u1v2w3x4y5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Время следующей проверки общее для всех процессов, а не в памяти каждого
+    op.add_column('time_photo', sa.Column('next_poll_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_time_photo_next_poll',
+        'time_photo',
+        ['next_poll_at'],
+        postgresql_where=sa.text("status = 'processing'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_time_photo_next_poll', table_name='time_photo')
+    op.drop_column('time_photo', 'next_poll_at')
@@ -1,6 +1,6 @@
 from typing import Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app import models, schemas
 from app.core import security
 from app.core.config import settings
+from app.core.user_cache import user_cache
 from app.db.session import AsyncSessionLocal
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -22,9 +23,7 @@ async def get_db() -> Generator:
         yield session
 
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+def _user_id_from_token(token: str) -> int:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -35,8 +34,40 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    
-    result = await db.execute(select(models.User).where(models.User.id == int(token_data.sub)))
+    return int(token_data.sub)
+
+
+async def _load_user(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    user = result.scalars().first()
+    if user is not None:
+        user_cache.put(user)
+    return user
+
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db), token: str = Depends(reusable_oauth2)
+) -> models.User:
+    """
+    The authenticated user, served from ``user_cache`` when possible.
+
+    On a cache hit the instance is detached from ``db``: fine for reading,
+    but endpoints that modify the user must use ``get_current_user_fresh``.
+    """
+    user_id = _user_id_from_token(token)
+    user = user_cache.get(user_id) or await _load_user(db, user_id)
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+async def get_current_user_fresh(
+    db: AsyncSession = Depends(get_db), token: str = Depends(reusable_oauth2)
+) -> models.User:
+    """The authenticated user loaded into this request's session, for writes."""
+    user_id = _user_id_from_token(token)
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
     user = result.scalars().first()
 
     if not user:
@@ -44,17 +75,28 @@ async def get_current_user(
     return user
 
 
+def _ensure_active(user: models.User) -> models.User:
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
+
 def get_current_active_user(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
-    if not current_user.is_active:
-        raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
+    return _ensure_active(current_user)
+
+
+def get_current_active_user_fresh(
+    current_user: models.User = Depends(get_current_user_fresh),
+) -> models.User:
+    return _ensure_active(current_user)
 
 
 def get_current_active_superuser(
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: models.User = Depends(get_current_active_user_fresh),
 ) -> models.User:
+    # Права проверяем по свежей строке, а не по кэшу
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
@@ -77,13 +119,24 @@ async def get_current_user_optional(
     if not token:
         return None
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = schemas.TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
+        user_id = _user_id_from_token(token)
+    except HTTPException:
         return None
     
-    result = await db.execute(select(models.User).where(models.User.id == int(token_data.sub)))
-    user = result.scalars().first()
-    return user
+    return user_cache.get(user_id) or await _load_user(db, user_id)
+
+
+async def get_current_user_from_query(token: str = Query(...)) -> models.User:
+    """
+    Auth for EventSource/long-lived streams, which cannot send headers.
+
+    Uses its own short session so the stream does not hold a DB connection.
+    """
+    user_id = _user_id_from_token(token)
+    user = user_cache.get(user_id)
+    if user is None:
+        async with AsyncSessionLocal() as db:
+            user = await _load_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return _ensure_active(user)
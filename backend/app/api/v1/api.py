@@ -3,7 +3,7 @@ from fastapi import APIRouter
 from app.api.v1.endpoints import (
     auth, users, pois, routes, progress, files, 
     quizzes, verification, achievements, profile, friends, cosmetics, learning,
-    time_machine, site_settings,
+    time_machine, site_settings, metrics,
 )
 
 api_router = APIRouter()
@@ -22,3 +22,4 @@ api_router.include_router(achievements.router, prefix="/achievements", tags=["ac
 api_router.include_router(learning.router, prefix="/learning", tags=["learning"])
 api_router.include_router(time_machine.router, prefix="/time-machine", tags=["time-machine"])
 api_router.include_router(site_settings.router, prefix="/settings", tags=["settings"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
@@ -1,4 +1,4 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
@@ -7,75 +7,74 @@ from sqlalchemy.orm import selectinload
 
 from app import models, schemas
 from app.api import deps
+from app.core.achievements import CONDITION_TYPES, CachedAchievement, achievement_catalogue
+from app.core.user_stats import get_user_stats
 
 router = APIRouter()
 
 
+async def load_achievement_stats(db: AsyncSession, user: models.User) -> dict[str, int]:
+    """Current value of every achievement condition (one ``user_stats`` row)."""
+    stats = await get_user_stats(db, user.id)
+    return {**stats, "level": user.level or 1}
+
+
 async def check_and_award_achievements(
     db: AsyncSession,
     user: models.User,
-    total_points: int,
-    completed_routes: int,
-    total_quizzes: int = 0
-) -> List[models.Achievement]:
+    stats: dict[str, int],
+    previous: Optional[dict[str, int]] = None,
+) -> List[CachedAchievement]:
     """
-    Check if user qualifies for any new achievements and award them.
+    Award achievements whose thresholds the user's stats have reached.
+    With ``previous`` only thresholds crossed since then are considered;
+    without it every reached threshold is (re)checked.
     Returns list of newly unlocked achievements.
     """
-    # Get all achievements
-    result = await db.execute(select(models.Achievement))
-    all_achievements = result.scalars().all()
+    await achievement_catalogue.ensure_loaded(db)
+    candidates = [
+        achievement
+        for condition_type in CONDITION_TYPES
+        for achievement in achievement_catalogue.crossed(
+            condition_type,
+            stats.get(condition_type, 0),
+            previous.get(condition_type) if previous is not None else None,
+        )
+    ]
+    if not candidates:
+        return []
     
-    # Get user's current achievements
+    # Only the candidates' unlock rows, not the user's whole history
     result = await db.execute(
         select(models.UserAchievement.achievement_id)
         .where(models.UserAchievement.user_id == user.id)
+        .where(models.UserAchievement.achievement_id.in_([a.id for a in candidates]))
     )
-    unlocked_ids = set(row[0] for row in result.all())
+    unlocked_ids = set(result.scalars().all())
+    new_achievements = [a for a in candidates if a.id not in unlocked_ids]
+    if not new_achievements:
+        return []
     
-    new_achievements = []
     total_bonus_xp = 0.0
+    for achievement in new_achievements:
+        db.add(models.UserAchievement(
+            user_id=user.id,
+            achievement_id=achievement.id
+        ))
+        # Award bonus XP
+        if achievement.xp_reward > 0:
+            user.xp += achievement.xp_reward
+            total_bonus_xp += achievement.xp_reward
     
-    for achievement in all_achievements:
-        # Skip if already unlocked
-        if achievement.id in unlocked_ids:
-            continue
-            
-        # Check condition
-        unlocked = False
-        if achievement.condition_type == 'points':
-            unlocked = total_points >= achievement.condition_value
-        elif achievement.condition_type == 'routes':
-            unlocked = completed_routes >= achievement.condition_value
-        elif achievement.condition_type == 'level':
-            unlocked = user.level >= achievement.condition_value
-        elif achievement.condition_type == 'quizzes':
-            unlocked = total_quizzes >= achievement.condition_value
-        
-        if unlocked:
-            # Award achievement
-            user_achievement = models.UserAchievement(
-                user_id=user.id,
-                achievement_id=achievement.id
-            )
-            db.add(user_achievement)
-            new_achievements.append(achievement)
-            
-            # Award bonus XP
-            if achievement.xp_reward > 0:
-                user.xp += achievement.xp_reward
-                total_bonus_xp += achievement.xp_reward
+    # Recalculate level if XP changed
+    if total_bonus_xp > 0:
+        import math
+        if user.xp > 0:
+            new_level = int((-5 + math.sqrt(49 + 0.16 * user.xp)) / 2)
+            user.level = max(1, new_level)
     
-    if new_achievements:
-        # Recalculate level if XP changed
-        if total_bonus_xp > 0:
-            import math
-            if user.xp > 0:
-                new_level = int((-5 + math.sqrt(49 + 0.16 * user.xp)) / 2)
-                user.level = max(1, new_level)
-        
-        db.add(user)
-        await db.commit()
+    db.add(user)
+    await db.commit()
     
     return new_achievements
 
@@ -88,9 +87,8 @@ async def get_achievements(
     """
     Get all achievements with unlock status for current user.
     """
-    # Get all achievements
-    result = await db.execute(select(models.Achievement))
-    all_achievements = result.scalars().all()
+    await achievement_catalogue.ensure_loaded(db)
+    all_achievements = achievement_catalogue.all()
     
     # Get user's unlocked achievements
     result = await db.execute(
@@ -122,26 +120,15 @@ async def get_achievements(
 @router.post("/check", response_model=schemas.NewAchievementsResponse)
 async def check_achievements(
     db: AsyncSession = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_fresh),
 ) -> Any:
     """
     Check and award any new achievements for current user.
     Call this after completing actions that might trigger achievements.
     """
-    # Get user stats
-    result = await db.execute(
-        select(models.UserProgress)
-        .where(models.UserProgress.user_id == current_user.id)
-    )
-    progress_list = result.scalars().all()
-    
-    total_points = sum(p.completed_points_count for p in progress_list)
-    completed_routes = sum(1 for p in progress_list if p.status == 'completed')
-    
-    # Check and award
-    new_achievements = await check_and_award_achievements(
-        db, current_user, total_points, completed_routes
-    )
+    # Full check: also catches achievements added after the stats were reached
+    stats = await load_achievement_stats(db, current_user)
+    new_achievements = await check_and_award_achievements(db, current_user, stats)
     
     total_xp = sum(a.xp_reward for a in new_achievements)
     
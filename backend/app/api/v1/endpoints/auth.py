@@ -1,12 +1,13 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
+import asyncio
 import hashlib
 import hmac
 import time
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
@@ -14,7 +15,9 @@ from app import models, schemas
 from app.api import deps
 from app.core import security
 from app.core.config import settings
+from app.core.pg_listener import TELEGRAM_AUTH_CHANNEL, pg_listener
 from app.core.runtime_settings import get_setting
+from app.db.session import AsyncSessionLocal
 
 router = APIRouter()
 
@@ -84,10 +87,19 @@ async def login_access_token(
     result = await db.execute(select(models.User).where(models.User.username == form_data.username))
     user = result.scalars().first()
 
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    verified, new_hash = await security.password_hasher.verify_and_update(
+        form_data.password, user.hashed_password
+    )
+    if not verified:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    if new_hash:
+        # Старый хэш (меньше BCRYPT_ROUNDS) — заменяем, пока знаем пароль
+        user.hashed_password = new_hash
+        await db.commit()
         
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
@@ -127,7 +139,7 @@ async def register(
     user = models.User(
         email=user_in.email,
         username=user_in.username,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await security.password_hasher.hash(user_in.password),
         is_active=True,
     )
     db.add(user)
@@ -264,12 +276,6 @@ async def init_telegram_auth(
     )
     await db.commit()
     
-    # Clean old sessions (older than 10 minutes)
-    await db.execute(
-        text("DELETE FROM telegram_auth_sessions WHERE created_at < NOW() - INTERVAL '10 minutes' AND telegram_id IS NULL")
-    )
-    await db.commit()
-    
     bot_username = await get_setting(db, "TELEGRAM_BOT_USERNAME")
     bot_link = f"https://t.me/{bot_username}?start={session_id}"
     
@@ -283,43 +289,88 @@ class TelegramAuthStatus(BaseModel):
     status: str  # 'pending', 'ready', 'expired'
 
 
-@router.get("/telegram/auth-status/{session_id}", response_model=TelegramAuthStatus)
-async def get_telegram_auth_status(
-    session_id: str,
-    db: AsyncSession = Depends(deps.get_db),
-) -> Any:
-    """
-    Check if user has authenticated via Telegram bot.
-    """
-    from sqlalchemy import text
-    
-    result = await db.execute(
-        text("""
-            SELECT telegram_id, created_at 
-            FROM telegram_auth_sessions 
-            WHERE session_id = :session_id
-        """),
-        {"session_id": session_id}
-    )
-    row = result.fetchone()
+# Без LISTEN-соединения long-poll перечитывает сессию с этим интервалом
+AUTH_STATUS_RECHECK_SECONDS = 2.0
+
+_auth_waiters: dict[str, set[asyncio.Event]] = {}
+
+
+def _on_telegram_auth(session_id: str) -> None:
+    for waiter in _auth_waiters.get(session_id, ()):
+        waiter.set()
+
+
+pg_listener.add_handler(TELEGRAM_AUTH_CHANNEL, _on_telegram_auth)
+
+
+async def _read_auth_status(session_id: str) -> str:
+    # Короткая сессия: соединение не держится, пока запрос ждёт уведомления
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            text("""
+                SELECT telegram_id, created_at 
+                FROM telegram_auth_sessions 
+                WHERE session_id = :session_id
+            """),
+            {"session_id": session_id}
+        )
+        row = result.fetchone()
     
     if not row:
-        return {"status": "expired"}
+        return "expired"
     
     telegram_id, created_at = row
     
     # Check if expired (10 minutes)
-    from datetime import datetime, timezone
     if created_at.tzinfo is None:
         created_at = created_at.replace(tzinfo=timezone.utc)
     now = datetime.now(timezone.utc)
     if (now - created_at).total_seconds() > 600:
-        return {"status": "expired"}
+        return "expired"
     
     if telegram_id:
-        return {"status": "ready"}
+        return "ready"
     
-    return {"status": "pending"}
+    return "pending"
+
+
+@router.get("/telegram/auth-status/{session_id}", response_model=TelegramAuthStatus)
+async def get_telegram_auth_status(
+    session_id: str,
+    wait: int = Query(0, ge=0, le=30),
+) -> Any:
+    """
+    Check if user has authenticated via Telegram bot.
+    With ``wait`` > 0 a pending session is held open until the bot confirms
+    it (Postgres NOTIFY) or ``wait`` seconds pass.
+    """
+    waiter = asyncio.Event()
+    # Подписываемся до первого чтения, чтобы не пропустить NOTIFY между ними
+    _auth_waiters.setdefault(session_id, set()).add(waiter)
+    try:
+        auth_status = await _read_auth_status(session_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while auth_status == "pending":
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            if not pg_listener.connected:
+                remaining = min(remaining, AUTH_STATUS_RECHECK_SECONDS)
+            try:
+                await asyncio.wait_for(waiter.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+            waiter.clear()
+            auth_status = await _read_auth_status(session_id)
+    finally:
+        waiters = _auth_waiters.get(session_id)
+        if waiters is not None:
+            waiters.discard(waiter)
+            if not waiters:
+                del _auth_waiters[session_id]
+    
+    return {"status": auth_status}
 
 
 @router.post("/telegram/session/{session_id}", response_model=schemas.Token)
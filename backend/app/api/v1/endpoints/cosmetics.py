@@ -3,11 +3,12 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app import models, schemas
 from app.api import deps
+from app.core.cosmetics import KINDS as COSMETIC_KINDS, cosmetic_rules
 
 router = APIRouter()
 
@@ -52,7 +53,7 @@ async def get_all_titles(
 async def equip_title(
     title_id: int,
     db: AsyncSession = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_fresh),
 ) -> Any:
     """Надеть титул"""
     if title_id == 0:
@@ -120,7 +121,7 @@ async def get_all_frames(
 async def equip_frame(
     frame_id: int,
     db: AsyncSession = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_fresh),
 ) -> Any:
     """Надеть рамку"""
     if frame_id == 0:
@@ -187,7 +188,7 @@ async def get_all_badges(
 async def equip_badges(
     data: schemas.EquipBadges,
     db: AsyncSession = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_fresh),
 ) -> Any:
     """Надеть бейджи (макс 3)"""
     import json
@@ -224,94 +225,52 @@ async def check_and_unlock_cosmetics(
     user: models.User,
 ) -> list[dict]:
     """Проверяет и разблокирует новые косметические предметы"""
-    newly_unlocked = []
+    await cosmetic_rules.ensure_loaded(db)
     
-    # Get user's achievements
-    achievements_result = await db.execute(
-        select(models.UserAchievement)
-        .options(selectinload(models.UserAchievement.achievement))
+    # Get user's achievement codes
+    codes_result = await db.execute(
+        select(models.Achievement.code)
+        .join(models.UserAchievement, models.UserAchievement.achievement_id == models.Achievement.id)
         .where(models.UserAchievement.user_id == user.id)
     )
-    user_achievements = {ua.achievement.code for ua in achievements_result.scalars().all()}
+    candidates = cosmetic_rules.unlockable(user.level, codes_result.scalars().all())
+    if not candidates:
+        return []
     
-    # Check titles
-    titles_result = await db.execute(select(models.Title).where(models.Title.is_default == False))
-    for title in titles_result.scalars().all():
-        # Check if already unlocked
-        existing = await db.scalar(
-            select(models.UserTitle).where(
-                models.UserTitle.user_id == user.id,
-                models.UserTitle.title_id == title.id
-            )
-        )
-        if existing:
+    newly_unlocked = []
+    for kind, (_, ownership, item_column) in COSMETIC_KINDS.items():
+        items = {item.id: item for item in candidates if item.kind == kind}
+        if not items:
             continue
-        
-        # Check unlock condition
-        unlocked = False
-        if title.unlock_type == "level" and title.unlock_value:
-            if user.level >= int(title.unlock_value):
-                unlocked = True
-        elif title.unlock_type == "achievement" and title.unlock_value:
-            if title.unlock_value in user_achievements:
-                unlocked = True
-        
-        if unlocked:
-            user_title = models.UserTitle(user_id=user.id, title_id=title.id)
-            db.add(user_title)
-            newly_unlocked.append({"type": "title", "name": title.name, "rarity": title.rarity})
-    
-    # Check frames
-    frames_result = await db.execute(select(models.ProfileFrame).where(models.ProfileFrame.is_default == False))
-    for frame in frames_result.scalars().all():
-        existing = await db.scalar(
-            select(models.UserFrame).where(
-                models.UserFrame.user_id == user.id,
-                models.UserFrame.frame_id == frame.id
-            )
+        column = getattr(ownership, item_column)
+        # One query for everything the user already owns of this kind
+        owned_result = await db.execute(
+            select(column).where(ownership.user_id == user.id, column.in_(list(items)))
         )
-        if existing:
+        missing = items.keys() - set(owned_result.scalars().all())
+        if not missing:
             continue
-        
-        unlocked = False
-        if frame.unlock_type == "level" and frame.unlock_value:
-            if user.level >= int(frame.unlock_value):
-                unlocked = True
-        elif frame.unlock_type == "achievement" and frame.unlock_value:
-            if frame.unlock_value in user_achievements:
-                unlocked = True
-        
-        if unlocked:
-            user_frame = models.UserFrame(user_id=user.id, frame_id=frame.id)
-            db.add(user_frame)
-            newly_unlocked.append({"type": "frame", "name": frame.name, "rarity": frame.rarity})
-    
-    # Check badges
-    badges_result = await db.execute(select(models.Badge).where(models.Badge.is_default == False))
-    for badge in badges_result.scalars().all():
-        existing = await db.scalar(
-            select(models.UserBadge).where(
-                models.UserBadge.user_id == user.id,
-                models.UserBadge.badge_id == badge.id
-            )
+        # ON CONFLICT: a concurrent check may have inserted the same rows
+        inserted_result = await db.execute(
+            insert(ownership)
+            .values([{"user_id": user.id, item_column: item_id} for item_id in sorted(missing)])
+            .on_conflict_do_nothing(index_elements=["user_id", item_column])
+            .returning(column)
         )
-        if existing:
-            continue
-        
-        unlocked = False
-        if badge.unlock_type == "level" and badge.unlock_value:
-            if user.level >= int(badge.unlock_value):
-                unlocked = True
-        elif badge.unlock_type == "achievement" and badge.unlock_value:
-            if badge.unlock_value in user_achievements:
-                unlocked = True
-        
-        if unlocked:
-            user_badge = models.UserBadge(user_id=user.id, badge_id=badge.id)
-            db.add(user_badge)
-            newly_unlocked.append({"type": "badge", "name": badge.name, "rarity": badge.rarity})
+        for item_id in inserted_result.scalars().all():
+            item = items[item_id]
+            newly_unlocked.append({"type": kind, "name": item.name, "rarity": item.rarity})
     
     if newly_unlocked:
         await db.commit()
     
     return newly_unlocked
+
+
+@router.post("/check", response_model=list[schemas.UnlockedCosmetic])
+async def check_cosmetics(
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Разблокировать всё, что положено по уровню и достижениям"""
+    return await check_and_unlock_cosmetics(db, current_user)
@@ -1,15 +1,16 @@
-from typing import Any, List
+from typing import Any, List, Optional
 from datetime import datetime, timezone, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app import models, schemas
 from app.api import deps
+from app.core.leagues import add_weekly_xp, league_rank, league_top, week_start
 from app.models.learning import (
-    LearningModule, LearningLesson, LearningQuestion,
+    LEAGUES, LearningModule, LearningLesson, LearningQuestion,
     UserLearningProgress, UserLessonProgress, UserQuestionHistory, LearningSession,
 )
 from app.schemas.learning import (
@@ -358,18 +359,8 @@ async def complete_session(
     progress.total_xp += session.xp_earned
     _update_streak(progress)
 
-    # Promote league based on XP thresholds
-    xp = progress.total_xp
-    if xp >= 5000:
-        progress.league = "diamond"
-    elif xp >= 2500:
-        progress.league = "platinum"
-    elif xp >= 1000:
-        progress.league = "gold"
-    elif xp >= 300:
-        progress.league = "silver"
-    else:
-        progress.league = "bronze"
+    # Weekly league table; promotion/demotion happens at rollover
+    await add_weekly_xp(db, current_user.id, progress.league or LEAGUES[0], session.xp_earned)
 
     await db.commit()
 
@@ -450,6 +441,48 @@ async def get_dashboard(
     )
 
 
+# ── GET /league ────────────────────────────────────────────────────────────────
+
+@router.get("/league", response_model=LeagueLeaderboardOut)
+async def get_league(
+    league: Optional[str] = Query(None, description="Defaults to the user's league"),
+    limit: int = Query(30, ge=1, le=100),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """This week's table of a league, plus the user's own rank in it."""
+    if league is None:
+        league = await db.scalar(
+            select(UserLearningProgress.league).where(
+                UserLearningProgress.user_id == current_user.id
+            )
+        ) or LEAGUES[0]
+    elif league not in LEAGUES:
+        raise HTTPException(status_code=400, detail=f"Unknown league, expected one of {', '.join(LEAGUES)}")
+
+    week = week_start()
+    rows = await league_top(db, week, league, limit)
+    mine = await league_rank(db, week, league, current_user.id)
+
+    return LeagueLeaderboardOut(
+        league=league,
+        week_start=week,
+        users=[
+            LeagueUserOut(
+                rank=rank,
+                user_id=row.user_id,
+                username=row.username,
+                display_name=row.display_name,
+                avatar_url=row.avatar_url,
+                total_xp=row.xp,
+            )
+            for rank, row in enumerate(rows, start=1)
+        ],
+        my_rank=mine[0] if mine else None,
+        my_xp=mine[1] if mine else 0,
+    )
+
+
 # ── PUT /daily-goal ────────────────────────────────────────────────────────────
 
 @router.put("/daily-goal", response_model=UserLearningProgressOut)
@@ -0,0 +1,39 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app import models
+from app.api import deps
+from app.core.cache_bus import cache_bus
+from app.core.events import user_events
+from app.core.http_client import http_clients
+from app.core.leaderboard import leaderboard
+from app.core.pg_listener import pg_listener
+from app.core.security import password_hasher
+from app.core.user_cache import user_cache
+from app.db.session import db_stats, engine
+from app.workers.auth_sweeper import auth_sweeper
+from app.workers.geminigen_poller import geminigen_poller
+from app.workers.league_rollover import league_rollover
+
+router = APIRouter()
+
+
+@router.get("")
+async def read_metrics(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """Runtime counters of in-process pools. Only superusers."""
+    return {
+        "db": db_stats.snapshot(engine),
+        "http_clients": http_clients.stats(),
+        "event_streams": user_events.stats(),
+        "geminigen_poller": geminigen_poller.stats(),
+        "pg_listener": pg_listener.stats(),
+        "cache_bus": cache_bus.stats(),
+        "auth_sweeper": auth_sweeper.stats(),
+        "league_rollover": league_rollover.stats(),
+        "user_cache": user_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "leaderboard": leaderboard.stats(),
+    }
@@ -1,40 +1,244 @@
-from typing import Any, List, Optional
+import html
+from typing import Any, List, Literal, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from geoalchemy2 import Geography
+from sqlalchemy import cast, func, select
+from sqlalchemy.dialects.postgresql import ts_headline, websearch_to_tsquery
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only, selectinload, undefer
 
 from app import models, schemas
 from app.api import deps
+from app.core.poi_clusters import poi_clusters
+from app.core.poi_index import IndexedPOI, poi_index
+from app.core.route_cache import route_cache
+from app.core.route_metrics import refresh_route_metrics
+from app.models.poi import SUMMARY_COLUMNS
 
 router = APIRouter()
 
+# Радиус поиска «рядом со мной», если клиент не передал radius_m
+DEFAULT_NEARBY_RADIUS_M = 1000.0
 
-@router.get("", response_model=List[schemas.PointOfInterest])
+
+# Полный вид точки: статья + фото
+_FULL_OPTIONS = (
+    undefer(models.PointOfInterest.full_article),
+    selectinload(models.PointOfInterest.photos),
+)
+_SUMMARY_OPTIONS = (load_only(*SUMMARY_COLUMNS),)
+
+# Конфигурация full-text: та же, что в PointOfInterest.search_vector
+SEARCH_CONFIG = "russian"
+# Маркеры подсветки из Private Use Area: текст экранируется, потом они становятся <mark>
+_MARK_START, _MARK_STOP = "\ue000", "\ue001"
+_HEADLINE_OPTIONS = (
+    f"StartSel={_MARK_START}, StopSel={_MARK_STOP}, "
+    "MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=\" … \""
+)
+
+Fields = Literal["full", "summary"]
+POIListItem = Union[schemas.PointOfInterest, schemas.PointOfInterestSummary]
+
+
+def _projection(fields: Fields):
+    if fields == "summary":
+        return _SUMMARY_OPTIONS, schemas.PointOfInterestSummary
+    return _FULL_OPTIONS, schemas.PointOfInterest
+
+
+async def _load_with_distances(
+    db: AsyncSession, hits: list[tuple[IndexedPOI, float]], fields: Fields = "full"
+) -> list[POIListItem]:
+    """Fetch rows for index hits by primary key, keeping hit order."""
+    if not hits:
+        return []
+    options, schema = _projection(fields)
+    result = await db.execute(
+        select(models.PointOfInterest)
+        .options(*options)
+        .where(models.PointOfInterest.id.in_([poi.id for poi, _ in hits]))
+    )
+    rows = {poi.id: poi for poi in result.scalars().all()}
+    return [
+        schema.model_validate(rows[poi.id]).model_copy(update={"distance_m": dist})
+        for poi, dist in hits
+        if poi.id in rows
+    ]
+
+
+def _geo_point(latitude: float, longitude: float):
+    """WGS84 point as a geography expression (note lon/lat order in PostGIS)."""
+    return cast(
+        func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326),
+        Geography(geometry_type="POINT", srid=4326),
+    )
+
+
+async def _db_within(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    radius_m: float,
+    skip: int,
+    limit: int,
+    fields: Fields,
+) -> list[POIListItem]:
+    """Radius search in PostGIS (GiST on ``geog``), nearest first."""
+    options, schema = _projection(fields)
+    point = _geo_point(latitude, longitude)
+    distance = func.ST_Distance(models.PointOfInterest.geog, point)
+    result = await db.execute(
+        select(models.PointOfInterest, distance.label("distance_m"))
+        .options(*options)
+        .where(func.ST_DWithin(models.PointOfInterest.geog, point, radius_m))
+        .order_by(distance, models.PointOfInterest.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [
+        schema.model_validate(poi).model_copy(update={"distance_m": dist})
+        for poi, dist in result.all()
+    ]
+
+
+@router.get("", response_model=List[POIListItem])
 async def read_pois(
     db: AsyncSession = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
-    latitude: Optional[float] = None,
-    longitude: Optional[float] = None,
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    radius_m: Optional[float] = Query(None, gt=0, le=50000),
+    fields: Fields = Query("full"),
 ) -> Any:
-    query = select(models.PointOfInterest).options(selectinload(models.PointOfInterest.photos))
-    if latitude is not None and longitude is not None:
-        delta = 0.01
-        query = query.where(
-            models.PointOfInterest.latitude.between(latitude - delta, latitude + delta),
-            models.PointOfInterest.longitude.between(longitude - delta, longitude + delta),
+    """
+    List POIs. With latitude/longitude returns only points within
+    ``radius_m`` metres, nearest first, each with ``distance_m``.
+    ``fields=summary`` returns only id/title/coords/thumbnail.
+    """
+    if latitude is None or longitude is None:
+        options, schema = _projection(fields)
+        result = await db.execute(
+            select(models.PointOfInterest)
+            .options(*options)
+            .offset(skip)
+            .limit(limit)
         )
-    result = await db.execute(query.offset(skip).limit(limit))
-    return result.scalars().all()
+        return [schema.model_validate(poi) for poi in result.scalars().all()]
+
+    radius_m = radius_m or DEFAULT_NEARBY_RADIUS_M
+    if not poi_index.loaded:
+        # Холодный старт (или после invalidate): не ждём загрузку сетки,
+        # отвечаем из PostGIS, а сетка грузится в фоне
+        poi_index.schedule_load()
+        return await _db_within(db, latitude, longitude, radius_m, skip, limit, fields)
+    hits = poi_index.within(latitude, longitude, radius_m)
+    return await _load_with_distances(db, hits[skip:skip + limit], fields)
+
+
+@router.get("/nearest", response_model=List[POIListItem])
+async def read_nearest_pois(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=50),
+    fields: Fields = Query("full"),
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """The ``k`` POIs closest to the given point, nearest first."""
+    await poi_index.ensure_loaded(db)
+    return await _load_with_distances(db, poi_index.nearest(latitude, longitude, k), fields)
+
+
+@router.get("/tiles/{z}/{x}/{y}", response_model=schemas.POITile)
+async def read_poi_tile(
+    z: int = Path(..., ge=0, le=22),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    POIs in a web-mercator (XYZ) tile, clustered server-side up to zoom 16.
+    """
+    if x >= 1 << z or y >= 1 << z:
+        raise HTTPException(status_code=400, detail="Tile out of range")
+    await poi_index.ensure_loaded(db)
+    poi_clusters.sync(poi_index)
+    return schemas.POITile(
+        z=z, x=x, y=y,
+        features=[schemas.POITileFeature.model_validate(f) for f in poi_clusters.tile(z, x, y)],
+    )
+
+
+def _highlight(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    return html.escape(text).replace(_MARK_START, "<mark>").replace(_MARK_STOP, "</mark>")
+
+
+@router.get("/search", response_model=List[schemas.POISearchHit])
+async def search_pois(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    Full-text search over title, description and article (Russian stemming).
+    ``q`` accepts web-search syntax: "quoted phrases", ``or``, ``-exclude``.
+    """
+    poi = models.PointOfInterest
+    query = websearch_to_tsquery(SEARCH_CONFIG, q)
+
+    # Сначала top-N по GIN-индексу, ts_headline — только для них
+    rank = func.ts_rank_cd(poi.search_vector, query, 1)
+    ranked = (
+        select(poi.id, rank.label("rank"))
+        .where(poi.search_vector.bool_op("@@")(query))
+        .order_by(rank.desc(), poi.id)
+        .limit(limit)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            poi.id,
+            poi.title,
+            poi.latitude,
+            poi.longitude,
+            poi.historic_image_url,
+            poi.modern_image_url,
+            ranked.c.rank,
+            ts_headline(SEARCH_CONFIG, poi.title, query, "HighlightAll=true").label("title_highlight"),
+            ts_headline(
+                SEARCH_CONFIG,
+                func.concat_ws("\n", poi.description, poi.full_article),
+                query,
+                _HEADLINE_OPTIONS,
+            ).label("snippet"),
+        )
+        .join(ranked, ranked.c.id == poi.id)
+        .order_by(ranked.c.rank.desc(), poi.id)
+    )
+    return [
+        schemas.POISearchHit(
+            id=row.id,
+            title=row.title,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            thumbnail_url=row.historic_image_url or row.modern_image_url,
+            rank=row.rank,
+            title_highlight=_highlight(row.title_highlight),
+            snippet=_highlight(row.snippet) or None,
+        )
+        for row in result.all()
+    ]
 
 
 @router.get("/{poi_id}", response_model=schemas.PointOfInterest)
 async def read_poi(*, db: AsyncSession = Depends(deps.get_db), poi_id: int) -> Any:
     result = await db.execute(
         select(models.PointOfInterest)
-        .options(selectinload(models.PointOfInterest.photos))
+        .options(*_FULL_OPTIONS)
         .where(models.PointOfInterest.id == poi_id)
     )
     poi = result.scalars().first()
@@ -57,6 +261,8 @@ async def create_poi(
     for p in (poi_in.photos or []):
         db.add(models.POIPhoto(poi_id=poi.id, **p.model_dump()))
     await db.commit()
+    poi_index.upsert(poi)
+    route_cache.invalidate()
     return await read_poi(db=db, poi_id=poi.id)
 
 
@@ -77,6 +283,10 @@ async def update_poi(
     if not poi:
         raise HTTPException(status_code=404, detail="POI not found")
     update_data = poi_in.model_dump(exclude_unset=True, exclude={"photos"})
+    moved = any(
+        field in update_data and update_data[field] != getattr(poi, field)
+        for field in ("latitude", "longitude")
+    )
     for field, value in update_data.items():
         setattr(poi, field, value)
     if poi_in.photos is not None:
@@ -86,7 +296,15 @@ async def update_poi(
         await db.flush()
         for p in poi_in.photos:
             db.add(models.POIPhoto(poi_id=poi.id, **p.model_dump()))
+    if moved:
+        route_ids = await db.execute(
+            select(models.route_poi_association.c.route_id)
+            .where(models.route_poi_association.c.poi_id == poi.id)
+        )
+        await refresh_route_metrics(db, route_ids.scalars().all())
     await db.commit()
+    poi_index.upsert(poi)
+    route_cache.invalidate()
     return await read_poi(db=db, poi_id=poi.id)
 
 
@@ -102,6 +320,8 @@ async def delete_poi(
         raise HTTPException(status_code=404, detail="POI not found")
     await db.delete(poi)
     await db.commit()
+    poi_index.remove(poi_id)
+    route_cache.invalidate()
     return {"ok": True}
 
 
@@ -111,7 +331,15 @@ async def delete_poi(
 async def get_article(poi_id: int, db: AsyncSession = Depends(deps.get_db)) -> Any:
     """Get the full article for a POI."""
     result = await db.execute(
-        select(models.PointOfInterest).where(models.PointOfInterest.id == poi_id)
+        select(models.PointOfInterest)
+        .options(load_only(
+            models.PointOfInterest.id,
+            models.PointOfInterest.title,
+            models.PointOfInterest.address,
+            models.PointOfInterest.description,
+            models.PointOfInterest.full_article,
+        ))
+        .where(models.PointOfInterest.id == poi_id)
     )
     poi = result.scalars().first()
     if not poi:
@@ -168,6 +396,7 @@ async def add_photo(
     photo = models.POIPhoto(poi_id=poi_id, **photo_in.model_dump())
     db.add(photo)
     await db.commit()
+    route_cache.invalidate()
     await db.refresh(photo)
     return photo
 
@@ -184,4 +413,5 @@ async def delete_photo(
         raise HTTPException(status_code=404, detail="Photo not found")
     await db.delete(photo)
     await db.commit()
+    route_cache.invalidate()
     return {"ok": True}
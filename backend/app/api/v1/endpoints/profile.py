@@ -12,6 +12,7 @@ from sqlalchemy.orm import selectinload
 
 from app import models, schemas
 from app.api import deps
+from app.core.user_stats import get_user_stats
 
 router = APIRouter()
 
@@ -37,6 +38,8 @@ async def get_my_profile(
     )
     user = result.scalar_one()
     
+    stats = await get_user_stats(db, user.id)
+    
     # Count friends
     friends_count = await db.scalar(
         select(func.count()).select_from(models.Friendship).where(models.Friendship.user_id == user.id)
@@ -83,6 +86,9 @@ async def get_my_profile(
         unlocked_badges_count=len(user.unlocked_badges),
         friends_count=friends_count or 0,
         achievements_count=len(user.achievements),
+        checked_in_points=stats["points"],
+        completed_routes=stats["routes"],
+        correct_quizzes=stats["quizzes"],
         telegram_id=user.telegram_id,
         telegram_username=user.telegram_username,
         telegram_first_name=user.telegram_first_name,
@@ -97,7 +103,7 @@ async def update_my_profile(
     *,
     db: AsyncSession = Depends(deps.get_db),
     profile_in: schemas.ProfileUpdate,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_fresh),
 ) -> Any:
     """Обновить свой профиль"""
     if profile_in.display_name is not None:
@@ -178,7 +184,7 @@ async def update_my_profile(
 async def upload_avatar(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_fresh),
 ) -> Any:
     """Загрузить аватар"""
     # Validate file type
@@ -210,47 +216,94 @@ async def upload_avatar(
     return {"avatar_url": current_user.avatar_url}
 
 
+SEARCH_MIN_LENGTH = 2
+# Короче — триграммы не работают, ищем только по префиксу (btree text_pattern_ops)
+SEARCH_TRGM_MIN_LENGTH = 3
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 @router.get("/search", response_model=list[schemas.UserSearchResult])
 async def search_users(
-    q: str = Query(..., min_length=2),
+    q: str = Query(..., min_length=SEARCH_MIN_LENGTH),
     db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=50),
 ) -> Any:
     """Поиск пользователей"""
+    term = q.strip().lower()
+    if len(term) < SEARCH_MIN_LENGTH:
+        # Иначе "  " превратится в LIKE '%' по всей таблице
+        raise HTTPException(status_code=422, detail=f"Query must be at least {SEARCH_MIN_LENGTH} characters")
+    username = func.lower(models.User.username)
+    display_name = func.lower(models.User.display_name)
+    prefix = f"{_like_escape(term)}%"
+
+    if len(term) < SEARCH_TRGM_MIN_LENGTH:
+        match = or_(username.like(prefix), display_name.like(prefix))
+        ranking = (func.length(models.User.username),)
+    else:
+        # GIN (gin_trgm_ops): подстрока через LIKE и опечатки через %
+        contains = f"%{_like_escape(term)}%"
+        match = or_(
+            username.like(contains),
+            display_name.like(contains),
+            username.op("%")(term),
+            display_name.op("%")(term),
+        )
+        ranking = (
+            username.like(prefix).desc(),
+            func.greatest(
+                func.similarity(username, term),
+                func.coalesce(func.similarity(display_name, term), 0),
+            ).desc(),
+        )
+
+    # Титул, рамка и признак дружбы — в том же запросе
+    is_friend = models.Friendship.id.is_not(None).label("is_friend")
     result = await db.execute(
-        select(models.User)
-        .options(selectinload(models.User.equipped_title), selectinload(models.User.equipped_frame))
-        .where(
-            or_(
-                models.User.username.ilike(f"%{q}%"),
-                models.User.display_name.ilike(f"%{q}%")
+        select(
+            models.User.id,
+            models.User.username,
+            models.User.display_name,
+            models.User.avatar_url,
+            models.User.level,
+            models.Title,
+            models.ProfileFrame,
+            is_friend,
+        )
+        .outerjoin(models.Title, models.Title.id == models.User.equipped_title_id)
+        .outerjoin(models.ProfileFrame, models.ProfileFrame.id == models.User.equipped_frame_id)
+        .outerjoin(
+            models.Friendship,
+            and_(
+                models.Friendship.user_id == current_user.id,
+                models.Friendship.friend_id == models.User.id,
             ),
+        )
+        .where(
+            match,
             models.User.id != current_user.id,
-            models.User.profile_visibility != "private"
+            models.User.profile_visibility != "private",
         )
+        .order_by((username == term).desc(), *ranking, models.User.id)
         .limit(limit)
     )
-    users = result.scalars().all()
-    
-    # Get friend IDs
-    friends_result = await db.execute(
-        select(models.Friendship.friend_id).where(models.Friendship.user_id == current_user.id)
-    )
-    friend_ids = set(friends_result.scalars().all())
     
     return [
         schemas.UserSearchResult(
-            id=u.id,
-            username=u.username,
-            display_name=u.display_name,
-            avatar_url=u.avatar_url,
-            level=u.level,
-            equipped_title=schemas.TitleOut.model_validate(u.equipped_title) if u.equipped_title else None,
-            equipped_frame=schemas.FrameOut.model_validate(u.equipped_frame) if u.equipped_frame else None,
-            is_friend=u.id in friend_ids,
+            id=row.id,
+            username=row.username,
+            display_name=row.display_name,
+            avatar_url=row.avatar_url,
+            level=row.level,
+            equipped_title=schemas.TitleOut.model_validate(row.Title) if row.Title else None,
+            equipped_frame=schemas.FrameOut.model_validate(row.ProfileFrame) if row.ProfileFrame else None,
+            is_friend=row.is_friend,
         )
-        for u in users
+        for row in result.all()
     ]
 
 
@@ -317,6 +370,8 @@ async def get_user_profile(
         if user.profile_visibility == "friends" and not is_friend:
             raise HTTPException(status_code=403, detail="Profile is friends-only")
     
+    stats = await get_user_stats(db, user.id)
+    
     # Count friends
     friends_count = await db.scalar(
         select(func.count()).select_from(models.Friendship).where(models.Friendship.user_id == user_id)
@@ -350,6 +405,8 @@ async def get_user_profile(
         equipped_badges=equipped_badges,
         achievements_count=len(user.achievements),
         friends_count=friends_count or 0,
+        checked_in_points=stats["points"],
+        completed_routes=stats["routes"],
         total_distance_km=user.total_distance_km or 0,
         streak_days=user.streak_days or 0,
         created_at=user.created_at,
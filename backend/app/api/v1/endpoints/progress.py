@@ -6,7 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
 from app.api import deps
-from app.api.v1.endpoints.achievements import check_and_award_achievements
+from app.api.v1.endpoints.achievements import check_and_award_achievements, load_achievement_stats
+from app.core.user_stats import bump_user_stats
 
 router = APIRouter()
 
@@ -75,6 +76,11 @@ async def create_progress(
         completed_points_count=progress_in.completed_points_count
     )
     db.add(progress)
+    await bump_user_stats(
+        db, current_user.id,
+        points=progress.completed_points_count or 0,
+        routes=1 if progress.status == "completed" else 0,
+    )
     await db.commit()
     await db.refresh(progress)
     return progress
@@ -96,6 +102,11 @@ async def delete_progress(
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
     await db.delete(progress)
+    await bump_user_stats(
+        db, current_user.id,
+        points=-(progress.completed_points_count or 0),
+        routes=-1 if progress.status == "completed" else 0,
+    )
     await db.commit()
     return progress
 
@@ -117,12 +128,19 @@ async def update_progress(
     if progress.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
+    old_points = progress.completed_points_count or 0
+    old_completed = progress.status == "completed"
     if progress_in.status is not None:
         progress.status = progress_in.status
     if progress_in.completed_points_count is not None:
         progress.completed_points_count = progress_in.completed_points_count
     
     db.add(progress)
+    await bump_user_stats(
+        db, current_user.id,
+        points=(progress.completed_points_count or 0) - old_points,
+        routes=int(progress.status == "completed") - int(old_completed),
+    )
     await db.commit()
     await db.refresh(progress)
     return progress
@@ -132,7 +150,7 @@ async def check_in(
     *,
     db: AsyncSession = Depends(deps.get_db),
     check_in_in: schemas.CheckIn,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_fresh),
 ) -> Any:
     """
     Check-in at a POI, gain XP and update progress.
@@ -186,16 +204,22 @@ async def check_in(
     # 4. Award XP
     xp_to_add = 50.0 # Fixed 50 XP per point/check-in
     bonus_xp = 0.0
+    route_completed = False
+    previous_level = current_user.level
     
     current_user.xp += xp_to_add
     
     # Check if route completion just happened
     if progress.completed_points_count >= len(route.points):
         progress.status = "completed"
+        route_completed = True
         # Award Route Completion Bonus
         if route.reward_xp:
             bonus_xp = route.reward_xp
             current_user.xp += bonus_xp
+        # Пройденная дистанция и время прогулок
+        current_user.total_distance_km = (current_user.total_distance_km or 0) + (route.length_m or 0) / 1000
+        current_user.total_time_minutes = (current_user.total_time_minutes or 0) + (route.walking_minutes or 0)
 
     # Calculate new level
     # Formula derived from S = 25L^2 + 125L - 150
@@ -214,31 +238,24 @@ async def check_in(
     
     db.add(progress)
     db.add(current_user)
+    await bump_user_stats(
+        db, current_user.id, points=1, routes=1 if route_completed else 0
+    )
     
     await db.commit()
     await db.refresh(progress)
     await db.refresh(current_user)
     
-    # Check for new achievements
-    # Get updated stats
-    result = await db.execute(
-        select(models.UserProgress)
-        .where(models.UserProgress.user_id == current_user.id)
-    )
-    all_progress = result.scalars().all()
-    total_points = sum(p.completed_points_count for p in all_progress)
-    completed_routes = sum(1 for p in all_progress if p.status == 'completed')
-    
-    # Get quiz count
-    quiz_result = await db.execute(
-        select(models.UserQuizProgress)
-        .where(models.UserQuizProgress.user_id == current_user.id)
-        .where(models.UserQuizProgress.is_correct == True)
-    )
-    total_quizzes = len(quiz_result.scalars().all())
-    
+    # Check for new achievements: only thresholds this check-in crossed
+    stats = await load_achievement_stats(db, current_user)
+    previous = {
+        **stats,
+        "points": stats["points"] - 1,
+        "routes": stats["routes"] - (1 if route_completed else 0),
+        "level": previous_level,
+    }
     new_achievements = await check_and_award_achievements(
-        db, current_user, total_points, completed_routes, total_quizzes
+        db, current_user, stats, previous
     )
     
     # Add achievement XP to response
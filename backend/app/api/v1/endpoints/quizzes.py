@@ -4,7 +4,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app import models, schemas
 from app.api import deps
-from app.api.v1.endpoints.achievements import check_and_award_achievements
+from app.api.v1.endpoints.achievements import check_and_award_achievements, load_achievement_stats
+from app.core.user_stats import bump_user_stats, subtract_quiz_answers
 import math
 
 router = APIRouter()
@@ -107,6 +108,7 @@ async def delete_quiz(
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
+    await subtract_quiz_answers(db, quiz_id)
     await db.delete(quiz)
     await db.commit()
     return {"ok": True}
@@ -117,7 +119,7 @@ async def submit_quiz_answer(
     db: AsyncSession = Depends(deps.get_db),
     quiz_id: int,
     answer_in: schemas.QuizSubmit,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_fresh),
 ) -> Any:
     """Submit quiz answer and get XP if correct"""
     # Get quiz
@@ -140,6 +142,8 @@ async def submit_quiz_answer(
     is_correct = answer_in.answer.upper() == quiz.correct_answer.upper()
     xp_earned = quiz.xp_reward if is_correct else 0.0
     
+    previous_level = current_user.level
+    
     # Update user XP
     if is_correct:
         current_user.xp += xp_earned
@@ -164,30 +168,19 @@ async def submit_quiz_answer(
     )
     db.add(progress)
     db.add(current_user)
+    if is_correct:
+        await bump_user_stats(db, current_user.id, quizzes=1)
     await db.commit()
     await db.refresh(current_user)
     
     # Check for quiz achievements if correct
     new_achievements = []
     if is_correct:
-        # Get stats for achievements
-        progress_result = await db.execute(
-            select(models.UserProgress)
-            .where(models.UserProgress.user_id == current_user.id)
-        )
-        all_progress = progress_result.scalars().all()
-        total_points = sum(p.completed_points_count for p in all_progress)
-        completed_routes = sum(1 for p in all_progress if p.status == 'completed')
-        
-        quiz_result = await db.execute(
-            select(models.UserQuizProgress)
-            .where(models.UserQuizProgress.user_id == current_user.id)
-            .where(models.UserQuizProgress.is_correct == True)
-        )
-        total_quizzes = len(quiz_result.scalars().all())
-        
+        # Only thresholds crossed by this answer
+        stats = await load_achievement_stats(db, current_user)
+        previous = {**stats, "quizzes": stats["quizzes"] - 1, "level": previous_level}
         new_achievements = await check_and_award_achievements(
-            db, current_user, total_points, completed_routes, total_quizzes
+            db, current_user, stats, previous
         )
         await db.refresh(current_user)
     
@@ -1,16 +1,32 @@
-from typing import Any, List
+from typing import Any, List, Literal, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from pydantic import TypeAdapter
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only, selectinload, undefer
 
 from app import models, schemas
 from app.api import deps
+from app.core.route_cache import etag_matches, route_cache
+from app.core.route_metrics import refresh_route_metrics
+from app.core.user_stats import subtract_route_progress
+from app.models.poi import SUMMARY_COLUMNS
 # from geoalchemy2.shape import to_shape
 
 router = APIRouter()
 
+_route_list_adapter = TypeAdapter(List[schemas.Route])
+_route_summary_list_adapter = TypeAdapter(List[schemas.RouteSummary])
+
+# Точки маршрута целиком: со статьёй и фото
+_full_points = selectinload(models.Route.points).options(
+    undefer(models.PointOfInterest.full_article),
+    selectinload(models.PointOfInterest.photos),
+)
+# Для карты: только id/название/координаты/превью
+_summary_points = selectinload(models.Route.points).options(load_only(*SUMMARY_COLUMNS))
+
 
 def poi_to_schema(p: models.PointOfInterest) -> schemas.PointOfInterest:
     """Convert POI model to schema with all fields."""
@@ -34,44 +50,62 @@ def poi_to_schema(p: models.PointOfInterest) -> schemas.PointOfInterest:
         photos=photos,
     )
 
-@router.get("", response_model=List[schemas.Route])
+
+def route_to_schema(r: models.Route) -> schemas.Route:
+    """Convert Route model (with points loaded) to schema."""
+    return schemas.Route(
+        id=r.id,
+        title=r.title,
+        description=r.description,
+        difficulty=r.difficulty,
+        reward_xp=r.reward_xp,
+        is_premium=r.is_premium,
+        length_m=r.length_m,
+        walking_minutes=r.walking_minutes,
+        points=[poi_to_schema(p) for p in r.points],
+    )
+
+
+async def _get_route(db: AsyncSession, route_id: int) -> Optional[models.Route]:
+    """Load a route with its full points, overwriting any stale session state."""
+    result = await db.execute(
+        select(models.Route)
+        .options(_full_points)
+        .where(models.Route.id == route_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+@router.get("", response_model=List[Union[schemas.Route, schemas.RouteSummary]])
 async def read_routes(
     db: AsyncSession = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0, le=10000),
+    limit: int = Query(100, ge=1, le=200),
+    fields: Literal["full", "summary"] = Query("full"),
+    if_none_match: Optional[str] = Header(None),
 ) -> Any:
     """
-    Retrieve routes.
+    Retrieve routes. ``fields=summary`` returns points without articles,
+    descriptions and galleries.
+
+    Served from the serialised catalogue cache; supports ETag / If-None-Match.
     """
-    # Eager load points
-    result = await db.execute(
-        select(models.Route)
-        .options(
-            selectinload(models.Route.points)
-            .selectinload(models.PointOfInterest.photos)
-        )
-        .offset(skip)
-        .limit(limit)
-    )
-    routes = result.scalars().all()
-    
-    # We need to map the POIs inside to schema POIs with lat/lon
-    route_schemas = []
-    for r in routes:
-        points_schema = [poi_to_schema(p) for p in r.points]
-            
-        route_schemas.append(
-            schemas.Route(
-                id=r.id,
-                title=r.title,
-                description=r.description,
-                difficulty=r.difficulty,
-                reward_xp=r.reward_xp,
-                is_premium=r.is_premium,
-                points=points_schema
+    async def build() -> bytes:
+        query = select(models.Route).offset(skip).limit(limit)
+        if fields == "summary":
+            result = await db.execute(query.options(_summary_points))
+            return _route_summary_list_adapter.dump_json(
+                [schemas.RouteSummary.model_validate(r) for r in result.scalars().all()]
             )
-        )
-    return route_schemas
+        result = await db.execute(query.options(_full_points))
+        return _route_list_adapter.dump_json([route_to_schema(r) for r in result.scalars().all()])
+
+    body, etag = await route_cache.get_or_build((skip, limit, fields), build)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.post("", response_model=schemas.Route)
 async def create_route(
@@ -105,21 +139,12 @@ async def create_route(
                 order=idx
             )
             await db.execute(stmt)
+    await refresh_route_metrics(db, [route.id])
 
     await db.commit()
-    await db.refresh(route, attribute_names=['points']) # refresh relationships
-    
-    points_schema = [poi_to_schema(p) for p in route.points]
+    route_cache.invalidate()
 
-    return schemas.Route(
-        id=route.id,
-        title=route.title,
-        description=route.description,
-        difficulty=route.difficulty,
-        reward_xp=route.reward_xp,
-        is_premium=route.is_premium,
-        points=points_schema
-    )
+    return route_to_schema(await _get_route(db, route.id))
 
 @router.get("/{route_id}", response_model=schemas.Route)
 async def read_route(
@@ -130,29 +155,11 @@ async def read_route(
     """
     Get route by ID.
     """
-    result = await db.execute(
-        select(models.Route)
-        .options(
-            selectinload(models.Route.points)
-            .selectinload(models.PointOfInterest.photos)
-        )
-        .where(models.Route.id == route_id)
-    )
-    route = result.scalars().first()
+    route = await _get_route(db, route_id)
     if not route:
         raise HTTPException(status_code=404, detail="Route not found")
 
-    points_schema = [poi_to_schema(p) for p in route.points]
-
-    return schemas.Route(
-        id=route.id,
-        title=route.title,
-        description=route.description,
-        difficulty=route.difficulty,
-        reward_xp=route.reward_xp,
-        is_premium=route.is_premium,
-        points=points_schema
-    )
+    return route_to_schema(route)
 
 @router.put("/{route_id}", response_model=schemas.Route)
 async def update_route(
@@ -196,25 +203,16 @@ async def update_route(
                     order=idx
                 )
                 await db.execute(insert_stmt)
+            await refresh_route_metrics(db, [route_id])
 
     for field, value in update_data.items():
         setattr(route, field, value)
 
     db.add(route)
     await db.commit()
-    await db.refresh(route, attribute_names=['points'])
-    
-    points_schema = [poi_to_schema(p) for p in route.points]
+    route_cache.invalidate()
 
-    return schemas.Route(
-        id=route.id,
-        title=route.title,
-        description=route.description,
-        difficulty=route.difficulty,
-        reward_xp=route.reward_xp,
-        is_premium=route.is_premium,
-        points=points_schema
-    )
+    return route_to_schema(await _get_route(db, route.id))
 
 @router.delete("/{route_id}", response_model=schemas.Route)
 async def delete_route(
@@ -227,29 +225,11 @@ async def delete_route(
     Delete route. Only superusers.
     """
     # Fetch route with points and photos to return schema
-    result = await db.execute(
-        select(models.Route)
-        .options(
-            selectinload(models.Route.points)
-            .selectinload(models.PointOfInterest.photos)
-        )
-        .where(models.Route.id == route_id)
-    )
-    route = result.scalars().first()
+    route = await _get_route(db, route_id)
     if not route:
         raise HTTPException(status_code=404, detail="Route not found")
 
-    points_schema = [poi_to_schema(p) for p in route.points]
-    
-    route_schema = schemas.Route(
-        id=route.id,
-        title=route.title,
-        description=route.description,
-        difficulty=route.difficulty,
-        reward_xp=route.reward_xp,
-        is_premium=route.is_premium,
-        points=points_schema
-    )
+    route_schema = route_to_schema(route)
 
     # Delete via SQL to avoid lazy-load / MissingGreenlet issues
     from sqlalchemy import delete as sql_delete
@@ -258,6 +238,7 @@ async def delete_route(
             models.route_poi_association.c.route_id == route_id
         )
     )
+    await subtract_route_progress(db, route_id)
     await db.execute(
         sql_delete(models.UserProgress).where(
             models.UserProgress.route_id == route_id
@@ -267,4 +248,5 @@ async def delete_route(
         sql_delete(models.Route).where(models.Route.id == route_id)
     )
     await db.commit()
+    route_cache.invalidate()
     return route_schema
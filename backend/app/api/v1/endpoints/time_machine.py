@@ -10,6 +10,8 @@ Modes:
 - full_vintage: Full update + vintage photo style (B&W, sepia, grain, vignette)
 """
 
+import asyncio
+import json
 import os
 import uuid
 import base64
@@ -20,16 +22,19 @@ from math import ceil
 from pathlib import Path
 from typing import Optional
 
-import httpx
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
-from sqlalchemy import select, func as sa_func
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update, func as sa_func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models
 from app.api import deps
 from app.core.config import settings
+from app.core.events import user_events
+from app.core.http_client import http_clients
 from app.core.runtime_settings import get_setting
-from app.models.time_photo import TimePhoto
+from app.models.time_photo import TimePhoto, TimePhotoJob
+from app.workers.time_machine import time_machine_worker
 from app.schemas.time_photo import (
     CrystalBalance,
     TimePhotoCreate,
@@ -45,9 +50,15 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # API URLs
 GEMINIGEN_URL = "https://api.geminigen.ai/uapi/v1/generate_image"
+GEMINIGEN_HISTORIES_URL = "https://api.geminigen.ai/uapi/v1/histories"
+GEMINIGEN_HISTORIES_PAGE_SIZE = 50
+GEMINIGEN_HISTORIES_MAX_PAGES = 10
 KIE_API_BASE = "https://api.kie.ai"
 KIE_FILE_UPLOAD_URL = "https://kieai.redpandaai.co/api/file-base64-upload"
 
+# SSE: комментарий-пинг, чтобы прокси не закрывали тихое соединение
+SSE_KEEPALIVE_SECONDS = 20
+
 
 # ──────────────────────────────────────────────────────────────────────
 # Prompt Templates
@@ -299,38 +310,46 @@ async def _call_geminigen(
     api_key = await get_setting(db, "GEMINIGEN_API_KEY") if db else settings.GEMINIGEN_API_KEY
     headers = {"x-api-key": api_key}
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        with open(disk_path, "rb") as f:
-            resp = await client.post(
-                GEMINIGEN_URL,
-                headers=headers,
-                data={
-                    "prompt": prompt,
-                    "model": "nano-banana-pro",
-                    "style": "Photorealistic",
-                },
-                files={"files": (disk_path.name, f, "image/jpeg")},
-            )
+    with open(disk_path, "rb") as f:
+        resp = await http_clients.get("geminigen").post(
+            GEMINIGEN_URL,
+            headers=headers,
+            data={
+                "prompt": prompt,
+                "model": "nano-banana-pro",
+                "style": "Photorealistic",
+            },
+            files={"files": (disk_path.name, f, "image/jpeg")},
+        )
     resp.raise_for_status()
     return resp.json()
 
 
-async def _poll_geminigen(geminigen_uuid: str, db: AsyncSession = None) -> dict:
-    """Check the status of a pending generation via histories API."""
+async def _fetch_geminigen_histories(
+    wanted: set[str], db: AsyncSession = None
+) -> tuple[dict[str, dict], int]:
+    """Generations from the histories API keyed by uuid, plus the number of pages read.
+
+    Pages (newest first) are read until every ``wanted`` uuid has been seen
+    or the history ends, so one round answers for every pending photo.
+    """
     api_key = await get_setting(db, "GEMINIGEN_API_KEY") if db else settings.GEMINIGEN_API_KEY
     headers = {"x-api-key": api_key}
-    url = "https://api.geminigen.ai/uapi/v1/histories"
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.get(url, headers=headers)
-    resp.raise_for_status()
-    data = resp.json()
-
-    for item in data.get("result", []):
-        if str(item.get("uuid")) == str(geminigen_uuid):
-            return item
-
-    return data.get("result", [{}])[0] if data.get("result") else {}
+    items: dict[str, dict] = {}
+    for page in range(1, GEMINIGEN_HISTORIES_MAX_PAGES + 1):
+        resp = await http_clients.get("geminigen").get(
+            GEMINIGEN_HISTORIES_URL,
+            headers=headers,
+            params={"page": page, "items_per_page": GEMINIGEN_HISTORIES_PAGE_SIZE},
+            timeout=30.0,
+        )
+        resp.raise_for_status()
+        result = resp.json().get("result", [])
+        items.update((str(item["uuid"]), item) for item in result if item.get("uuid"))
+        if wanted <= items.keys() or len(result) < GEMINIGEN_HISTORIES_PAGE_SIZE:
+            break
+    return items, page
 
 
 # ──────────────────────────────────────────────────────────────────────
@@ -366,8 +385,7 @@ async def _upload_to_kie(file_path: str, db: AsyncSession) -> str:
         "fileName": f"upload-{uuid.uuid4().hex}{ext}"
     }
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(KIE_FILE_UPLOAD_URL, headers=headers, json=payload)
+    resp = await http_clients.get("kie").post(KIE_FILE_UPLOAD_URL, headers=headers, json=payload)
     
     resp.raise_for_status()
     data = resp.json()
@@ -412,12 +430,11 @@ async def _call_kie(
         }
     }
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(
-            f"{KIE_API_BASE}/api/v1/jobs/createTask",
-            headers=headers,
-            json=payload
-        )
+    resp = await http_clients.get("kie").post(
+        f"{KIE_API_BASE}/api/v1/jobs/createTask",
+        headers=headers,
+        json=payload
+    )
     
     resp.raise_for_status()
     data = resp.json()
@@ -432,49 +449,19 @@ async def _call_kie(
     raise ValueError(f"KIE API error: {data.get('msg', 'Unknown error')}")
 
 
-async def _poll_kie(task_id: str, db: AsyncSession) -> dict:
-    """
-    Check the status of a KIE generation task.
-    
-    KIE API uses webhooks for results - there's no polling endpoint.
-    The webhook callback updates the TimePhoto record directly.
-    This function just checks if the record was updated by the webhook.
-    """
-    # Check if the photo was already updated by webhook
-    result = await db.execute(
-        select(TimePhoto).where(TimePhoto.geminigen_uuid == task_id)
-    )
-    photo = result.scalars().first()
-    
-    if photo:
-        if photo.status == "completed" and photo.result_image_url:
-            return {
-                "status": 2,  # completed
-                "generate_result": photo.result_image_url
-            }
-        elif photo.status == "failed":
-            return {
-                "status": 3,  # failed
-                "error_message": photo.error_message or "Generation failed"
-            }
-    
-    # Still waiting for webhook callback
-    return {"status": 1}  # processing
-
-
 # ──────────────────────────────────────────────────────────────────────
 # Unified Provider Interface
 # ──────────────────────────────────────────────────────────────────────
 
 async def _generate_with_provider(
-    prompt: str, file_path: str, db: AsyncSession
+    prompt: str, file_path: str, db: AsyncSession, provider: Optional[str] = None
 ) -> tuple[str, Optional[str], str, Optional[str]]:
     """
-    Generate image using configured provider.
+    Generate image using the given (or configured) provider.
     
     Returns: (provider_uuid, result_url, status, error_message)
     """
-    provider = await get_setting(db, "TIME_MACHINE_PROVIDER") or "geminigen"
+    provider = provider or await get_setting(db, "TIME_MACHINE_PROVIDER") or "geminigen"
     
     if provider == "kie":
         result = await _call_kie(prompt, file_path, db)
@@ -499,14 +486,54 @@ async def _generate_with_provider(
             return provider_uuid, None, "processing", None
 
 
-async def _poll_provider(
-    provider_uuid: str, provider: str, db: AsyncSession
-) -> dict:
-    """Poll generation status for configured provider."""
-    if provider == "kie":
-        return await _poll_kie(provider_uuid, db)
-    else:
-        return await _poll_geminigen(provider_uuid, db)
+def _apply_poll_result(photo: TimePhoto, poll_resp: dict) -> bool:
+    """
+    Update ``photo`` from a provider status payload.
+
+    Returns True if the generation failed (the caller refunds the crystal).
+    """
+    api_status = poll_resp.get("status")
+
+    # Status mapping: 2 = completed, 3 = failed, 1 = processing
+    if api_status == 2:
+        result_url = (
+            poll_resp.get("generate_result")
+            or poll_resp.get("thumbnail_url")
+            or poll_resp.get("last_frame_url")
+        )
+        if result_url:
+            full_url = result_url.replace("_600px", "")
+            photo.result_image_url = full_url
+            photo.status = "completed"
+            photo.completed_at = datetime.utcnow()
+        else:
+            photo.status = "completed"
+            photo.completed_at = datetime.utcnow()
+            photo.error_message = "Generation completed but no image URL returned"
+    elif api_status == 3 or poll_resp.get("error_message"):
+        photo.status = "failed"
+        photo.error_message = poll_resp.get("error_message", "Generation failed on provider side")
+        return True
+    # else still processing (status=1) — keep status as-is
+    return False
+
+
+def publish_photo_status(photo: TimePhoto) -> None:
+    """Push the photo's current state to the owner's open event streams."""
+    user_events.publish(
+        photo.user_id,
+        "time_photo",
+        TimePhotoOut.model_validate(photo).model_dump(mode="json"),
+    )
+
+
+async def _refund_crystal(db: AsyncSession, user_id: int) -> None:
+    """Return the generation cost to the user (atomic, no row load)."""
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(chrono_crystals=models.User.chrono_crystals + 1)
+    )
 
 
 # ──────────────────────────────────────────────────────────────────────
@@ -548,12 +575,13 @@ async def generate_time_photo(
     mode: Optional[str] = Form(None),  # New: explicit mode selection
     file: UploadFile = File(...),
     db: AsyncSession = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_fresh),
 ):
-    """Upload a photo and start a Time-Machine transformation.
+    """Upload a photo and queue a Time-Machine transformation.
 
-    Costs 1 Chrono-Crystal. The generation runs asynchronously —
-    poll ``/check/{photo_id}`` to track progress.
+    Costs 1 Chrono-Crystal. Returns immediately with ``status=pending``;
+    a background worker submits the job to the provider — poll
+    ``/check/{photo_id}`` to track progress.
     
     Modes:
     - clothing_only: Only update clothing
@@ -583,48 +611,29 @@ async def generate_time_photo(
     # 5. Build prompt
     prompt, style_desc = _build_prompt(target_year, mode)
 
-    # 6. Get provider
+    # 6. Get provider (fixed per photo, the worker uses this one)
     provider = await get_setting(db, "TIME_MACHINE_PROVIDER") or "geminigen"
 
-    # 7. Call provider
-    provider_uuid = None
-    result_url = None
-    photo_status = "processing"
-    error_message = None
-
-    try:
-        provider_uuid, result_url, photo_status, error_message = await _generate_with_provider(
-            prompt, original_url, db
-        )
-    except httpx.HTTPStatusError as exc:
-        photo_status = "failed"
-        error_message = f"API error: {exc.response.status_code} — {exc.response.text[:300]}"
-        current_user.chrono_crystals += 1  # Refund on API error
-    except Exception as exc:
-        photo_status = "failed"
-        error_message = f"API request failed: {exc}"
-        current_user.chrono_crystals += 1  # Refund on error
-
-    # 8. Save TimePhoto record
+    # 7. Save TimePhoto record and queue the provider call
     time_photo = TimePhoto(
         user_id=current_user.id,
         original_image_url=original_url,
-        result_image_url=result_url,
         target_year=target_year,
         apply_era_style=(mode == "full_vintage"),
         style_applied=style_desc,
         prompt_used=prompt,
-        geminigen_uuid=provider_uuid,  # Stores provider task ID
         provider=provider,
         transformation_mode=mode,
-        status=photo_status,
-        error_message=error_message,
+        status="pending",
         cost=1,
-        completed_at=datetime.utcnow() if photo_status == "completed" else None,
     )
     db.add(time_photo)
+    await db.flush()
+    db.add(TimePhotoJob(photo_id=time_photo.id))
     await db.commit()
     await db.refresh(time_photo)
+    time_machine_worker.wake()
+    publish_photo_status(time_photo)
 
     return time_photo
 
@@ -662,6 +671,33 @@ async def get_history(
     )
 
 
+@router.get("/events")
+async def time_machine_events(
+    request: Request,
+    current_user: models.User = Depends(deps.get_current_user_from_query),
+):
+    """Server-sent ``time_photo`` events for the user's generations.
+
+    EventSource cannot send headers, so the JWT goes in ``?token=``.
+    """
+    async def stream():
+        async with user_events.subscribe(current_user.id) as queue:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{photo_id}", response_model=TimePhotoOut)
 async def get_time_photo(
     photo_id: int,
@@ -687,7 +723,11 @@ async def check_generation(
     db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ):
-    """Poll provider for the status of a pending generation."""
+    """Current status of a generation.
+
+    A cheap DB read: the queue worker submits jobs, the GeminiGen poller
+    and the KIE webhook move them to completed/failed.
+    """
     result = await db.execute(
         select(TimePhoto).where(
             TimePhoto.id == photo_id,
@@ -697,63 +737,6 @@ async def check_generation(
     photo = result.scalars().first()
     if not photo:
         raise HTTPException(status_code=404, detail="Фото не найдено")
-
-    # Already terminal — nothing to poll
-    if photo.status in ("completed", "failed"):
-        return photo
-
-    if not photo.geminigen_uuid:
-        raise HTTPException(
-            status_code=400,
-            detail="Нет ID для проверки статуса генерации",
-        )
-
-    # Determine provider (use stored or current setting)
-    provider = getattr(photo, 'provider', None) or await get_setting(db, "TIME_MACHINE_PROVIDER") or "geminigen"
-
-    try:
-        poll_resp = await _poll_provider(photo.geminigen_uuid, provider, db)
-    except httpx.HTTPStatusError as exc:
-        photo.status = "failed"
-        photo.error_message = f"Poll error: {exc.response.status_code}"
-        current_user.chrono_crystals += 1
-        await db.commit()
-        await db.refresh(photo)
-        return photo
-    except Exception as exc:
-        photo.status = "failed"
-        photo.error_message = f"Poll request failed: {exc}"
-        current_user.chrono_crystals += 1
-        await db.commit()
-        await db.refresh(photo)
-        return photo
-
-    api_status = poll_resp.get("status")
-
-    # Status mapping: 2 = completed, 3 = failed, 1 = processing
-    if api_status == 2:
-        result_url = (
-            poll_resp.get("generate_result")
-            or poll_resp.get("thumbnail_url")
-            or poll_resp.get("last_frame_url")
-        )
-        if result_url:
-            full_url = result_url.replace("_600px", "")
-            photo.result_image_url = full_url
-            photo.status = "completed"
-            photo.completed_at = datetime.utcnow()
-        else:
-            photo.status = "completed"
-            photo.completed_at = datetime.utcnow()
-            photo.error_message = "Generation completed but no image URL returned"
-    elif api_status == 3 or poll_resp.get("error_message"):
-        photo.status = "failed"
-        photo.error_message = poll_resp.get("error_message", "Generation failed on provider side")
-        current_user.chrono_crystals += 1
-    # else still processing (status=1) — keep status as-is
-
-    await db.commit()
-    await db.refresh(photo)
     return photo
 
 
@@ -878,5 +861,6 @@ async def kie_webhook_callback(
             user.chrono_crystals += 1
     
     await db.commit()
+    publish_photo_status(photo)
     
     return {"status": "processed", "task_id": task_id}
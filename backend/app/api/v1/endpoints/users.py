@@ -1,12 +1,13 @@
-from typing import Any
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
 from app.api import deps
 from app.core import security
+from app.core.leaderboard import leaderboard
 
 router = APIRouter()
 
@@ -41,18 +42,68 @@ async def delete_user(
     await db.commit()
     return user
 
-@router.get("/leaderboard", response_model=list[schemas.User])
+@router.get("/leaderboard", response_model=list[schemas.LeaderboardEntry])
 async def read_leaderboard(
     db: AsyncSession = Depends(deps.get_db),
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=100),
+    after_xp: Optional[float] = None,
+    after_id: Optional[int] = None,
+    around: Optional[str] = Query(None, description="'me' or a user id"),
+    k: int = Query(5, ge=0, le=50),
+    current_user: Optional[models.User] = Depends(deps.get_current_user_optional),
 ) -> Any:
     """
     Get leaderboard.
+
+    Pages are keyset-based: pass the ``xp`` and ``id`` of the last entry as
+    ``after_xp``/``after_id`` for the next one. ``around=me`` (or a user id)
+    returns that player's row with ``k`` neighbours on each side.
     """
+    await leaderboard.ensure_loaded(db)
+    if around is not None:
+        if around == "me":
+            if current_user is None:
+                raise HTTPException(status_code=401, detail="Not authenticated")
+            user_id = current_user.id
+        elif around.isdigit():
+            user_id = int(around)
+        else:
+            raise HTTPException(status_code=400, detail="around must be 'me' or a user id")
+        entries = leaderboard.around(user_id, k)
+        if not entries:
+            raise HTTPException(status_code=404, detail="User is not on the leaderboard")
+    elif (after_xp is None) != (after_id is None):
+        raise HTTPException(status_code=400, detail="after_xp and after_id go together")
+    else:
+        after = (after_xp, after_id) if after_id is not None else None
+        entries = leaderboard.page(limit, after)
+    if not entries:
+        return []
+
+    # Только поля для отображения и только для строк этой страницы
     result = await db.execute(
-        select(models.User).order_by(models.User.xp.desc()).limit(limit)
+        select(
+            models.User.id,
+            models.User.username,
+            models.User.display_name,
+            models.User.avatar_url,
+            models.User.level,
+        ).where(models.User.id.in_([user_id for _, user_id, _ in entries]))
     )
-    return result.scalars().all()
+    players = {row.id: row for row in result.all()}
+    return [
+        schemas.LeaderboardEntry(
+            rank=rank,
+            id=user_id,
+            username=players[user_id].username,
+            display_name=players[user_id].display_name,
+            avatar_url=players[user_id].avatar_url,
+            level=players[user_id].level or 1,
+            xp=xp,
+        )
+        for rank, user_id, xp in entries
+        if user_id in players
+    ]
 
 
 @router.get("/me", response_model=schemas.User)
@@ -70,7 +121,7 @@ async def update_user_me(
     *,
     db: AsyncSession = Depends(deps.get_db),
     user_in: schemas.UserUpdate,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_fresh),
 ) -> Any:
     """
     Update own user.
@@ -86,7 +137,7 @@ async def update_user_me(
     # They should be the SAME session instance within a request context in FastAPI.
     
     if user_in.password:
-        hashed_password = security.get_password_hash(user_in.password)
+        hashed_password = await security.password_hasher.hash(user_in.password)
         current_user.hashed_password = hashed_password
     
     if user_in.username:
@@ -1,5 +1,4 @@
 from typing import Any, List
-import math
 import base64
 import httpx
 import os
@@ -10,6 +9,9 @@ from sqlalchemy import select
 from app import models, schemas
 from app.api import deps
 from app.core.config import settings
+from app.core.geo import haversine_m
+from app.core.http_client import http_clients
+from app.core.poi_index import poi_index
 
 router = APIRouter()
 
@@ -30,19 +32,12 @@ GESTURES = [
 ]
 
 
+# Максимальное расстояние до точки для подтверждения по геолокации
+GEOFENCE_RADIUS_M = 200
+
+
 def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371e3 # metres
-    phi1 = lat1 * math.pi/180
-    phi2 = lat2 * math.pi/180
-    delta_phi = (lat2-lat1) * math.pi/180
-    delta_lam = (lon2-lon1) * math.pi/180
-    
-    a = math.sin(delta_phi/2) * math.sin(delta_phi/2) + \
-        math.cos(phi1) * math.cos(phi2) * \
-        math.sin(delta_lam/2) * math.sin(delta_lam/2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    
-    return R * c
+    return haversine_m(lat1, lon1, lat2, lon2)
 
 
 def get_random_gesture() -> dict:
@@ -66,21 +61,21 @@ async def get_verification_gesture(
 
 async def upload_image_to_qwen(image_content: bytes, content_type: str) -> str:
     """Upload image to Qwen API and get URL for use in requests."""
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        files = {
-            'file': ('image.jpg', image_content, content_type)
-        }
-        
-        upload_res = await client.post(
-            f"{settings.AI_API_BASE_URL}/files/upload",
-            files=files
-        )
-        upload_res.raise_for_status()
-        data = upload_res.json()
-        # API returns URL in file.url field
-        url = data.get("imageUrl") or data.get("file", {}).get("url")
-        print(f"Uploaded image URL: {url[:100] if url else 'None'}...")
-        return url
+    files = {
+        'file': ('image.jpg', image_content, content_type)
+    }
+
+    upload_res = await http_clients.get("ai").post(
+        f"{settings.AI_API_BASE_URL}/files/upload",
+        files=files,
+        timeout=60.0,
+    )
+    upload_res.raise_for_status()
+    data = upload_res.json()
+    # API returns URL in file.url field
+    url = data.get("imageUrl") or data.get("file", {}).get("url")
+    print(f"Uploaded image URL: {url[:100] if url else 'None'}...")
+    return url
 
 
 @router.post("/verify-poi", response_model=schemas.VerificationResponse)
@@ -97,15 +92,16 @@ async def verify_poi(
     """
     Verify check-in at a POI using Geolocation and AI Photo Analysis.
     """
-    # 1. Get POI
-    poi = await db.get(models.PointOfInterest, poi_id)
-    if not poi:
+    # 1. Get POI coordinates from the in-memory index (no DB round trip)
+    await poi_index.ensure_loaded(db)
+    indexed_poi = poi_index.get(poi_id)
+    if not indexed_poi:
         raise HTTPException(status_code=404, detail="POI not found")
         
     # 2. Geo Check (if provided)
     if latitude is not None and longitude is not None:
-        distance = calculate_distance(latitude, longitude, poi.latitude, poi.longitude)
-        if distance > 200: 
+        distance = calculate_distance(latitude, longitude, indexed_poi.latitude, indexed_poi.longitude)
+        if distance > GEOFENCE_RADIUS_M: 
             return schemas.VerificationResponse(
                 verified=False,
                 message=f"Вы находитесь слишком далеко ({int(distance)}м). Подойдите ближе к точке."
@@ -121,42 +117,47 @@ async def verify_poi(
         gesture_info = next((g for g in GESTURES if g["id"] == gesture_id), None)
         if not gesture_info:
             raise HTTPException(status_code=400, detail="Invalid gesture")
+
+        # The AI prompt needs the description, which the index does not hold
+        poi = await db.get(models.PointOfInterest, poi_id)
+        if not poi:
+            raise HTTPException(status_code=404, detail="POI not found")
             
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        client = http_clients.get("ai")
+        try:
+            # Read and upload user's photo
+            content = await file.read()
+            content_type = file.content_type or "image/jpeg"
+            
+            # Upload image to get URL
             try:
-                # Read and upload user's photo
-                content = await file.read()
-                content_type = file.content_type or "image/jpeg"
-                
-                # Upload image to get URL
-                try:
-                    user_image_url = await upload_image_to_qwen(content, content_type)
-                except Exception as upload_err:
-                    print(f"Failed to upload user image: {upload_err}")
-                    return schemas.VerificationResponse(
-                        verified=False,
-                        message="Не удалось загрузить фото. Попробуйте ещё раз."
-                    )
-                
-                # Build prompt text with gesture descriptions
-                gesture_descriptions = {
-                    "thumbs_up": "большой палец вверх (как лайк)",
-                    "peace": "знак мира/победы - два пальца (указательный и средний) подняты вверх в форме буквы V",
-                    "ok": "знак OK - большой и указательный пальцы соединены в кольцо, остальные выпрямлены",
-                    "wave": "раскрытая ладонь с растопыренными пальцами (как приветствие)",
-                    "fist": "сжатый кулак",
-                    "rock": "рок-жест/коза - указательный палец и мизинец подняты, остальные сжаты",
-                    "point_up": "указательный палец направлен вверх, остальные сжаты",
-                    "shaka": "жест шака/серфера - большой палец и мизинец оттопырены, остальные сжаты",
-                    "crossed_fingers": "скрещенные пальцы - средний палец поверх указательного",
-                    "love_you": "жест 'I love you' - большой палец, указательный и мизинец подняты",
-                    "three": "три пальца подняты вверх (указательный, средний, безымянный)",
-                    "four": "четыре пальца подняты (все кроме большого)",
-                }
-                
-                gesture_detail = gesture_descriptions.get(gesture_id, gesture_info['description'])
-                
-                prompt = f"""Ты - система верификации посещения достопримечательностей Москвы.
+                user_image_url = await upload_image_to_qwen(content, content_type)
+            except Exception as upload_err:
+                print(f"Failed to upload user image: {upload_err}")
+                return schemas.VerificationResponse(
+                    verified=False,
+                    message="Не удалось загрузить фото. Попробуйте ещё раз."
+                )
+            
+            # Build prompt text with gesture descriptions
+            gesture_descriptions = {
+                "thumbs_up": "большой палец вверх (как лайк)",
+                "peace": "знак мира/победы - два пальца (указательный и средний) подняты вверх в форме буквы V",
+                "ok": "знак OK - большой и указательный пальцы соединены в кольцо, остальные выпрямлены",
+                "wave": "раскрытая ладонь с растопыренными пальцами (как приветствие)",
+                "fist": "сжатый кулак",
+                "rock": "рок-жест/коза - указательный палец и мизинец подняты, остальные сжаты",
+                "point_up": "указательный палец направлен вверх, остальные сжаты",
+                "shaka": "жест шака/серфера - большой палец и мизинец оттопырены, остальные сжаты",
+                "crossed_fingers": "скрещенные пальцы - средний палец поверх указательного",
+                "love_you": "жест 'I love you' - большой палец, указательный и мизинец подняты",
+                "three": "три пальца подняты вверх (указательный, средний, безымянный)",
+                "four": "четыре пальца подняты (все кроме большого)",
+            }
+            
+            gesture_detail = gesture_descriptions.get(gesture_id, gesture_info['description'])
+            
+            prompt = f"""Ты - система верификации посещения достопримечательностей Москвы.
 
 Проверь фото пользователя:
 - Название места: {poi.title}
@@ -175,97 +176,97 @@ async def verify_poi(
 МЕСТО: да/нет - видна ли достопримечательность и почему
 ЖЕСТ: да/нет - виден ли требуемый жест
 ПРИЧИНА: если NO - подробно объясни что не так и что нужно исправить"""
+            
+            # Use native /api/chat format with image
+            payload = {
+                "message": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image", "image": user_image_url}
+                ],
+                "model": settings.AI_MODEL
+            }
+            
+            chat_res = await client.post(
+                f"{settings.AI_API_BASE_URL}/chat",
+                json=payload
+            )
+            chat_res.raise_for_status()
+            
+            data = chat_res.json()
+            # Native format returns 'message' field
+            response_content = data.get("message", "")
+            if not response_content and "choices" in data:
+                response_content = data["choices"][0]["message"]["content"]
+            
+            print(f"AI Response: {response_content}")  # Debug log
+            
+            # Parse response
+            response_upper = response_content.upper()
+            verified = "РЕЗУЛЬТАТ: YES" in response_upper or "РЕЗУЛЬТАТ:YES" in response_upper or ("YES" in response_upper and "NO" not in response_upper.split("\n")[0])
+            
+            # Extract detailed info
+            lines = response_content.split("\n")
+            place_ok = None
+            gesture_ok = None
+            reason = ""
+            place_comment = ""
+            gesture_comment = ""
+            
+            for line in lines:
+                line_upper = line.upper().strip()
+                if line_upper.startswith("МЕСТО:") or "МЕСТО:" in line_upper:
+                    value = line.split(":", 1)[-1].strip()
+                    place_ok = value.upper().startswith("ДА") or "YES" in value.upper()
+                    place_comment = value
+                elif line_upper.startswith("ЖЕСТ:") or "ЖЕСТ:" in line_upper:
+                    value = line.split(":", 1)[-1].strip()
+                    gesture_ok = value.upper().startswith("ДА") or "YES" in value.upper()
+                    gesture_comment = value
+                elif line_upper.startswith("ПРИЧИНА:") or "ПРИЧИНА:" in line_upper:
+                    reason = line.split(":", 1)[-1].strip()
+            
+            print(f"Parsed - place_ok: {place_ok}, gesture_ok: {gesture_ok}, reason: {reason}")
+            
+            # Build user-friendly message
+            if verified:
+                message = "Верификация успешна! Место и жест подтверждены."
+            else:
+                # Build detailed rejection reason
+                issues = []
+                if place_ok == False:
+                    issues.append(f"❌ Достопримечательность не распознана")
+                elif place_ok == True:
+                    issues.append(f"✅ Достопримечательность определена")
                 
-                # Use native /api/chat format with image
-                payload = {
-                    "message": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image", "image": user_image_url}
-                    ],
-                    "model": settings.AI_MODEL
-                }
-                
-                chat_res = await client.post(
-                    f"{settings.AI_API_BASE_URL}/chat",
-                    json=payload
-                )
-                chat_res.raise_for_status()
-                
-                data = chat_res.json()
-                # Native format returns 'message' field
-                response_content = data.get("message", "")
-                if not response_content and "choices" in data:
-                    response_content = data["choices"][0]["message"]["content"]
-                
-                print(f"AI Response: {response_content}")  # Debug log
-                
-                # Parse response
-                response_upper = response_content.upper()
-                verified = "РЕЗУЛЬТАТ: YES" in response_upper or "РЕЗУЛЬТАТ:YES" in response_upper or ("YES" in response_upper and "NO" not in response_upper.split("\n")[0])
-                
-                # Extract detailed info
-                lines = response_content.split("\n")
-                place_ok = None
-                gesture_ok = None
-                reason = ""
-                place_comment = ""
-                gesture_comment = ""
-                
-                for line in lines:
-                    line_upper = line.upper().strip()
-                    if line_upper.startswith("МЕСТО:") or "МЕСТО:" in line_upper:
-                        value = line.split(":", 1)[-1].strip()
-                        place_ok = value.upper().startswith("ДА") or "YES" in value.upper()
-                        place_comment = value
-                    elif line_upper.startswith("ЖЕСТ:") or "ЖЕСТ:" in line_upper:
-                        value = line.split(":", 1)[-1].strip()
-                        gesture_ok = value.upper().startswith("ДА") or "YES" in value.upper()
-                        gesture_comment = value
-                    elif line_upper.startswith("ПРИЧИНА:") or "ПРИЧИНА:" in line_upper:
-                        reason = line.split(":", 1)[-1].strip()
+                if gesture_ok == False:
+                    issues.append(f"❌ Жест '{gesture_info['name']}' не обнаружен")
+                elif gesture_ok == True:
+                    issues.append(f"✅ Жест обнаружен")
                 
-                print(f"Parsed - place_ok: {place_ok}, gesture_ok: {gesture_ok}, reason: {reason}")
+                if reason:
+                    issues.append(f"\n📝 {reason}")
                 
-                # Build user-friendly message
-                if verified:
-                    message = "Верификация успешна! Место и жест подтверждены."
+                if issues:
+                    message = "\n".join(issues)
                 else:
-                    # Build detailed rejection reason
-                    issues = []
-                    if place_ok == False:
-                        issues.append(f"❌ Достопримечательность не распознана")
-                    elif place_ok == True:
-                        issues.append(f"✅ Достопримечательность определена")
-                    
-                    if gesture_ok == False:
-                        issues.append(f"❌ Жест '{gesture_info['name']}' не обнаружен")
-                    elif gesture_ok == True:
-                        issues.append(f"✅ Жест обнаружен")
-                    
-                    if reason:
-                        issues.append(f"\n📝 {reason}")
-                    
-                    if issues:
-                        message = "\n".join(issues)
-                    else:
-                        # Fallback - show raw AI response
-                        message = response_content[:300] if len(response_content) > 300 else response_content
-                
-                return schemas.VerificationResponse(
-                    verified=verified,
-                    message=message
-                )
+                    # Fallback - show raw AI response
+                    message = response_content[:300] if len(response_content) > 300 else response_content
+            
+            return schemas.VerificationResponse(
+                verified=verified,
+                message=message
+            )
 
-            except httpx.HTTPError as he:
-                print(f"AI HTTP error: {he}")
-                if hasattr(he, 'response') and he.response is not None:
-                    print(f"Response body: {he.response.text}")
-                return schemas.VerificationResponse(verified=False, message="Сервис проверки фото временно недоступен")
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
-                print(f"AI Check failed: {type(e).__name__}: {e}")
-                return schemas.VerificationResponse(verified=False, message="Сервис проверки фото временно недоступен")
+        except httpx.HTTPError as he:
+            print(f"AI HTTP error: {he}")
+            if hasattr(he, 'response') and he.response is not None:
+                print(f"Response body: {he.response.text}")
+            return schemas.VerificationResponse(verified=False, message="Сервис проверки фото временно недоступен")
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"AI Check failed: {type(e).__name__}: {e}")
+            return schemas.VerificationResponse(verified=False, message="Сервис проверки фото временно недоступен")
     
     # If only Geo Check was done and passed
     return schemas.VerificationResponse(
@@ -0,0 +1,84 @@
+"""
+Process-local achievement catalogue.
+
+The ``achievement`` table is only written by migrations, which ``start.sh``
+applies before the server starts, so the catalogue is static for the life
+of a process: it is loaded once (no invalidation) and indexed by
+``condition_type`` with thresholds kept sorted: finding the achievements a
+stat value has reached, or the ones crossed between two values, is a bisect
+instead of a scan over the whole table.
+"""
+import asyncio
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.achievement import Achievement
+
+# Типы условий и соответствующие ключи статистики пользователя
+CONDITION_TYPES = ("points", "routes", "level", "quizzes")
+
+
+@dataclass(frozen=True)
+class CachedAchievement:
+    id: int
+    code: str
+    title: str
+    description: str
+    icon: str
+    xp_reward: int
+    condition_type: str
+    condition_value: int
+
+
+class AchievementCatalogue:
+    def __init__(self):
+        self.loaded = False
+        self._all: list[CachedAchievement] = []
+        # condition_type → (отсортированные пороги, достижения в том же порядке)
+        self._by_type: dict[str, tuple[list[int], list[CachedAchievement]]] = {}
+        self._lock = asyncio.Lock()
+
+    def rebuild(self, achievements: Iterable[CachedAchievement]) -> None:
+        self._all = sorted(achievements, key=lambda a: a.id)
+        grouped: dict[str, list[CachedAchievement]] = {}
+        for achievement in self._all:
+            grouped.setdefault(achievement.condition_type, []).append(achievement)
+        self._by_type = {}
+        for condition_type, items in grouped.items():
+            items.sort(key=lambda a: (a.condition_value, a.id))
+            self._by_type[condition_type] = ([a.condition_value for a in items], items)
+        self.loaded = True
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self.loaded:
+            return
+        async with self._lock:
+            if self.loaded:
+                return
+            result = await db.execute(select(Achievement))
+            self.rebuild(
+                CachedAchievement(
+                    a.id, a.code, a.title, a.description, a.icon or "Award",
+                    a.xp_reward or 0, a.condition_type, a.condition_value,
+                )
+                for a in result.scalars().all()
+            )
+
+    def all(self) -> list[CachedAchievement]:
+        return list(self._all)
+
+    def crossed(
+        self, condition_type: str, value: int, previous: Optional[int] = None
+    ) -> list[CachedAchievement]:
+        """Achievements with ``previous < threshold <= value`` (all reached if no previous)."""
+        thresholds, items = self._by_type.get(condition_type, ([], []))
+        end = bisect_right(thresholds, value)
+        start = 0 if previous is None else min(bisect_right(thresholds, previous), end)
+        return items[start:end]
+
+
+achievement_catalogue = AchievementCatalogue()
@@ -0,0 +1,113 @@
+"""
+Cross-process invalidation for in-memory caches.
+
+With several uvicorn workers every process holds its own caches (runtime
+settings, POI index, route catalogue, authenticated users) and its own SSE
+subscribers. The process that changes shared state updates its caches
+directly and calls ``cache_bus.publish(kind, **data)``; every *other*
+process receives it over Postgres NOTIFY and runs the handlers subscribed
+to ``kind``. Payloads are small JSON objects (NOTIFY limit is 8000 bytes);
+a larger one is replaced by a resync message, and after the listener
+reconnects every process resyncs, since messages may have been missed.
+A resync runs the ``resync`` callbacks given to ``subscribe`` (drop or
+reload the whole cache).
+"""
+import json
+import os
+import uuid
+from typing import Any, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pg_listener import PGListener, pg_listener
+
+CACHE_BUS_CHANNEL = "cache_bus"
+MAX_PAYLOAD_BYTES = 7900  # запас до лимита NOTIFY в 8000 байт
+
+BusHandler = Callable[[dict[str, Any]], None]
+ResyncHandler = Callable[[], None]
+
+
+class CacheBus:
+    def __init__(self, listener: PGListener):
+        # pid может повториться после рестарта воркера, поэтому с суффиксом
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._listener = listener
+        self._handlers: dict[str, list[BusHandler]] = {}
+        self._resync: dict[str, list[ResyncHandler]] = {}
+        self.published = 0
+        self.received = 0
+        self.oversized = 0
+        self.resyncs = 0
+        listener.add_handler(CACHE_BUS_CHANNEL, self._on_message)
+        listener.add_connect_hook(self.resync_all)
+
+    def subscribe(
+        self, kind: str, handler: BusHandler, resync: Optional[ResyncHandler] = None
+    ) -> None:
+        self._handlers.setdefault(kind, []).append(handler)
+        if resync is not None:
+            self._resync.setdefault(kind, []).append(resync)
+
+    def _payload(self, kind: str, data: dict[str, Any]) -> str:
+        payload = json.dumps({"origin": self.origin, "kind": kind, "data": data}, default=str)
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            # Не влезает в NOTIFY — пусть остальные перечитают всё
+            payload = json.dumps({"origin": self.origin, "kind": kind, "resync": True})
+            self.oversized += 1
+        return payload
+
+    def publish(self, kind: str, **data: Any) -> None:
+        self._listener.notify(CACHE_BUS_CHANNEL, self._payload(kind, data))
+        self.published += 1
+
+    async def publish_in(self, db: AsyncSession, kind: str, **data: Any) -> None:
+        """Publish inside ``db``'s transaction (delivered on commit).
+
+        For processes that do not run the listener, e.g. seed scripts.
+        """
+        await db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CACHE_BUS_CHANNEL, "payload": self._payload(kind, data)},
+        )
+        self.published += 1
+
+    def resync_all(self) -> None:
+        """Run every resync handler: messages to this process may have been lost."""
+        for kind in self._resync:
+            self._run_resync(kind)
+
+    def _run_resync(self, kind: str) -> None:
+        self.resyncs += 1
+        for handler in self._resync.get(kind, ()):
+            try:
+                handler()
+            except Exception as exc:
+                print(f"Cache bus resync error on {kind}: {exc}")
+
+    def _on_message(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message.get("origin") == self.origin:
+            return
+        self.received += 1
+        if message.get("resync"):
+            self._run_resync(message.get("kind"))
+            return
+        for handler in self._handlers.get(message.get("kind"), ()):
+            try:
+                handler(message.get("data") or {})
+            except Exception as exc:
+                print(f"Cache bus handler error on {message.get('kind')}: {exc}")
+
+    def stats(self) -> dict:
+        return {
+            "origin": self.origin,
+            "published": self.published,
+            "received": self.received,
+            "oversized": self.oversized,
+            "resyncs": self.resyncs,
+        }
+
+
+cache_bus = CacheBus(pg_listener)
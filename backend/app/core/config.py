@@ -21,6 +21,38 @@ class Settings(BaseSettings):
     
     # GeminiGen.AI API (Time Machine image generation)
     GEMINIGEN_API_KEY: str = ""
+
+    # Time Machine job queue (app/workers/time_machine.py)
+    TIME_MACHINE_WORKERS: int = 4
+    TIME_MACHINE_MAX_ATTEMPTS: int = 5
+    TIME_MACHINE_RETRY_BACKOFF_SECONDS: float = 5.0
+    TIME_MACHINE_POLL_INTERVAL_SECONDS: float = 5.0
+    TIME_MACHINE_JOB_TIMEOUT_MINUTES: int = 15  # генерация дольше — считаем проваленной
+    TIME_MACHINE_STUCK_JOB_MINUTES: int = 5  # "running" без движения — вернуть в очередь
+
+    # Database engine
+    DB_ECHO: bool = False  # логировать все SQL (только для отладки)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # ожидание свободного соединения, с
+    DB_POOL_RECYCLE: int = 1800  # пересоздавать соединения старше, с
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500  # кэш prepared statements asyncpg на соединение
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # 0 — без ограничения
+    DB_SLOW_QUERY_MS: float = 500.0
+
+    # Кэш авторизованного пользователя (deps.get_current_user)
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+
+    # Хэширование паролей (app/core/security.py)
+    BCRYPT_ROUNDS: int = 12  # хэши с меньшим числом раундов обновляются при входе
+    PASSWORD_HASH_WORKERS: int = 2  # потоки bcrypt на процесс
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # сверх этого — 503 вместо бесконечной очереди
+
+    # Недельные лиги обучения (app/workers/league_rollover.py)
+    LEAGUE_PROMOTE_COUNT: int = 10  # сколько лучших каждой лиги поднимаются за неделю
+    LEAGUE_DEMOTE_COUNT: int = 5  # сколько худших опускаются
     
     # Site URL (for Telegram bot links)
     SITE_URL: str = "http://localhost:8000"
@@ -0,0 +1,97 @@
+"""
+Process-local unlock rules for titles, frames and badges.
+
+The cosmetics catalogue only changes with seed data, so it is loaded once
+and compiled: level rules become a threshold-sorted list (bisect), and
+achievement rules a ``code → items`` map. ``seed_cosmetics`` publishes
+``cosmetic_rules`` over ``cache_bus`` when it adds items, and every process
+drops its compiled rules. ``unlockable`` answers "what may
+this user own" without touching the DB; ownership is checked by the caller.
+"""
+import asyncio
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache_bus import cache_bus
+from app.models.cosmetics import Badge, ProfileFrame, Title, UserBadge, UserFrame, UserTitle
+
+# kind → (каталог, таблица владения, колонка id предмета в ней)
+KINDS = {
+    "title": (Title, UserTitle, "title_id"),
+    "frame": (ProfileFrame, UserFrame, "frame_id"),
+    "badge": (Badge, UserBadge, "badge_id"),
+}
+
+
+@dataclass(frozen=True)
+class UnlockableItem:
+    kind: str
+    id: int
+    name: str
+    rarity: str
+
+
+class CosmeticRules:
+    def __init__(self):
+        self.loaded = False
+        self._level_thresholds: list[int] = []
+        self._level_items: list[UnlockableItem] = []
+        self._by_achievement: dict[str, list[UnlockableItem]] = {}
+        self._lock = asyncio.Lock()
+
+    def rebuild(self, rules: Iterable[tuple[UnlockableItem, str, str]]) -> None:
+        """``rules`` are ``(item, unlock_type, unlock_value)``; unusable rules are skipped."""
+        by_level: list[tuple[int, UnlockableItem]] = []
+        self._by_achievement = {}
+        for item, unlock_type, unlock_value in rules:
+            if not unlock_value:
+                continue
+            if unlock_type == "level":
+                try:
+                    by_level.append((int(unlock_value), item))
+                except ValueError:
+                    print(f"Cosmetic {item.kind} {item.id}: bad level '{unlock_value}'")
+            elif unlock_type == "achievement":
+                self._by_achievement.setdefault(unlock_value, []).append(item)
+        by_level.sort(key=lambda rule: (rule[0], rule[1].kind, rule[1].id))
+        self._level_thresholds = [level for level, _ in by_level]
+        self._level_items = [item for _, item in by_level]
+        self.loaded = True
+
+    def invalidate(self) -> None:
+        self.loaded = False
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self.loaded:
+            return
+        async with self._lock:
+            if self.loaded:
+                return
+            rules = []
+            for kind, (model, _, _) in KINDS.items():
+                result = await db.execute(
+                    select(model.id, model.name, model.rarity, model.unlock_type, model.unlock_value)
+                    .where(model.is_default == False)
+                )
+                rules.extend(
+                    (UnlockableItem(kind, id, name, rarity or "common"), unlock_type, unlock_value)
+                    for id, name, rarity, unlock_type, unlock_value in result.all()
+                )
+            self.rebuild(rules)
+
+    def unlockable(self, level: int, achievement_codes: Iterable[str]) -> list[UnlockableItem]:
+        """Every non-default item whose rule the user satisfies."""
+        items = self._level_items[:bisect_right(self._level_thresholds, level or 0)]
+        for code in achievement_codes:
+            items.extend(self._by_achievement.get(code, ()))
+        return items
+
+
+cosmetic_rules = CosmeticRules()
+cache_bus.subscribe(
+    "cosmetic_rules", lambda _data: cosmetic_rules.invalidate(), resync=cosmetic_rules.invalidate
+)
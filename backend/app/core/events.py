@@ -0,0 +1,62 @@
+"""
+Per-user in-process event fan-out for server-sent events.
+
+Producers (Time Machine worker, webhooks, status checks) call
+``user_events.publish``; each open SSE connection holds one bounded queue.
+Events are forwarded to the other worker processes via ``cache_bus``, since
+the user's stream may be served by any of them. A slow consumer drops
+events rather than blocking producers — clients resync from the REST
+endpoints on reconnect.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from app.core.cache_bus import cache_bus
+
+QUEUE_SIZE = 100
+
+Event = tuple[str, dict[str, Any]]
+
+
+class UserEventBroker:
+    def __init__(self):
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator["asyncio.Queue[Event]"]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id: int, event: str, data: dict[str, Any]) -> None:
+        self.deliver(user_id, event, data)
+        cache_bus.publish("user_event", user_id=user_id, event=event, payload=data)
+
+    def deliver(self, user_id: int, event: str, data: dict[str, Any]) -> None:
+        """Push to this process' subscribers only."""
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._subscribers),
+            "connections": sum(len(q) for q in self._subscribers.values()),
+        }
+
+
+user_events = UserEventBroker()
+cache_bus.subscribe(
+    "user_event",
+    lambda data: user_events.deliver(data["user_id"], data["event"], data["payload"]),
+)
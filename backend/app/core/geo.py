@@ -0,0 +1,70 @@
+"""
+Geodesy helpers shared by verification, POI search and route metrics.
+
+Scalar ``haversine_m`` for one-off checks; the NumPy variants compute whole
+distance vectors/matrices and polyline lengths in a single vectorised pass.
+"""
+import math
+from typing import Sequence
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371e3
+# Длина одного градуса широты (и долготы на экваторе) в метрах
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+# Средняя скорость пешехода, 4.5 км/ч
+WALKING_SPEED_M_PER_MIN = 75.0
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two WGS84 points in metres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lam = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lam / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _haversine_rad(phi1, lam1, phi2, lam2) -> np.ndarray:
+    a = (
+        np.sin((phi2 - phi1) / 2) ** 2
+        + np.cos(phi1) * np.cos(phi2) * np.sin((lam2 - lam1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distances_from(
+    latitude: float, longitude: float,
+    lats: Sequence[float], lons: Sequence[float],
+) -> np.ndarray:
+    """Distances in metres from one point to each of ``(lats[i], lons[i])``."""
+    phi = np.radians(np.asarray(lats, dtype=float))
+    lam = np.radians(np.asarray(lons, dtype=float))
+    return _haversine_rad(math.radians(latitude), math.radians(longitude), phi, lam)
+
+
+def distance_matrix(
+    lats1: Sequence[float], lons1: Sequence[float],
+    lats2: Sequence[float], lons2: Sequence[float],
+) -> np.ndarray:
+    """``(n, m)`` matrix of distances in metres between two point sets."""
+    phi1 = np.radians(np.asarray(lats1, dtype=float))[:, None]
+    lam1 = np.radians(np.asarray(lons1, dtype=float))[:, None]
+    phi2 = np.radians(np.asarray(lats2, dtype=float))[None, :]
+    lam2 = np.radians(np.asarray(lons2, dtype=float))[None, :]
+    return _haversine_rad(phi1, lam1, phi2, lam2)
+
+
+def polyline_length_m(lats: Sequence[float], lons: Sequence[float]) -> float:
+    """Total length in metres of the path through the points in order."""
+    if len(lats) < 2:
+        return 0.0
+    phi = np.radians(np.asarray(lats, dtype=float))
+    lam = np.radians(np.asarray(lons, dtype=float))
+    return float(_haversine_rad(phi[:-1], lam[:-1], phi[1:], lam[1:]).sum())
+
+
+def walking_minutes(distance_m: float) -> int:
+    """Estimated walking time for a distance, rounded up to whole minutes."""
+    return math.ceil(distance_m / WALKING_SPEED_M_PER_MIN)
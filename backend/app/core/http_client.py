@@ -0,0 +1,132 @@
+"""
+Shared outbound HTTP clients.
+
+One pooled ``httpx.AsyncClient`` per external provider (keep-alive, HTTP/2
+when ``h2`` is installed), with its own timeouts and a concurrency cap.
+Created lazily, closed in the app lifespan; ``stats()`` feeds /metrics.
+"""
+import asyncio
+import importlib.util
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    timeout: float = 60.0
+    connect_timeout: float = 10.0
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 60.0
+    max_concurrency: int = 10  # одновременных запросов к провайдеру
+
+
+PROVIDERS: dict[str, ProviderConfig] = {
+    "geminigen": ProviderConfig(timeout=60.0, max_concurrency=10),
+    "kie": ProviderConfig(timeout=60.0, max_concurrency=10),
+    # Qwen proxy для проверки фото: ответы модели бывают долгими
+    "ai": ProviderConfig(timeout=120.0, max_concurrency=8),
+}
+
+
+class ProviderClient:
+    def __init__(self, name: str, config: ProviderConfig):
+        self.name = name
+        self.config = config
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.total_seconds = 0.0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            cfg = self.config
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(cfg.timeout, connect=cfg.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=cfg.max_connections,
+                    max_keepalive_connections=cfg.max_keepalive,
+                    keepalive_expiry=cfg.keepalive_expiry,
+                ),
+            )
+        return self._client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        # Ожидание слота может быть отменено (клиент отключился) — счётчик в finally
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            return await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        finally:
+            self._semaphore.release()
+            self.in_flight -= 1
+            self.requests += 1
+            self.total_seconds += time.perf_counter() - started
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        # httpx не даёт публичного API пула; читаем аккуратно
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "avg_ms": round(1000 * self.total_seconds / self.requests, 1) if self.requests else 0.0,
+            "connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "max_concurrency": self.config.max_concurrency,
+            "http2": HTTP2_AVAILABLE,
+        }
+
+
+class HTTPClientRegistry:
+    def __init__(self, providers: dict[str, ProviderConfig]):
+        self._providers = providers
+        self._clients: dict[str, ProviderClient] = {}
+
+    def get(self, name: str) -> ProviderClient:
+        client = self._clients.get(name)
+        if client is None:
+            client = ProviderClient(name, self._providers.get(name, ProviderConfig()))
+            self._clients[name] = client
+        return client
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+
+    def stats(self) -> dict:
+        return {name: client.stats() for name, client in self._clients.items()}
+
+
+http_clients = HTTPClientRegistry(PROVIDERS)
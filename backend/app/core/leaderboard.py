@@ -0,0 +1,200 @@
+"""
+Process-local global leaderboard.
+
+Players who are active and have ``show_on_leaderboard`` are kept in one
+list sorted by ``(-xp, id)``, so a user's rank is a bisect (O(log n)) and
+a page is a slice: no ``ORDER BY xp`` over the user table per request.
+The list is loaded once (via the partial index ``ix_user_leaderboard``) and
+updated incrementally: every flush that changes a user's XP, visibility or
+activity is applied after commit here and, via ``cache_bus``, in the other
+worker processes. Bulk UPDATEs touching those columns mark it stale and it
+reloads on next use.
+"""
+import asyncio
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterable, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.cache_bus import cache_bus
+
+_PENDING_KEY = "leaderboard_pending"
+_STALE_KEY = "leaderboard_stale"
+# Колонки, от которых зависит место в рейтинге
+TRACKED_COLUMNS = ("xp", "show_on_leaderboard", "is_active")
+# Больше изменений за commit — остальные процессы перечитают рейтинг целиком
+MAX_PUBLISHED_CHANGES = 100
+
+Key = tuple[float, int]  # (-xp, user_id)
+Entry = tuple[int, int, float]  # (rank, user_id, xp)
+
+
+def _key(user_id: int, xp: float) -> Key:
+    return -float(xp or 0.0), user_id
+
+
+class Leaderboard:
+    def __init__(self):
+        self.loaded = False
+        self._keys: list[Key] = []
+        self._xp: dict[int, float] = {}
+        self._lock = asyncio.Lock()
+        self.updates = 0
+        self.reloads = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def rebuild(self, rows: Iterable[tuple[int, float]]) -> None:
+        self._xp = {user_id: float(xp or 0.0) for user_id, xp in rows}
+        self._keys = sorted(_key(user_id, xp) for user_id, xp in self._xp.items())
+        self.loaded = True
+        self.reloads += 1
+
+    def invalidate(self) -> None:
+        self.loaded = False
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self.loaded:
+            return
+        async with self._lock:
+            if self.loaded:
+                return
+            result = await db.execute(
+                select(models.User.id, models.User.xp).where(
+                    models.User.show_on_leaderboard.is_not(False),
+                    models.User.is_active.is_not(False),
+                )
+            )
+            self.rebuild(result.all())
+
+    def set(self, user_id: int, xp: Optional[float]) -> None:
+        """Place ``user_id`` at ``xp``; ``None`` removes them from the board."""
+        old = self._xp.pop(user_id, None)
+        if old is not None:
+            key = _key(user_id, old)
+            index = bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+        if xp is not None:
+            self._xp[user_id] = float(xp)
+            insort(self._keys, _key(user_id, xp))
+        self.updates += 1
+
+    # ── queries ────────────────────────────────────────────────────────
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """1-based rank, or ``None`` if the user is not on the board."""
+        xp = self._xp.get(user_id)
+        if xp is None:
+            return None
+        return bisect_left(self._keys, _key(user_id, xp)) + 1
+
+    def _slice(self, start: int, stop: int) -> list[Entry]:
+        start = max(start, 0)
+        return [
+            (start + offset + 1, user_id, -neg_xp)
+            for offset, (neg_xp, user_id) in enumerate(self._keys[start:stop])
+        ]
+
+    def page(self, limit: int, after: Optional[tuple[float, int]] = None) -> list[Entry]:
+        """Top ``limit`` entries after the ``(xp, user_id)`` cursor (keyset, no offset)."""
+        start = 0 if after is None else bisect_right(self._keys, _key(after[1], after[0]))
+        return self._slice(start, start + limit)
+
+    def around(self, user_id: int, k: int) -> list[Entry]:
+        """The user's entry with up to ``k`` neighbours on each side."""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        return self._slice(rank - 1 - k, rank + k)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "players": len(self._keys),
+            "updates": self.updates,
+            "reloads": self.reloads,
+        }
+
+
+leaderboard = Leaderboard()
+
+
+# ── Incremental maintenance ─────────────────────────────────
+# Как и user_cache: собираем изменения при flush, применяем после commit.
+
+@event.listens_for(Session, "after_flush")
+def _collect_ranked_users(session: Session, _flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for obj in session.deleted:
+        if isinstance(obj, models.User) and obj.id is not None:
+            pending[obj.id] = None
+    for obj in (*session.new, *session.dirty):
+        if not isinstance(obj, models.User) or obj.id is None or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if obj not in session.new and not any(
+            state.attrs[column].history.has_changes() for column in TRACKED_COLUMNS
+        ):
+            continue
+        if any(column not in state.dict for column in TRACKED_COLUMNS):
+            # Значение не загружено — без лишнего SELECT не узнать, перезагрузим целиком
+            session.info[_STALE_KEY] = True
+            continue
+        visible = obj.show_on_leaderboard is not False and obj.is_active is not False
+        pending[obj.id] = (obj.xp or 0.0) if visible else None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_ranked_users(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if session.info.pop(_STALE_KEY, False):
+        leaderboard.invalidate()
+        cache_bus.publish("leaderboard", changes=None)
+    elif pending:
+        changes = sorted(pending.items())
+        _apply(changes)
+        cache_bus.publish(
+            "leaderboard", changes=changes if len(changes) <= MAX_PUBLISHED_CHANGES else None
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_ranked_users(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_STALE_KEY, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _stale_on_bulk_dml(state) -> None:
+    if not (state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    if table is None or table.name != models.User.__tablename__:
+        return
+    # UPDATE только других колонок (например, кристаллов) рейтинг не трогает
+    values = getattr(state.statement, "_values", None) or {}
+    columns = {getattr(column, "key", column) for column in values}
+    if state.is_delete or not values or columns & set(TRACKED_COLUMNS):
+        state.session.info[_STALE_KEY] = True
+
+
+def _apply(changes: Iterable[tuple[int, Optional[float]]]) -> None:
+    if not leaderboard.loaded:
+        return  # загрузится целиком при первом запросе
+    for user_id, xp in changes:
+        leaderboard.set(user_id, xp)
+
+
+def _apply_remote(data: dict) -> None:
+    if data.get("changes") is None:
+        leaderboard.invalidate()
+    else:
+        _apply(data["changes"])
+
+
+cache_bus.subscribe("leaderboard", _apply_remote, resync=leaderboard.invalidate)
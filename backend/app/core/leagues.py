@@ -0,0 +1,189 @@
+"""
+Weekly learning leagues.
+
+Completing a learning session adds its XP to the user's row in
+``league_weekly_xp`` for the current week (atomic upsert in the caller's
+transaction), so a league table is a range scan over
+``ix_league_weekly_xp_ranking`` instead of an aggregate over sessions.
+``rollover_week`` closes a finished week: every league member is ranked
+(those who did not play get a zero-XP row), the top ``promote`` move up and
+the bottom ``demote`` move down, all in a few set-based statements (run by
+``app.workers.league_rollover``). Both counts are capped per league so the
+two groups never overlap and at least one member stays.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.learning import LEAGUES, LeagueWeeklyXP
+from app.models.user import User
+
+
+def week_start(now: Optional[datetime] = None) -> date:
+    """Monday (UTC) of the week containing ``now``."""
+    today = (now or datetime.now(timezone.utc)).date()
+    return today - timedelta(days=today.weekday())
+
+
+async def add_weekly_xp(db: AsyncSession, user_id: int, league: str, xp: int) -> None:
+    """Add ``xp`` to the user's current week; not committed here."""
+    if not xp:
+        return
+    stmt = insert(LeagueWeeklyXP).values(
+        week_start=week_start(), user_id=user_id, league=league, xp=xp,
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[LeagueWeeklyXP.week_start, LeagueWeeklyXP.user_id],
+        set_={"xp": LeagueWeeklyXP.xp + stmt.excluded.xp, "updated_at": func.now()},
+    ))
+
+
+async def league_top(db: AsyncSession, week: date, league: str, limit: int) -> list:
+    """``(user_id, xp, username, display_name, avatar_url)`` rows, best first."""
+    result = await db.execute(
+        select(
+            LeagueWeeklyXP.user_id,
+            LeagueWeeklyXP.xp,
+            User.username,
+            User.display_name,
+            User.avatar_url,
+        )
+        .join(User, User.id == LeagueWeeklyXP.user_id)
+        .where(LeagueWeeklyXP.week_start == week, LeagueWeeklyXP.league == league)
+        .order_by(LeagueWeeklyXP.xp.desc(), LeagueWeeklyXP.user_id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def league_rank(
+    db: AsyncSession, week: date, league: str, user_id: int
+) -> Optional[tuple[int, int]]:
+    """``(rank, xp)`` of the user in this week's league, or ``None`` if absent."""
+    xp = await db.scalar(
+        select(LeagueWeeklyXP.xp).where(
+            LeagueWeeklyXP.week_start == week,
+            LeagueWeeklyXP.league == league,
+            LeagueWeeklyXP.user_id == user_id,
+        )
+    )
+    if xp is None:
+        return None
+    # Тот же порядок, что в league_top: xp по убыванию, затем user_id
+    ahead = await db.scalar(
+        select(func.count()).select_from(LeagueWeeklyXP).where(
+            LeagueWeeklyXP.week_start == week,
+            LeagueWeeklyXP.league == league,
+            or_(
+                LeagueWeeklyXP.xp > xp,
+                and_(LeagueWeeklyXP.xp == xp, LeagueWeeklyXP.user_id < user_id),
+            ),
+        )
+    )
+    return ahead + 1, xp
+
+
+# ── Rollover ────────────────────────────────────────────────
+
+def _shift_case(column: str, step: int) -> str:
+    """SQL CASE mapping a league to the one ``step`` places higher (clamped)."""
+    branches = " ".join(
+        f"WHEN '{league}' THEN '{LEAGUES[min(max(i + step, 0), len(LEAGUES) - 1)]}'"
+        for i, league in enumerate(LEAGUES)
+    )
+    return f"CASE {column} {branches} ELSE {column} END"
+
+
+# Не игравшие неделю тоже в лиге: xp = 0. Только пока неделя открыта, чтобы
+# повторный прогон не подмешал новых участников
+FILL_IDLE_MEMBERS_SQL = f"""
+    INSERT INTO league_weekly_xp (week_start, user_id, league, xp)
+    SELECT :week, p.user_id, COALESCE(p.league, '{LEAGUES[0]}'), 0
+    FROM user_learning_progress p
+    WHERE EXISTS (
+        SELECT 1 FROM league_weekly_xp o
+        WHERE o.week_start = :week AND o.outcome IS NULL
+    )
+    ON CONFLICT (week_start, user_id) DO NOTHING
+"""
+
+# promote_n ≤ size / 2 и promote_n + demote_n ≤ size - 1: группы не пересекаются
+MARK_OUTCOMES_SQL = f"""
+    WITH ranked AS (
+        SELECT user_id, league, xp,
+               row_number() OVER (PARTITION BY league ORDER BY xp DESC, user_id) AS from_top,
+               row_number() OVER (PARTITION BY league ORDER BY xp ASC, user_id DESC) AS from_bottom,
+               count(*) OVER (PARTITION BY league) AS size
+        FROM league_weekly_xp
+        WHERE week_start = :week
+    ), capped AS (
+        SELECT ranked.*,
+               CASE WHEN league = '{LEAGUES[-1]}' THEN 0
+                    ELSE LEAST(:promote, size / 2) END AS promote_n
+        FROM ranked
+    )
+    UPDATE league_weekly_xp w
+    SET outcome = CASE
+        WHEN r.from_top <= r.promote_n AND r.xp > 0 THEN 'promoted'
+        WHEN r.from_bottom <= LEAST(:demote, r.size - r.promote_n - 1)
+             AND r.league <> '{LEAGUES[0]}' THEN 'demoted'
+        ELSE 'stayed'
+    END
+    FROM capped r
+    WHERE w.week_start = :week AND w.user_id = r.user_id
+"""
+
+# Новая лига считается от лиги *той* недели, поэтому повторный прогон безвреден
+APPLY_OUTCOMES_SQL = f"""
+    UPDATE user_learning_progress p
+    SET league = CASE w.outcome
+        WHEN 'promoted' THEN {_shift_case("w.league", 1)}
+        ELSE {_shift_case("w.league", -1)}
+    END
+    FROM league_weekly_xp w
+    WHERE w.week_start = :week
+      AND w.user_id = p.user_id
+      AND w.outcome IN ('promoted', 'demoted')
+"""
+
+# Кто успел набрать XP в новой неделе до rollover — переносим в новую лигу
+MOVE_LATER_WEEKS_SQL = """
+    UPDATE league_weekly_xp c
+    SET league = p.league
+    FROM league_weekly_xp w, user_learning_progress p
+    WHERE w.week_start = :week
+      AND w.outcome IN ('promoted', 'demoted')
+      AND c.user_id = w.user_id
+      AND c.week_start > :week
+      AND p.user_id = w.user_id
+      AND c.league <> p.league
+"""
+
+
+async def pending_weeks(db: AsyncSession, before: date) -> list[date]:
+    """Finished weeks that have not been rolled over yet, oldest first."""
+    result = await db.execute(
+        select(LeagueWeeklyXP.week_start)
+        .where(LeagueWeeklyXP.week_start < before, LeagueWeeklyXP.outcome.is_(None))
+        .distinct()
+        .order_by(LeagueWeeklyXP.week_start)
+    )
+    return list(result.scalars().all())
+
+
+async def rollover_week(db: AsyncSession, week: date, promote: int, demote: int) -> dict[str, int]:
+    """Promote/demote every league member for ``week``; not committed here."""
+    params = {"week": week, "promote": promote, "demote": demote}
+    await db.execute(text(FILL_IDLE_MEMBERS_SQL), {"week": week})
+    await db.execute(text(MARK_OUTCOMES_SQL), params)
+    await db.execute(text(APPLY_OUTCOMES_SQL), {"week": week})
+    await db.execute(text(MOVE_LATER_WEEKS_SQL), {"week": week})
+    result = await db.execute(
+        select(LeagueWeeklyXP.outcome, func.count())
+        .where(LeagueWeeklyXP.week_start == week)
+        .group_by(LeagueWeeklyXP.outcome)
+    )
+    return dict(result.all())
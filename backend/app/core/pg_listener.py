@@ -0,0 +1,146 @@
+"""
+Postgres LISTEN/NOTIFY for this process.
+
+One dedicated asyncpg connection per process listens on every channel that
+has a registered handler; handlers run in the event loop with the
+notification payload. ``notify()`` queues outgoing messages that are sent
+in order over the same connection, so publishing never takes a pool slot.
+The connection is re-established after a drop, and ``connected`` lets
+callers fall back to polling while it is down. NOTIFYs sent while it was
+down are lost, so connect hooks run after every reconnect to let callers
+resync.
+"""
+import asyncio
+from typing import Callable, Optional
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+TELEGRAM_AUTH_CHANNEL = "telegram_auth"
+RECONNECT_SECONDS = 5.0
+OUTBOX_SIZE = 1000
+
+Handler = Callable[[str], None]
+ConnectHook = Callable[[], None]
+
+
+def _dsn() -> str:
+    # asyncpg не понимает драйвер в схеме (postgresql+asyncpg://)
+    url = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+class PGListener:
+    def __init__(self):
+        self._handlers: dict[str, list[Handler]] = {}
+        self._connect_hooks: list[ConnectHook] = []
+        self._conn: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._outbox: asyncio.Queue[tuple[str, str]] = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self.notifications = 0
+        self.reconnects = 0
+        self.sent = 0
+        self.dropped = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    def add_handler(self, channel: str, handler: Handler) -> None:
+        """Register before ``start()``; channels are LISTENed on connect."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def add_connect_hook(self, hook: ConnectHook) -> None:
+        """Run ``hook`` after each reconnect (not the first connect)."""
+        self._connect_hooks.append(hook)
+
+    def notify(self, channel: str, payload: str) -> None:
+        """Queue a NOTIFY; dropped if the outbox is full (listener down)."""
+        try:
+            self._outbox.put_nowait((channel, payload))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print(f"PG listener error: {exc}")
+            self.reconnects += 1
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    async def _listen(self) -> None:
+        closed = asyncio.Event()
+        conn = await asyncpg.connect(_dsn())
+        try:
+            conn.add_termination_listener(lambda _conn: closed.set())
+            for channel in self._handlers:
+                await conn.add_listener(channel, self._dispatch)
+            self._conn = conn
+            if self.reconnects:
+                # Пока соединения не было, уведомления терялись
+                self._run_connect_hooks()
+            sender = asyncio.create_task(self._send(conn))
+            waiter = asyncio.create_task(closed.wait())
+            try:
+                await asyncio.wait({sender, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in (sender, waiter):
+                    task.cancel()
+                await asyncio.gather(sender, waiter, return_exceptions=True)
+            if sender.done() and not sender.cancelled() and sender.exception():
+                raise sender.exception()
+        finally:
+            self._conn = None
+            if not conn.is_closed():
+                await conn.close()
+
+    async def _send(self, conn: asyncpg.Connection) -> None:
+        while True:
+            channel, payload = await self._outbox.get()
+            await conn.execute("SELECT pg_notify($1, $2)", channel, payload)
+            self.sent += 1
+
+    def _run_connect_hooks(self) -> None:
+        for hook in self._connect_hooks:
+            try:
+                hook()
+            except Exception as exc:
+                print(f"PG listener connect hook error: {exc}")
+
+    def _dispatch(self, _conn, _pid: int, channel: str, payload: str) -> None:
+        self.notifications += 1
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception as exc:
+                print(f"PG listener handler error on {channel}: {exc}")
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "channels": sorted(self._handlers),
+            "notifications": self.notifications,
+            "reconnects": self.reconnects,
+            "sent": self.sent,
+            "queued": self._outbox.qsize(),
+            "dropped": self.dropped,
+        }
+
+
+pg_listener = PGListener()
@@ -0,0 +1,104 @@
+"""
+Per-zoom POI clusters for the map tile endpoint.
+
+Points are projected to web-mercator once; for every zoom up to
+``MAX_CLUSTER_ZOOM`` they are grouped into square pixel cells that nest
+inside 256px tiles, so a tile request is a dict lookup. Rebuilt lazily
+whenever ``poi_index.version`` changes.
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from app.core.poi_index import IndexedPOI, POIGridIndex
+
+TILE_SIZE = 256
+CLUSTER_CELL_PX = 64  # 4x4 ячейки на тайл
+MAX_CLUSTER_ZOOM = 16  # глубже точки отдаются без кластеризации
+MAX_MERCATOR_LAT = 85.05112878
+
+Tile = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class TileFeature:
+    latitude: float
+    longitude: float
+    count: int = 1
+    id: Optional[int] = None  # только для одиночной точки
+    title: Optional[str] = None
+
+
+def project(lats, lons) -> tuple[np.ndarray, np.ndarray]:
+    """WGS84 → normalised web-mercator world coordinates in [0, 1)."""
+    lat = np.radians(np.clip(np.asarray(lats, dtype=float), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = (np.asarray(lons, dtype=float) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0
+    return np.clip(x, 0.0, np.nextafter(1.0, 0)), np.clip(y, 0.0, np.nextafter(1.0, 0))
+
+
+def unproject(x: float, y: float) -> tuple[float, float]:
+    lon = x * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * y))))
+    return lat, lon
+
+
+class POIClusterIndex:
+    def __init__(self):
+        self.version: Optional[int] = None  # poi_index.version, из которого построено
+        self._zooms: list[dict[Tile, list[TileFeature]]] = []
+        self._points: list[IndexedPOI] = []
+        self._x = np.empty(0)
+        self._y = np.empty(0)
+
+    def build(self, points: list[IndexedPOI]) -> None:
+        self._points = points
+        self._x, self._y = project([p.latitude for p in points], [p.longitude for p in points])
+        cells_per_tile = TILE_SIZE // CLUSTER_CELL_PX
+        self._zooms = []
+        for z in range(MAX_CLUSTER_ZOOM + 1):
+            tiles: dict[Tile, list[TileFeature]] = {}
+            self._zooms.append(tiles)
+            if not points:
+                continue
+            cells = (1 << z) * cells_per_tile
+            cx = (self._x * cells).astype(np.int64)
+            cy = (self._y * cells).astype(np.int64)
+            keys, first, inverse, counts = np.unique(
+                cx * cells + cy, return_index=True, return_inverse=True, return_counts=True
+            )
+            mean_x = np.bincount(inverse, weights=self._x) / counts
+            mean_y = np.bincount(inverse, weights=self._y) / counts
+            for key, i, count, mx, my in zip(keys.tolist(), first.tolist(), counts.tolist(),
+                                             mean_x.tolist(), mean_y.tolist()):
+                tile = (key // cells // cells_per_tile, key % cells // cells_per_tile)
+                if count == 1:
+                    poi = points[i]
+                    feature = TileFeature(poi.latitude, poi.longitude, 1, poi.id, poi.title)
+                else:
+                    feature = TileFeature(*unproject(mx, my), count)
+                tiles.setdefault(tile, []).append(feature)
+
+    def sync(self, index: POIGridIndex) -> None:
+        if self.version != index.version:
+            self.build(index.all())
+            self.version = index.version
+
+    def tile(self, z: int, x: int, y: int) -> list[TileFeature]:
+        if z <= MAX_CLUSTER_ZOOM:
+            return self._zooms[z].get((x, y), []) if self._zooms else []
+        # Без кластеризации: точки родительского тайла, попавшие в запрошенный
+        shift = z - MAX_CLUSTER_ZOOM
+        if not self._zooms or (x >> shift, y >> shift) not in self._zooms[MAX_CLUSTER_ZOOM]:
+            return []
+        scale = 1 << z
+        mask = ((self._x * scale).astype(np.int64) == x) & ((self._y * scale).astype(np.int64) == y)
+        return [
+            TileFeature(poi.latitude, poi.longitude, 1, poi.id, poi.title)
+            for poi in (self._points[i] for i in np.flatnonzero(mask))
+        ]
+
+
+poi_clusters = POIClusterIndex()
@@ -0,0 +1,248 @@
+"""
+Process-local spatial index over POI coordinates.
+
+A uniform lat/lon cell grid loaded once from ``point_of_interest`` and kept
+in sync by the POI create/update/delete endpoints, so proximity questions
+("what is near me", geofence checks) are answered without a DB round trip.
+Changes are replayed in the other worker processes via ``cache_bus``.
+Until it is loaded (cold start, after ``invalidate``) ``GET /pois`` answers
+radius queries from PostGIS (``geog`` + GiST) and loads the grid in the
+background.
+"""
+import asyncio
+import math
+from dataclasses import asdict, dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache_bus import cache_bus
+from app.core.geo import METERS_PER_DEGREE, distances_from
+from app.db.session import AsyncSessionLocal
+from app.models.poi import PointOfInterest
+
+# ~1.1 km по широте, ~0.6 км по долготе на широте Москвы
+DEFAULT_CELL_DEG = 0.01
+
+
+@dataclass(frozen=True)
+class IndexedPOI:
+    id: int
+    title: str
+    latitude: float
+    longitude: float
+
+
+Cell = tuple[int, int]
+
+
+class POIGridIndex:
+    def __init__(self, cell_deg: float = DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.loaded = False
+        self.version = 0  # bumped on every change, lets derived caches rebuild lazily
+        self._points: dict[int, IndexedPOI] = {}
+        self._cells: dict[Cell, dict[int, IndexedPOI]] = {}
+        self._bounds: Optional[tuple[int, int, int, int]] = None  # occupied cell range
+        self._lock = asyncio.Lock()
+        self._load_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    # ── maintenance ────────────────────────────────────────────────────
+
+    def _cell(self, latitude: float, longitude: float) -> Cell:
+        return math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg)
+
+    def _add(self, poi: IndexedPOI) -> None:
+        self._bounds = None
+        self._points[poi.id] = poi
+        self._cells.setdefault(self._cell(poi.latitude, poi.longitude), {})[poi.id] = poi
+
+    def _discard(self, poi_id: int) -> None:
+        old = self._points.pop(poi_id, None)
+        if old is None:
+            return
+        self._bounds = None
+        cell = self._cell(old.latitude, old.longitude)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(poi_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def rebuild(self, points: Iterable[IndexedPOI]) -> None:
+        self._points = {}
+        self._cells = {}
+        self._bounds = None
+        for poi in points:
+            self._add(poi)
+        self.loaded = True
+        self.version += 1
+
+    def upsert(self, poi: PointOfInterest) -> None:
+        """Add or move a POI after it was created/updated."""
+        point = IndexedPOI(poi.id, poi.title, poi.latitude, poi.longitude)
+        self._upsert_local(point)
+        cache_bus.publish("poi_index", op="upsert", **asdict(point))
+
+    def remove(self, poi_id: int) -> None:
+        self._remove_local(poi_id)
+        cache_bus.publish("poi_index", op="remove", id=poi_id)
+
+    def _upsert_local(self, point: IndexedPOI) -> None:
+        if not self.loaded:
+            return  # will be picked up by the initial load
+        self._discard(point.id)
+        self._add(point)
+        self.version += 1
+
+    def _remove_local(self, poi_id: int) -> None:
+        self._discard(poi_id)
+        self.version += 1
+
+    def invalidate(self) -> None:
+        """Drop everything; the next ``ensure_loaded`` reloads from the DB."""
+        self.loaded = False
+        self.version += 1
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self.loaded:
+            return
+        async with self._lock:
+            if self.loaded:
+                return
+            result = await db.execute(
+                select(
+                    PointOfInterest.id,
+                    PointOfInterest.title,
+                    PointOfInterest.latitude,
+                    PointOfInterest.longitude,
+                )
+            )
+            self.rebuild(IndexedPOI(*row) for row in result.all())
+
+    def schedule_load(self) -> None:
+        """Start loading in the background with its own session, if not loaded."""
+        if not self.loaded and (self._load_task is None or self._load_task.done()):
+            self._load_task = asyncio.create_task(self._load_in_background())
+
+    async def _load_in_background(self) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await self.ensure_loaded(db)
+        except Exception as exc:
+            print(f"POI index load failed: {exc}")
+
+    # ── queries ────────────────────────────────────────────────────────
+
+    def get(self, poi_id: int) -> Optional[IndexedPOI]:
+        return self._points.get(poi_id)
+
+    def all(self) -> list[IndexedPOI]:
+        return list(self._points.values())
+
+    @staticmethod
+    def _distances(
+        latitude: float, longitude: float, pois: list[IndexedPOI]
+    ) -> list[tuple[IndexedPOI, float]]:
+        """Distances to all candidates in one vectorised pass."""
+        if not pois:
+            return []
+        dists = distances_from(
+            latitude, longitude, [p.latitude for p in pois], [p.longitude for p in pois]
+        )
+        return list(zip(pois, dists.tolist()))
+
+    def within(
+        self, latitude: float, longitude: float, radius_m: float
+    ) -> list[tuple[IndexedPOI, float]]:
+        """POIs within ``radius_m`` metres, nearest first, with distances."""
+        d_lat = radius_m / METERS_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(min(abs(latitude) + d_lat, 89.9))), 1e-6)
+        d_lon = radius_m / (METERS_PER_DEGREE * cos_lat)
+        i0, j0 = self._cell(latitude - d_lat, longitude - d_lon)
+        i1, j1 = self._cell(latitude + d_lat, longitude + d_lon)
+
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._cells):
+            cells = [b for (i, j), b in self._cells.items() if i0 <= i <= i1 and j0 <= j <= j1]
+        else:
+            cells = [
+                self._cells[(i, j)]
+                for i in range(i0, i1 + 1)
+                for j in range(j0, j1 + 1)
+                if (i, j) in self._cells
+            ]
+
+        candidates = [poi for bucket in cells for poi in bucket.values()]
+        hits = [h for h in self._distances(latitude, longitude, candidates) if h[1] <= radius_m]
+        hits.sort(key=lambda h: (h[1], h[0].id))
+        return hits
+
+    @staticmethod
+    def _ring(ci: int, cj: int, ring: int) -> Iterable[Cell]:
+        """Cells at Chebyshev distance exactly ``ring`` from (ci, cj)."""
+        if ring == 0:
+            yield ci, cj
+            return
+        for j in range(cj - ring, cj + ring + 1):
+            yield ci - ring, j
+            yield ci + ring, j
+        for i in range(ci - ring + 1, ci + ring):
+            yield i, cj - ring
+            yield i, cj + ring
+
+    def nearest(
+        self, latitude: float, longitude: float, k: int
+    ) -> list[tuple[IndexedPOI, float]]:
+        """The ``k`` nearest POIs, searching outward ring by ring of cells."""
+        if k <= 0 or not self._cells:
+            return []
+        ci, cj = self._cell(latitude, longitude)
+        if self._bounds is None:
+            occupied_i = [i for i, _ in self._cells]
+            occupied_j = [j for _, j in self._cells]
+            self._bounds = (min(occupied_i), max(occupied_i), min(occupied_j), max(occupied_j))
+        i_min, i_max, j_min, j_max = self._bounds
+        max_ring = max(abs(ci - i_min), abs(ci - i_max), abs(cj - j_min), abs(cj - j_max))
+
+        found: list[tuple[IndexedPOI, float]] = []
+        for ring in range(max_ring + 1):
+            ring_pois = [
+                poi
+                for cell in self._ring(ci, cj, ring)
+                for poi in self._cells.get(cell, {}).values()
+            ]
+            found.extend(self._distances(latitude, longitude, ring_pois))
+            if len(found) < k:
+                continue
+            found.sort(key=lambda h: (h[1], h[0].id))
+            # Anything not yet visited lies outside the (2*ring+1)^2 block of cells
+            lat_lo, lat_hi = (ci - ring) * self.cell_deg, (ci + ring + 1) * self.cell_deg
+            lon_lo, lon_hi = (cj - ring) * self.cell_deg, (cj + ring + 1) * self.cell_deg
+            cos_lat = math.cos(math.radians(min(max(abs(lat_lo), abs(lat_hi)), 89.9)))
+            bound_m = min(
+                (latitude - lat_lo) * METERS_PER_DEGREE,
+                (lat_hi - latitude) * METERS_PER_DEGREE,
+                (longitude - lon_lo) * METERS_PER_DEGREE * cos_lat,
+                (lon_hi - longitude) * METERS_PER_DEGREE * cos_lat,
+            )
+            if found[k - 1][1] <= bound_m:
+                break
+        found.sort(key=lambda h: (h[1], h[0].id))
+        return found[:k]
+
+
+poi_index = POIGridIndex()
+
+
+def _apply_remote_change(data: dict) -> None:
+    if data.pop("op", None) == "upsert":
+        poi_index._upsert_local(IndexedPOI(**data))
+    else:
+        poi_index._remove_local(data["id"])
+
+
+cache_bus.subscribe("poi_index", _apply_remote_change, resync=poi_index.invalidate)
@@ -0,0 +1,77 @@
+"""
+Serialised route catalogue cache.
+
+``GET /routes`` output only changes when an admin edits routes or POIs, so
+the rendered JSON is kept per (skip, limit, fields) together with a content
+hash used as ETag. Keys come from the client, so only the most recently used
+``max_entries`` pages are kept (LRU). Any route/POI/photo mutation calls ``route_cache.invalidate()``,
+which also clears the cache in the other worker processes via ``cache_bus``.
+"""
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional
+
+from app.core.cache_bus import cache_bus
+
+CachedBody = tuple[bytes, str]  # (json, etag)
+# Обычно клиенты запрашивают 1–2 страницы; больше держать смысла нет
+DEFAULT_MAX_ENTRIES = 32
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison of an If-None-Match header against our ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+class RouteCatalogueCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.version = 0
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def clear(self) -> None:
+        """Drop this process' entries only."""
+        self.version += 1
+        self._entries.clear()
+
+    def invalidate(self) -> None:
+        self.clear()
+        cache_bus.publish("route_cache")
+
+    async def get_or_build(
+        self, key: Hashable, build: Callable[[], Awaitable[bytes]]
+    ) -> CachedBody:
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            return cached
+        # Один запрос строит payload, остальные ждут и берут готовый
+        async with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                return cached
+            version = self.version
+            body = await build()
+            entry = (body, make_etag(body))
+            # Не кэшируем результат, если во время сборки пришла инвалидация
+            if version == self.version:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return entry
+
+
+route_cache = RouteCatalogueCache()
+cache_bus.subscribe("route_cache", lambda _data: route_cache.clear(), resync=route_cache.clear)
@@ -0,0 +1,41 @@
+"""
+Cached per-route length and walking time (``route.length_m``,
+``route.walking_minutes``), recomputed from the ordered POI coordinates
+whenever a route's points or a POI on it change.
+"""
+from typing import Iterable
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.geo import polyline_length_m, walking_minutes
+
+
+async def refresh_route_metrics(db: AsyncSession, route_ids: Iterable[int]) -> None:
+    """
+    Recompute cached length/walking time for the given routes.
+
+    Call after the route's point list or any of its POI coordinates changed;
+    the caller commits.
+    """
+    route_ids = list(route_ids)
+    if not route_ids:
+        return
+    assoc = models.route_poi_association
+    result = await db.execute(
+        select(assoc.c.route_id, models.PointOfInterest.latitude, models.PointOfInterest.longitude)
+        .join(models.PointOfInterest, models.PointOfInterest.id == assoc.c.poi_id)
+        .where(assoc.c.route_id.in_(route_ids))
+        .order_by(assoc.c.route_id, assoc.c.order)
+    )
+    coords: dict[int, tuple[list[float], list[float]]] = {rid: ([], []) for rid in route_ids}
+    for route_id, lat, lon in result.all():
+        coords[route_id][0].append(lat)
+        coords[route_id][1].append(lon)
+
+    rows = []
+    for route_id, (lats, lons) in coords.items():
+        length = polyline_length_m(lats, lons)
+        rows.append({"id": route_id, "length_m": length, "walking_minutes": walking_minutes(length)})
+    await db.execute(update(models.Route), rows)
@@ -2,20 +2,34 @@
 Runtime-editable settings.
 
 Reads from DB table `sitesetting` first; falls back to env/config.
-Provides a thin cache so we don't hit DB on every request.
+The whole table is loaded once into an immutable snapshot, so lookups are
+plain dict reads. ``set_setting`` swaps in a new snapshot and tells the
+other worker processes (``cache_bus``) to reload theirs in the background;
+a stale snapshot is also refreshed in the background, never inline.
+A load that started before a newer local swap is dropped, and a notify
+that arrives while a reload is running triggers one more reload.
 """
+import asyncio
 import time
-from typing import Optional
+from types import MappingProxyType
+from typing import Mapping, Optional
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.site_setting import SiteSetting
+from app.core.cache_bus import cache_bus
 from app.core.config import settings as env_settings
+from app.db.session import AsyncSessionLocal
 
-# Simple in-memory cache: key -> (value, timestamp)
-_cache: dict[str, tuple[str, float]] = {}
-_CACHE_TTL = 30  # seconds
+# Immutable key -> value snapshot; replaced as a whole, never mutated
+_snapshot: Mapping[str, str] = MappingProxyType({})
+_loaded_at: Optional[float] = None  # None — ещё не загружали
+_REFRESH_INTERVAL = 300  # seconds; страховка на случай потерянного NOTIFY
+_load_lock = asyncio.Lock()
+_refresh_task: Optional[asyncio.Task] = None
+_generation = 0  # растёт при каждой замене snapshot
+_refresh_again = False  # NOTIFY пришёл во время загрузки
 
 # Keys that are editable via admin UI and their env-fallback attribute names
 EDITABLE_KEYS: dict[str, str] = {
@@ -37,21 +51,60 @@ def _env_fallback(key: str) -> str:
     return str(getattr(env_settings, attr, "") or "")
 
 
-async def get_setting(db: AsyncSession, key: str) -> str:
-    """Return setting value: DB override → env fallback."""
-    now = time.time()
-    cached = _cache.get(key)
-    if cached and (now - cached[1]) < _CACHE_TTL:
-        return cached[0] if cached[0] != "" else _env_fallback(key)
+def _swap(values: dict[str, str]) -> None:
+    global _snapshot, _loaded_at, _generation
+    _snapshot = MappingProxyType(values)
+    _loaded_at = time.monotonic()
+    _generation += 1
+
+
+async def load_settings(db: AsyncSession) -> bool:
+    """Replace the snapshot with the current contents of `sitesetting`.
+
+    Returns ``False`` (snapshot untouched) if it was swapped while the
+    query ran: that swap is newer than what this query may have read.
+    """
+    generation = _generation
+    result = await db.execute(select(SiteSetting.key, SiteSetting.value))
+    if generation != _generation:
+        return False
+    _swap({key: value for key, value in result.all() if value})
+    return True
+
+
+async def _refresh() -> None:
+    global _refresh_again
+    while True:
+        _refresh_again = False
+        try:
+            async with AsyncSessionLocal() as db:
+                loaded = await load_settings(db)
+        except Exception as exc:
+            print(f"Runtime settings refresh failed: {exc}")
+            return
+        if loaded and not _refresh_again:
+            return
+
+
+def _schedule_refresh() -> None:
+    global _refresh_task, _refresh_again
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh())
+    else:
+        # Идущая загрузка могла прочитать таблицу до этого изменения
+        _refresh_again = True
 
-    result = await db.execute(select(SiteSetting).where(SiteSetting.key == key))
-    row = result.scalars().first()
-    if row and row.value:
-        _cache[key] = (row.value, now)
-        return row.value
 
-    _cache[key] = ("", now)
-    return _env_fallback(key)
+async def get_setting(db: AsyncSession, key: str) -> str:
+    """Return setting value: DB override → env fallback."""
+    if _loaded_at is None:
+        # Только самый первый запрос процесса ждёт загрузку
+        async with _load_lock:
+            if _loaded_at is None:
+                await load_settings(db)
+    elif time.monotonic() - _loaded_at > _REFRESH_INTERVAL:
+        _schedule_refresh()
+    return _snapshot.get(key) or _env_fallback(key)
 
 
 async def set_setting(db: AsyncSession, key: str, value: str) -> None:
@@ -63,20 +116,27 @@ async def set_setting(db: AsyncSession, key: str, value: str) -> None:
     else:
         db.add(SiteSetting(key=key, value=value))
     await db.commit()
-    _cache[key] = (value, time.time())
+    values = {k: v for k, v in _snapshot.items() if k != key}
+    if value:
+        values[key] = value
+    _swap(values)
+    cache_bus.publish("settings", key=key)
 
 
 async def get_all_settings(db: AsyncSession) -> dict[str, str]:
     """Return dict of all editable settings with current effective values."""
-    result = await db.execute(select(SiteSetting))
-    db_rows = {r.key: r.value for r in result.scalars().all() if r.value}
+    await load_settings(db)
+    snapshot = _snapshot
 
     out: dict[str, str] = {}
     for key in EDITABLE_KEYS:
-        out[key] = db_rows.get(key) or _env_fallback(key)
+        out[key] = snapshot.get(key) or _env_fallback(key)
     return out
 
 
+cache_bus.subscribe("settings", lambda _data: _schedule_refresh(), resync=_schedule_refresh)
+
+
 def mask_token(val: str) -> str:
     """Show only first 4 and last 4 chars of a secret."""
     if len(val) <= 10:
@@ -0,0 +1,127 @@
+"""
+Short-lived identity cache for the authenticated user.
+
+``deps.get_current_user`` runs on nearly every request; a cache hit skips
+the ``SELECT user``. Entries are column snapshots keyed by user id, bounded
+in size (LRU) and age (TTL). Each hit builds a new *detached* ``User`` so
+requests never share an instance; endpoints that modify the user depend on
+``deps.get_current_active_user_fresh`` and get the row from their session.
+
+Any flush that touches a ``User`` row, and any bulk UPDATE/DELETE on the
+user table, invalidates the affected entries; after commit the same ids are
+invalidated in the other worker processes via ``cache_bus``.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app import models
+from app.core.cache_bus import cache_bus
+from app.core.config import settings
+
+_PENDING_KEY = "user_cache_pending"
+_CLEAR_KEY = "user_cache_clear"
+# Больше id за commit — остальные процессы сбрасывают кэш целиком
+MAX_PUBLISHED_IDS = 200
+
+
+class UserCache:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple[float, dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[models.User]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        user = models.User(**entry[1])
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, user: models.User) -> None:
+        values = {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(models.User).column_attrs
+        }
+        self._entries[user.id] = (time.monotonic() + self.ttl_seconds, values)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+
+# ── Invalidation ────────────────────────────────────────────
+# Сбрасываем и при flush, и после commit: иначе параллельный запрос мог бы
+# между ними снова закэшировать ещё не закоммиченную старую строку.
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_users(session: Session, _flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, models.User) and obj.id is not None:
+            session.info.setdefault(_PENDING_KEY, set()).add(obj.id)
+            user_cache.invalidate(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    if session.info.pop(_CLEAR_KEY, False):
+        user_cache.clear()
+        cache_bus.publish("user", ids=None)
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if user_ids:
+        for user_id in user_ids:
+            user_cache.invalidate(user_id)
+        cache_bus.publish("user", ids=sorted(user_ids) if len(user_ids) <= MAX_PUBLISHED_IDS else None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_users(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_CLEAR_KEY, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_dml(state) -> None:
+    # Массовые UPDATE/DELETE (возврат кристаллов и т.п.) — id неизвестны
+    if state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None and table.name == models.User.__tablename__:
+            state.session.info[_CLEAR_KEY] = True
+            user_cache.clear()
+
+
+def _invalidate_remote(data: dict) -> None:
+    if data.get("ids") is None:
+        user_cache.clear()
+    else:
+        for user_id in data["ids"]:
+            user_cache.invalidate(user_id)
+
+
+cache_bus.subscribe("user", _invalidate_remote, resync=user_cache.clear)
@@ -0,0 +1,133 @@
+"""
+Per-user activity counters (``user_stats``).
+
+Check-ins, route completions and correct quiz answers bump the counters
+with an atomic upsert inside the caller's transaction, so readers
+(achievements, profiles) fetch one row instead of aggregating history.
+``reconcile_user_stats`` rebuilds them from ``user_progress`` and
+``user_quiz_progress``.
+"""
+from typing import Optional, Sequence
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user_stats import UserStats
+
+EMPTY_STATS = {"points": 0, "routes": 0, "quizzes": 0}
+
+
+async def bump_user_stats(
+    db: AsyncSession, user_id: int, *, points: int = 0, routes: int = 0, quizzes: int = 0
+) -> None:
+    """Add deltas to a user's counters; not committed here."""
+    if not (points or routes or quizzes):
+        return
+    stmt = insert(UserStats).values(
+        user_id=user_id,
+        checked_in_points=points,
+        completed_routes=routes,
+        correct_quizzes=quizzes,
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            "checked_in_points": UserStats.checked_in_points + stmt.excluded.checked_in_points,
+            "completed_routes": UserStats.completed_routes + stmt.excluded.completed_routes,
+            "correct_quizzes": UserStats.correct_quizzes + stmt.excluded.correct_quizzes,
+            "updated_at": func.now(),
+        },
+    ))
+
+
+async def get_user_stats(db: AsyncSession, user_id: int) -> dict[str, int]:
+    result = await db.execute(
+        select(
+            UserStats.checked_in_points,
+            UserStats.completed_routes,
+            UserStats.correct_quizzes,
+        ).where(UserStats.user_id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return dict(EMPTY_STATS)
+    return {"points": row[0], "routes": row[1], "quizzes": row[2]}
+
+
+# Полный пересчёт из истории (начальное заполнение — в миграции n4o5p6q7r8s9)
+RECONCILE_SQL = """
+    INSERT INTO user_stats (user_id, checked_in_points, completed_routes, correct_quizzes, updated_at)
+    SELECT u.id,
+           COALESCE(p.points, 0),
+           COALESCE(p.routes, 0),
+           COALESCE(q.quizzes, 0),
+           NOW()
+    FROM "user" u
+    LEFT JOIN (
+        SELECT user_id,
+               SUM(completed_points_count) AS points,
+               COUNT(*) FILTER (WHERE status = 'completed') AS routes
+        FROM user_progress
+        GROUP BY user_id
+    ) p ON p.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) AS quizzes
+        FROM user_quiz_progress
+        WHERE is_correct
+        GROUP BY user_id
+    ) q ON q.user_id = u.id
+    {where}
+    ON CONFLICT (user_id) DO UPDATE
+    SET checked_in_points = EXCLUDED.checked_in_points,
+        completed_routes = EXCLUDED.completed_routes,
+        correct_quizzes = EXCLUDED.correct_quizzes,
+        updated_at = NOW()
+"""
+
+
+async def reconcile_user_stats(
+    db: AsyncSession, user_ids: Optional[Sequence[int]] = None
+) -> int:
+    """Recompute counters from history (all users or ``user_ids``); returns rows written."""
+    if user_ids is None:
+        result = await db.execute(text(RECONCILE_SQL.format(where="")))
+    else:
+        result = await db.execute(
+            text(RECONCILE_SQL.format(where="WHERE u.id = ANY(:user_ids)")),
+            {"user_ids": list(user_ids)},
+        )
+    await db.commit()
+    return result.rowcount
+
+
+async def subtract_route_progress(db: AsyncSession, route_id: int) -> None:
+    """Take a route's progress rows out of the counters before they are deleted."""
+    await db.execute(text("""
+        UPDATE user_stats s
+        SET checked_in_points = s.checked_in_points - p.points,
+            completed_routes = s.completed_routes - p.routes,
+            updated_at = NOW()
+        FROM (
+            SELECT user_id,
+                   COALESCE(SUM(completed_points_count), 0) AS points,
+                   COUNT(*) FILTER (WHERE status = 'completed') AS routes
+            FROM user_progress
+            WHERE route_id = :route_id
+            GROUP BY user_id
+        ) p
+        WHERE s.user_id = p.user_id
+    """), {"route_id": route_id})
+
+
+async def subtract_quiz_answers(db: AsyncSession, quiz_id: int) -> None:
+    """Take a quiz's correct answers out of the counters before it is deleted."""
+    await db.execute(text("""
+        UPDATE user_stats
+        SET correct_quizzes = correct_quizzes - 1,
+            updated_at = NOW()
+        WHERE user_id IN (
+            SELECT user_id FROM user_quiz_progress
+            WHERE quiz_id = :quiz_id AND is_correct
+        )
+    """), {"quiz_id": quiz_id})
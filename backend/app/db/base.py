@@ -8,9 +8,12 @@ from app.models.user_quiz_progress import UserQuizProgress
 from app.models.achievement import Achievement, UserAchievement
 from app.models.cosmetics import Title, UserTitle, ProfileFrame, UserFrame, Badge, UserBadge
 from app.models.friendship import FriendRequest, Friendship
-from app.models.time_photo import TimePhoto
+from app.models.time_photo import TimePhoto, TimePhotoJob
+from app.models.telegram_auth import TelegramAuthSession, TelegramAuthCode
+from app.models.user_stats import UserStats
 from app.models.learning import (
     LearningModule, LearningLesson, LearningQuestion,
-    UserLearningProgress, UserLessonProgress, UserQuestionHistory, LearningSession
+    UserLearningProgress, UserLessonProgress, UserQuestionHistory, LearningSession,
+    LeagueWeeklyXP,
 )
 from app.models.site_setting import SiteSetting
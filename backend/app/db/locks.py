@@ -0,0 +1,21 @@
+"""
+Advisory locks for background loops that must not run concurrently.
+
+Every uvicorn worker starts the same loops; a loop whose rounds must not
+overlap (they call providers or refund crystals) takes a transaction-level
+advisory lock at the start of a round and skips it if another process
+already holds the lock.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Ключи pg_advisory_*: произвольные, но уникальные в пределах базы
+GEMINIGEN_POLLER_LOCK = 7_310_001
+AUTH_SWEEPER_LOCK = 7_310_002
+LEAGUE_ROLLOVER_LOCK = 7_310_003
+
+
+async def try_advisory_xact_lock(db: AsyncSession, key: int) -> bool:
+    """Take ``key`` until the current transaction ends; False if it is held."""
+    result = await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": key})
+    return bool(result.scalar())
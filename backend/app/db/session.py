@@ -1,8 +1,121 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import json
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL, future=True, echo=True)
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+
+class DBStats:
+    """Counters for /metrics: pool checkouts and waits, slow statements."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.slow_queries = 0
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self, engine: AsyncEngine) -> dict:
+        pool = engine.pool
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "avg_wait_ms": round(1000 * self.wait_seconds / self.checkouts, 2) if self.checkouts else 0.0,
+            "max_wait_ms": round(1000 * self.max_wait_seconds, 2),
+            "slow_queries": self.slow_queries,
+        }
+
+
+db_stats = DBStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_stats.record_wait(time.perf_counter() - started)
+
+
+def _instrument(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine.pool, "connect")
+    def _on_connect(dbapi_conn, record):
+        db_stats.connects += 1
+
+    @event.listens_for(sync_engine.pool, "invalidate")
+    def _on_invalidate(dbapi_conn, record, exc):
+        db_stats.invalidations += 1
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = 1000 * (time.perf_counter() - conn.info["query_started"].pop())
+        if elapsed_ms >= settings.DB_SLOW_QUERY_MS:
+            db_stats.slow_queries += 1
+            # Одна JSON-строка на запрос: удобно грепать и парсить
+            slow_query_logger.warning(json.dumps({
+                "event": "slow_query",
+                "duration_ms": round(elapsed_ms, 1),
+                "statement": " ".join(statement.split())[:2000],
+                "executemany": executemany,
+            }, ensure_ascii=False))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _on_error(context):
+        started = context.connection.info.get("query_started") if context.connection else None
+        if started:
+            started.pop()
+
+
+def create_engine(url: str = settings.DATABASE_URL) -> AsyncEngine:
+    """Build the async engine from the DB_* settings."""
+    server_settings = {"application_name": settings.PROJECT_NAME[:63]}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": server_settings,
+        },
+    )
+    _instrument(engine)
+    return engine
+
+
+engine = create_engine()
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def get_db():
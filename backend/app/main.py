@@ -1,18 +1,61 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from app.core.config import settings
+from app.core.http_client import http_clients
+from app.core.pg_listener import pg_listener
+from app.core.poi_index import poi_index
+from app.core.runtime_settings import load_settings
+from app.core.security import PasswordHasherBusy, password_hasher
 from app.api.v1.api import api_router
+from app.db.session import AsyncSessionLocal
+from app.workers.auth_sweeper import auth_sweeper
+from app.workers.geminigen_poller import geminigen_poller
+from app.workers.league_rollover import league_rollover
+from app.workers.time_machine import time_machine_worker
 from app.web.admin import router as admin_router
 
 from fastapi.staticfiles import StaticFiles
 import os
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in-process caches; endpoints load lazily if this fails
+    try:
+        async with AsyncSessionLocal() as db:
+            await poi_index.ensure_loaded(db)
+        print(f"POI index loaded: {len(poi_index)} points")
+    except Exception as exc:
+        print(f"POI index warm-up skipped: {exc}")
+    try:
+        async with AsyncSessionLocal() as db:
+            await load_settings(db)
+    except Exception as exc:
+        print(f"Runtime settings warm-up skipped: {exc}")
+    time_machine_worker.start(settings.TIME_MACHINE_WORKERS)
+    geminigen_poller.start()
+    pg_listener.start()
+    auth_sweeper.start()
+    league_rollover.start()
+    yield
+    await league_rollover.stop()
+    await auth_sweeper.stop()
+    await pg_listener.stop()
+    await geminigen_poller.stop()
+    await time_machine_worker.stop()
+    await http_clients.aclose()
+    password_hasher.shutdown()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="Backend for Moscow Chrono Walker - Historical Exploration Game",
     version="0.1.0",
     redirect_slashes=True,
+    lifespan=lifespan,
 )
 
 
@@ -27,6 +70,15 @@ async def normalize_api_path(request: Request, call_next):
     return await call_next(request)
 
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many login attempts, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 # Set all CORS enabled origins
 app.add_middleware(
     CORSMiddleware,
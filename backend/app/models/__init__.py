@@ -7,9 +7,12 @@ from .user_quiz_progress import UserQuizProgress
 from .achievement import Achievement, UserAchievement
 from .cosmetics import Title, UserTitle, ProfileFrame, UserFrame, Badge, UserBadge
 from .friendship import FriendRequest, Friendship
-from .time_photo import TimePhoto
+from .time_photo import TimePhoto, TimePhotoJob
+from .telegram_auth import TelegramAuthSession, TelegramAuthCode
+from .user_stats import UserStats
 from .learning import (
     LearningModule, LearningLesson, LearningQuestion,
-    UserLearningProgress, UserLessonProgress, UserQuestionHistory, LearningSession
+    UserLearningProgress, UserLessonProgress, UserQuestionHistory, LearningSession,
+    LeagueWeeklyXP,
 )
 from .site_setting import SiteSetting
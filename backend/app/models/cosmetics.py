@@ -1,5 +1,5 @@
 """Cosmetic items: Titles, Frames, Badges"""
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -23,6 +23,7 @@ class Title(Base):
 class UserTitle(Base):
     """Разблокированные титулы пользователя"""
     __tablename__ = "user_title"
+    __table_args__ = (UniqueConstraint("user_id", "title_id", name="uq_user_title"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -55,6 +56,7 @@ class ProfileFrame(Base):
 class UserFrame(Base):
     """Разблокированные рамки пользователя"""
     __tablename__ = "user_frame"
+    __table_args__ = (UniqueConstraint("user_id", "frame_id", name="uq_user_frame"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -85,6 +87,7 @@ class Badge(Base):
 class UserBadge(Base):
     """Разблокированные бейджи пользователя"""
     __tablename__ = "user_badge"
+    __table_args__ = (UniqueConstraint("user_id", "badge_id", name="uq_user_badge"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
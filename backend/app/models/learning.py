@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Text, JSON, func
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, Date, DateTime, Text, JSON, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
 
+# Лиги снизу вверх
+LEAGUES = ("bronze", "silver", "gold", "platinum", "diamond")
+
 
 class LearningModule(Base):
     """A learning module (e.g., 'Medieval Moscow', 'Soviet Architecture')"""
@@ -70,7 +73,7 @@ class UserLearningProgress(Base):
     longest_streak = Column(Integer, default=0)
     daily_goal = Column(Integer, default=10)  # XP per day goal
     last_activity_date = Column(DateTime(timezone=True), nullable=True)
-    league = Column(String, default="bronze")  # bronze, silver, gold, platinum, diamond
+    league = Column(String, default="bronze")  # LEAGUES; меняется только недельным rollover
 
     # Relationships
     user = relationship("User", backref="learning_progress")
@@ -123,3 +126,24 @@ class LearningSession(Base):
     # Relationships
     user = relationship("User", backref="learning_sessions")
     lesson = relationship("LearningLesson", back_populates="sessions")
+
+
+class LeagueWeeklyXP(Base):
+    """XP earned by a user during one league week (kept up to date by session completion)"""
+    __tablename__ = "league_weekly_xp"
+
+    week_start = Column(Date, primary_key=True)  # понедельник недели (UTC)
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    league = Column(String, nullable=False)  # лига, в которой пользователь играл эту неделю
+    xp = Column(Integer, nullable=False, default=0, server_default="0")
+    outcome = Column(String, nullable=True)  # promoted / demoted / stayed — после rollover
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Таблица лиги за неделю: top-N и "моё место" идут по этому индексу
+    __table_args__ = (
+        Index("ix_league_weekly_xp_ranking", "week_start", "league", xp.desc(), "user_id"),
+        # Недели, ещё не закрытые rollover'ом
+        Index("ix_league_weekly_xp_open", "week_start", postgresql_where=outcome.is_(None)),
+    )
+
+    user = relationship("User")
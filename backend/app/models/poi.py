@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey
-from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy.orm import relationship
+from geoalchemy2 import Geography
+from sqlalchemy import Column, Computed, Integer, String, Float, Text, ForeignKey
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from app.db.base_class import Base
 
 
@@ -15,7 +16,27 @@ class PointOfInterest(Base):
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
 
-    full_article = Column(Text, nullable=True)    # Полная статья/история объекта (Markdown)
+    # Точка на сфере для радиусного поиска (GiST-индекс), вычисляется из lat/lon
+    geog = deferred(Column(
+        Geography(geometry_type="POINT", srid=4326),
+        Computed("ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography", persisted=True),
+    ))
+
+    # Полная статья/история объекта (Markdown). Отложенная загрузка: списки и карта
+    # её не отдают, полный вид подключает undefer()
+    full_article = deferred(Column(Text, nullable=True))
+
+    # Полнотекстовый поиск (/pois/search): веса A — название, B — описание, C — статья.
+    # Генерируемая колонка, как geog: пересчитывается самой БД при каждой записи
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(description, '')), 'B') || "
+            "setweight(to_tsvector('russian', coalesce(full_article, '')), 'C')",
+            persisted=True,
+        ),
+    ))
 
     # Legacy single image fields (kept for backwards compatibility)
     historic_image_url = Column(String, nullable=True)
@@ -33,6 +54,21 @@ class PointOfInterest(Base):
     photos = relationship("POIPhoto", back_populates="poi", cascade="all, delete-orphan",
                           order_by="POIPhoto.year")
 
+    @property
+    def thumbnail_url(self):
+        return self.historic_image_url or self.modern_image_url
+
+
+# Колонки облегчённой проекции (schemas.PointOfInterestSummary), для load_only()
+SUMMARY_COLUMNS = (
+    PointOfInterest.id,
+    PointOfInterest.title,
+    PointOfInterest.latitude,
+    PointOfInterest.longitude,
+    PointOfInterest.historic_image_url,
+    PointOfInterest.modern_image_url,
+)
+
 
 class POIPhoto(Base):
     """Фотография точки интереса, привязанная к конкретному году."""
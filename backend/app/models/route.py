@@ -18,6 +18,9 @@ class Route(Base):
     difficulty = Column(String, default="Easy") # Easy, Medium, Hard
     reward_xp = Column(Float, default=100.0)
     is_premium = Column(Boolean, default=False)
+    # Кэш метрик маршрута, пересчитывается при изменении точек (app/core/route_metrics.py)
+    length_m = Column(Float, nullable=True)
+    walking_minutes = Column(Integer, nullable=True)
     
     # Relationships
     points = relationship(
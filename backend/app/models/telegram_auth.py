@@ -0,0 +1,31 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, func
+from app.db.base_class import Base
+
+# Сессии и коды входа через бота живут 10 минут, затем их удаляет auth_sweeper
+TELEGRAM_AUTH_TTL_MINUTES = 10
+
+
+class TelegramAuthSession(Base):
+    """Сессия входа по ссылке на бота; бот заполняет telegram_* поля."""
+    __tablename__ = "telegram_auth_sessions"
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String, nullable=False, unique=True)
+    telegram_id = Column(BigInteger, nullable=True)
+    telegram_username = Column(String, nullable=True)
+    telegram_first_name = Column(String, nullable=True)
+    telegram_photo_url = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), index=True)
+
+
+class TelegramAuthCode(Base):
+    """Одноразовый код входа, выданный ботом."""
+    __tablename__ = "telegram_auth_codes"
+
+    id = Column(Integer, primary_key=True)
+    code = Column(String, nullable=False, unique=True)
+    telegram_id = Column(BigInteger, nullable=False)
+    telegram_username = Column(String, nullable=True)
+    telegram_first_name = Column(String, nullable=True)
+    telegram_photo_url = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -22,5 +22,28 @@ class TimePhoto(Base):
     cost = Column(Integer, server_default="1", nullable=False)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     completed_at = Column(DateTime, nullable=True)
+    next_poll_at = Column(DateTime, nullable=True)  # когда poller снова спросит провайдера
+
+    # Poller выбирает только processing-фото, которым пора на проверку
+    __table_args__ = (
+        Index("ix_time_photo_next_poll", "next_poll_at", postgresql_where=status == "processing"),
+    )
 
     user = relationship("User", backref="time_photos")
+
+
+class TimePhotoJob(Base):
+    """Задача очереди генерации: отправка фото провайдеру."""
+    __tablename__ = "time_photo_job"
+
+    id = Column(Integer, primary_key=True, index=True)
+    photo_id = Column(Integer, ForeignKey("time_photo.id", ondelete="CASCADE"),
+                      nullable=False, unique=True)
+    status = Column(String, server_default="queued", nullable=False)  # queued, running, done, failed
+    attempts = Column(Integer, server_default="0", nullable=False)
+    run_after = Column(DateTime, server_default=func.now(), nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    photo = relationship("TimePhoto")
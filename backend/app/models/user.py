@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, BigInteger, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Boolean, Float, BigInteger, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -47,6 +47,16 @@ class User(Base):
     # Privacy settings
     profile_visibility = Column(String, default="public")  # public, friends, private
     show_on_leaderboard = Column(Boolean, default=True)
+
+    # Поиск (/profile/search): GIN gin_trgm_ops и text_pattern_ops по lower(username)
+    # и lower(display_name) — функциональные индексы, создаются миграцией r8s9t0u1v2w3
+    # Рейтинг: только видимые активные игроки (app/core/leaderboard.py)
+    __table_args__ = (
+        Index(
+            "ix_user_leaderboard", xp.desc(), id,
+            postgresql_where=show_on_leaderboard.isnot(False) & is_active.isnot(False),
+        ),
+    )
     
     created_at = Column(DateTime, server_default=func.now())
     
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, func
+from app.db.base_class import Base
+
+
+class UserStats(Base):
+    """Денормализованные счётчики пользователя; меняются в той же транзакции, что и событие."""
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    checked_in_points = Column(Integer, server_default="0", nullable=False)  # SUM(user_progress.completed_points_count)
+    completed_routes = Column(Integer, server_default="0", nullable=False)
+    correct_quizzes = Column(Integer, server_default="0", nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -2,16 +2,16 @@ from .token import Token, TokenPayload
 from .user import (
     User, UserCreate, UserInDB, UserUpdate, TelegramAuthData,
     ProfileUpdate, UserProfile, PublicProfile, UserSearchResult,
-    TitleOut, FrameOut, BadgeOut
+    TitleOut, FrameOut, BadgeOut, LeaderboardEntry
 )
-from .poi import PointOfInterest, PointOfInterestCreate, PointOfInterestUpdate, POIPhoto, POIPhotoCreate
-from .route import Route, RouteCreate, RouteUpdate
+from .poi import PointOfInterest, PointOfInterestCreate, PointOfInterestUpdate, PointOfInterestSummary, POISearchHit, POIPhoto, POIPhotoCreate, POITile, POITileFeature
+from .route import Route, RouteCreate, RouteUpdate, RouteSummary
 from .progress import UserProgress, UserProgressCreate, UserProgressUpdate, CheckIn, CheckInResponse
 from .quiz import Quiz, QuizCreate, QuizUpdate, QuizPublic, QuizSubmit, QuizSubmitResponse, UserQuizProgress
 from .verification import VerificationResponse
 from .achievement import Achievement, AchievementCreate, UserAchievement, AchievementWithStatus, NewAchievementsResponse
 from .friendship import FriendRequestCreate, FriendRequestOut, FriendOut, FriendshipUpdate
-from .cosmetics import TitleOut as CosmeticTitleOut, FrameOut as CosmeticFrameOut, BadgeOut as CosmeticBadgeOut, EquipTitle, EquipFrame, EquipBadges
+from .cosmetics import TitleOut as CosmeticTitleOut, FrameOut as CosmeticFrameOut, BadgeOut as CosmeticBadgeOut, EquipTitle, EquipFrame, EquipBadges, UnlockedCosmetic
 
 from .time_photo import TimePhotoCreate, TimePhotoOut, TimePhotoHistory, CrystalBalance
 
@@ -79,3 +79,10 @@ class EquipFrame(BaseModel):
 
 class EquipBadges(BaseModel):
     badge_ids: list[int] = []  # Max 3
+
+
+# Newly unlocked item (POST /cosmetics/check)
+class UnlockedCosmetic(BaseModel):
+    type: str  # title, frame, badge
+    name: str
+    rarity: str
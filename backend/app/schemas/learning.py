@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from typing import Optional, List, Any
-from datetime import datetime
+from datetime import date, datetime
 
 
 # ── Module schemas ──────────────────────────────────────────────────────────
@@ -142,13 +142,17 @@ class LearningDashboardOut(BaseModel):
 
 
 class LeagueUserOut(BaseModel):
+    rank: int
     user_id: int
     username: str
     display_name: Optional[str] = None
     avatar_url: Optional[str] = None
-    total_xp: int = 0
+    total_xp: int = 0  # XP за текущую неделю
 
 
 class LeagueLeaderboardOut(BaseModel):
     league: str
+    week_start: date
     users: List[LeagueUserOut] = []
+    my_rank: Optional[int] = None  # None — на этой неделе ещё нет XP в этой лиге
+    my_xp: int = 0
@@ -59,4 +59,45 @@ class PointOfInterestInDBBase(PointOfInterestBase):
     model_config = ConfigDict(from_attributes=True)
 
 class PointOfInterest(PointOfInterestInDBBase):
-    pass
+    distance_m: Optional[float] = None  # только при поиске по координатам
+
+
+class PointOfInterestSummary(BaseModel):
+    """Облегчённая проекция для карты и списков: без текстов и галерей."""
+    id: int
+    title: str
+    latitude: float
+    longitude: float
+    thumbnail_url: Optional[str] = None
+    distance_m: Optional[float] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class POISearchHit(BaseModel):
+    """Результат /pois/search; подсвеченные фрагменты — HTML с <mark>, остальное экранировано."""
+    id: int
+    title: str
+    latitude: float
+    longitude: float
+    thumbnail_url: Optional[str] = None
+    rank: float
+    title_highlight: str
+    snippet: Optional[str] = None
+
+
+# ---------- Map tiles ----------
+
+class POITileFeature(BaseModel):
+    """Кластер (count > 1) или одиночная точка (count == 1, есть id/title)."""
+    latitude: float
+    longitude: float
+    count: int = 1
+    id: Optional[int] = None
+    title: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class POITile(BaseModel):
+    z: int
+    x: int
+    y: int
+    features: List[POITileFeature] = []
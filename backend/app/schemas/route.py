@@ -1,6 +1,6 @@
 from typing import List, Optional
 from pydantic import BaseModel, ConfigDict
-from .poi import PointOfInterest
+from .poi import PointOfInterest, PointOfInterestSummary
 
 class RouteBase(BaseModel):
     title: str
@@ -22,9 +22,24 @@ class RouteUpdate(BaseModel):
 
 class RouteInDBBase(RouteBase):
     id: int
+    length_m: Optional[float] = None
+    walking_minutes: Optional[int] = None
     points: List[PointOfInterest] = []
 
     model_config = ConfigDict(from_attributes=True)
 
 class Route(RouteInDBBase):
     pass
+
+
+class RouteSummary(BaseModel):
+    id: int
+    title: str
+    difficulty: Optional[str] = None
+    reward_xp: Optional[float] = None
+    is_premium: Optional[bool] = False
+    length_m: Optional[float] = None
+    walking_minutes: Optional[int] = None
+    points: List[PointOfInterestSummary] = []
+
+    model_config = ConfigDict(from_attributes=True)
@@ -138,6 +138,9 @@ class UserProfile(User):
     unlocked_badges_count: int = 0
     friends_count: int = 0
     achievements_count: int = 0
+    checked_in_points: int = 0
+    completed_routes: int = 0
+    correct_quizzes: int = 0
 
 
 # Public profile (limited info)
@@ -156,6 +159,8 @@ class PublicProfile(BaseModel):
     equipped_badges: List[BadgeOut] = []
     achievements_count: int = 0
     friends_count: int = 0
+    checked_in_points: int = 0
+    completed_routes: int = 0
     total_distance_km: float = 0.0
     streak_days: int = 0
     created_at: Optional[datetime] = None
@@ -182,6 +187,17 @@ class UserSearchResult(BaseModel):
         from_attributes = True
 
 
+# Leaderboard row (GET /users/leaderboard)
+class LeaderboardEntry(BaseModel):
+    rank: int
+    id: int
+    username: str
+    display_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    level: int = 1
+    xp: float = 0.0
+
+
 # Additional properties stored in DB
 class UserInDB(UserInDBBase):
     hashed_password: Optional[str] = None
@@ -2,7 +2,6 @@
 import asyncio
 import logging
 
-import psycopg2
 from aiogram import Bot, Dispatcher, F, Router
 from aiogram.types import (
     Message, CallbackQuery,
@@ -11,14 +10,15 @@ from aiogram.types import (
 from aiogram.filters import Command, CommandStart
 from aiogram.enums import ParseMode
 
+from sqlalchemy import text
+
 from app.core.config import settings
+from app.core.pg_listener import TELEGRAM_AUTH_CHANNEL
+from app.db.session import engine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Database connection string (sync version for bot)
-DB_URL = settings.DATABASE_URL.replace('+asyncpg', '').replace('postgresql+asyncpg', 'postgresql')
-
 # Site URL from config
 SITE_URL = settings.SITE_URL
 
@@ -26,65 +26,65 @@ router = Router()
 
 
 # ── DB helpers ──────────────────────────────────────────────
-
-def check_user_exists(telegram_id: int) -> bool:
-    conn = psycopg2.connect(DB_URL)
-    try:
-        cur = conn.cursor()
-        cur.execute('SELECT 1 FROM "user" WHERE telegram_id = %s', (telegram_id,))
-        return cur.fetchone() is not None
-    finally:
-        conn.close()
-
-
-def update_auth_session(session_id: str, user_data: dict) -> bool:
-    conn = psycopg2.connect(DB_URL)
-    try:
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE telegram_auth_sessions
-            SET telegram_id = %s,
-                telegram_username = %s,
-                telegram_first_name = %s,
-                telegram_photo_url = %s
-            WHERE session_id = %s
-              AND created_at > NOW() - INTERVAL '10 minutes'
-              AND telegram_id IS NULL
-            RETURNING id
-        """, (
-            user_data['telegram_id'],
-            user_data['username'],
-            user_data['first_name'],
-            user_data['photo_url'],
-            session_id,
-        ))
-        result = cur.fetchone()
-        conn.commit()
-        return result is not None
-    finally:
-        conn.close()
-
-
-def get_session_status(session_id: str) -> str:
-    conn = psycopg2.connect(DB_URL)
-    try:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT telegram_id, created_at > NOW() - INTERVAL '10 minutes' as valid
-            FROM telegram_auth_sessions
-            WHERE session_id = %s
-        """, (session_id,))
-        row = cur.fetchone()
-        if not row:
-            return 'not_found'
-        telegram_id, valid = row
-        if not valid:
-            return 'expired'
-        if telegram_id:
-            return 'used'
-        return 'valid'
-    finally:
-        conn.close()
+# Общий async-движок API (asyncpg, пул соединений). Запросы — константы,
+# поэтому asyncpg переиспользует подготовленные выражения из своего кэша.
+
+_USER_EXISTS_SQL = text('SELECT 1 FROM "user" WHERE telegram_id = :telegram_id')
+
+# NOTIFY уходит при коммите и будит long-poll /telegram/auth-status
+_UPDATE_SESSION_SQL = text("""
+    WITH updated AS (
+        UPDATE telegram_auth_sessions
+        SET telegram_id = :telegram_id,
+            telegram_username = :username,
+            telegram_first_name = :first_name,
+            telegram_photo_url = :photo_url
+        WHERE session_id = :session_id
+          AND created_at > NOW() - INTERVAL '10 minutes'
+          AND telegram_id IS NULL
+        RETURNING id, session_id
+    )
+    SELECT id, pg_notify(:channel, session_id) FROM updated
+""")
+
+_SESSION_STATUS_SQL = text("""
+    SELECT telegram_id, created_at > NOW() - INTERVAL '10 minutes' as valid
+    FROM telegram_auth_sessions
+    WHERE session_id = :session_id
+""")
+
+
+async def check_user_exists(telegram_id: int) -> bool:
+    async with engine.connect() as conn:
+        result = await conn.execute(_USER_EXISTS_SQL, {"telegram_id": telegram_id})
+        return result.first() is not None
+
+
+async def update_auth_session(session_id: str, user_data: dict) -> bool:
+    async with engine.begin() as conn:
+        result = await conn.execute(_UPDATE_SESSION_SQL, {
+            "telegram_id": user_data['telegram_id'],
+            "username": user_data['username'],
+            "first_name": user_data['first_name'],
+            "photo_url": user_data['photo_url'],
+            "session_id": session_id,
+            "channel": TELEGRAM_AUTH_CHANNEL,
+        })
+        return result.first() is not None
+
+
+async def get_session_status(session_id: str) -> str:
+    async with engine.connect() as conn:
+        result = await conn.execute(_SESSION_STATUS_SQL, {"session_id": session_id})
+        row = result.first()
+    if not row:
+        return 'not_found'
+    telegram_id, valid = row
+    if not valid:
+        return 'expired'
+    if telegram_id:
+        return 'used'
+    return 'valid'
 
 
 # ── Helpers ─────────────────────────────────────────────────
@@ -119,7 +119,7 @@ async def start_deep_link(message: Message, bot: Bot):
     if not session_id:
         return await start_no_link(message)
 
-    status = get_session_status(session_id)
+    status = await get_session_status(session_id)
 
     if status in ('not_found', 'expired'):
         await message.answer(
@@ -137,7 +137,7 @@ async def start_deep_link(message: Message, bot: Bot):
         )
         return
 
-    user_exists = check_user_exists(user.id)
+    user_exists = await check_user_exists(user.id)
     btn_text = "\u2705 Войти" if user_exists else "\u2705 Зарегистрироваться и войти"
 
     kb = InlineKeyboardMarkup(inline_keyboard=[
@@ -187,7 +187,7 @@ async def auth_callback(callback: CallbackQuery, bot: Bot):
 
     user_data = await get_user_data(bot, user)
 
-    if update_auth_session(session_id, user_data):
+    if await update_auth_session(session_id, user_data):
         await callback.message.edit_text(
             f"\U0001F389 <b>Готово!</b>\n\n"
             f"{user.first_name}, вы успешно авторизованы.\n"
@@ -214,7 +214,10 @@ async def main():
     dp.include_router(router)
 
     logger.info("Starting Telegram bot @%s", settings.TELEGRAM_BOT_USERNAME)
-    await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+    try:
+        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+    finally:
+        await engine.dispose()
 
 
 def run_bot():
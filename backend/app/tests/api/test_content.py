@@ -1,4 +1,6 @@
 import pytest
+import random
+import string
 import uuid
 from httpx import AsyncClient
 
@@ -28,3 +30,79 @@ async def test_public_read_endpoints(client: AsyncClient):
     response = await client.get("/api/v1/routes/")
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+
+def _word() -> str:
+    # Только буквы: цифры парсер tsvector выделил бы в отдельный токен
+    return "".join(random.choices(string.ascii_lowercase, k=12))
+
+
+@pytest.fixture(scope="function")
+async def search_pois(test_engine):
+    from sqlalchemy import delete
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.models import PointOfInterest
+
+    words = {"tok": _word(), "other": _word(), "ex": _word()}
+    seeded = {
+        # Слово в заголовке (вес A)
+        "title": PointOfInterest(
+            title=f"Усадьба {words['tok']}", description="Старинная усадьба",
+            full_article="Текст статьи", latitude=55.75, longitude=37.61,
+        ),
+        # Слово в описании (вес B) вместе с исключаемым
+        "description": PointOfInterest(
+            title="Палаты", description=f"Палаты {words['tok']} {words['ex']}",
+            latitude=55.75, longitude=37.62,
+        ),
+        # Слово только в статье (вес C), другое — в описании
+        "article": PointOfInterest(
+            title="Дом купца", description=f"Описание {words['other']}",
+            full_article=f"Статья про {words['tok']} и историю дома",
+            latitude=55.75, longitude=37.63,
+        ),
+    }
+    async with AsyncSession(test_engine, expire_on_commit=False) as session:
+        session.add_all(seeded.values())
+        await session.commit()
+        ids = {name: poi.id for name, poi in seeded.items()}
+        yield words, ids
+        await session.execute(delete(PointOfInterest).where(PointOfInterest.id.in_(ids.values())))
+        await session.commit()
+
+
+async def _search(client: AsyncClient, q: str, ids: dict) -> list:
+    response = await client.get("/api/v1/pois/search", params={"q": q})
+    assert response.status_code == 200
+    return [hit for hit in response.json() if hit["id"] in ids.values()]
+
+
+@pytest.mark.asyncio
+async def test_poi_search_ranks_title_above_article(client: AsyncClient, search_pois):
+    words, ids = search_pois
+    hits = await _search(client, words["tok"], ids)
+    assert [hit["id"] for hit in hits] == [ids["title"], ids["description"], ids["article"]]
+    assert f"<mark>{words['tok']}</mark>" in hits[0]["title_highlight"]
+    assert hits[0]["rank"] > hits[-1]["rank"]
+
+
+@pytest.mark.asyncio
+async def test_poi_search_accepts_websearch_syntax(client: AsyncClient, search_pois):
+    words, ids = search_pois
+    hits = await _search(client, f"{words['tok']} -{words['ex']}", ids)
+    assert {hit["id"] for hit in hits} == {ids["title"], ids["article"]}
+
+    hits = await _search(client, f"{words['ex']} or {words['other']}", ids)
+    assert {hit["id"] for hit in hits} == {ids["description"], ids["article"]}
+
+    hits = await _search(client, f'"Палаты {words["tok"]}"', ids)
+    assert [hit["id"] for hit in hits] == [ids["description"]]
+
+
+@pytest.mark.asyncio
+async def test_poi_search_snippet_covers_description_and_article(client: AsyncClient, search_pois):
+    words, ids = search_pois
+    hits = await _search(client, f"{words['other']} or {words['tok']}", ids)
+    snippet = next(hit["snippet"] for hit in hits if hit["id"] == ids["article"])
+    assert f"<mark>{words['other']}</mark>" in snippet  # из описания
+    assert f"<mark>{words['tok']}</mark>" in snippet  # из статьи
@@ -0,0 +1,108 @@
+import uuid
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.leagues import rollover_week
+from app.models.learning import LeagueWeeklyXP, UserLearningProgress
+
+WEEK = date(2001, 1, 1)  # понедельник, заведомо не пересекается с живыми данными
+NEXT_WEEK = date(2001, 1, 8)
+
+
+@pytest.fixture(scope="function")
+async def db(test_engine):
+    # Всё в одной транзакции, откатываем в конце
+    async with test_engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(bind=conn, expire_on_commit=False)
+        # Лиги общие на всех: оставляем в них только пользователей теста
+        await session.execute(delete(UserLearningProgress))
+        await session.execute(delete(LeagueWeeklyXP).where(LeagueWeeklyXP.week_start.in_((WEEK, NEXT_WEEK))))
+        try:
+            yield session
+        finally:
+            await session.close()
+            await trans.rollback()
+
+
+async def _member(db: AsyncSession, league: str, xp=None) -> int:
+    user = models.User(username=f"league-{uuid.uuid4().hex[:12]}")
+    db.add(user)
+    await db.flush()
+    db.add(UserLearningProgress(user_id=user.id, league=league))
+    if xp is not None:
+        db.add(LeagueWeeklyXP(week_start=WEEK, user_id=user.id, league=league, xp=xp))
+    await db.flush()
+    return user.id
+
+
+async def _outcomes(db: AsyncSession) -> dict[int, tuple[str, str]]:
+    """user_id → (outcome for WEEK, league now)."""
+    result = await db.execute(
+        select(LeagueWeeklyXP.user_id, LeagueWeeklyXP.outcome, UserLearningProgress.league)
+        .join(UserLearningProgress, UserLearningProgress.user_id == LeagueWeeklyXP.user_id)
+        .where(LeagueWeeklyXP.week_start == WEEK)
+    )
+    return {user_id: (outcome, league) for user_id, outcome, league in result.all()}
+
+
+@pytest.mark.asyncio
+async def test_rollover_promotes_top_and_demotes_bottom_including_idle(db):
+    best = await _member(db, "silver", 50)
+    middle = await _member(db, "silver", 30)
+    low = await _member(db, "silver", 10)
+    idle = await _member(db, "silver")  # ничего не набрал за неделю
+
+    await rollover_week(db, WEEK, promote=1, demote=1)
+
+    outcomes = await _outcomes(db)
+    assert outcomes[best] == ("promoted", "gold")
+    assert outcomes[middle] == ("stayed", "silver")
+    assert outcomes[low] == ("stayed", "silver")
+    assert outcomes[idle] == ("demoted", "bronze")
+
+
+@pytest.mark.asyncio
+async def test_counts_are_clamped_so_someone_stays(db):
+    first = await _member(db, "gold", 20)
+    second = await _member(db, "gold", 5)
+    only_bronze = await _member(db, "bronze")
+    top = await _member(db, "diamond", 100)
+
+    await rollover_week(db, WEEK, promote=10, demote=10)
+
+    outcomes = await _outcomes(db)
+    assert outcomes[first] == ("promoted", "platinum")
+    assert outcomes[second] == ("stayed", "gold")
+    assert outcomes[only_bronze] == ("stayed", "bronze")
+    assert outcomes[top] == ("stayed", "diamond")
+
+
+@pytest.mark.asyncio
+async def test_rerun_is_harmless_and_later_weeks_follow_the_new_league(db):
+    best = await _member(db, "silver", 50)
+    middle = await _member(db, "silver", 20)
+    idle = await _member(db, "silver")
+    db.add(LeagueWeeklyXP(week_start=NEXT_WEEK, user_id=best, league="silver", xp=15))
+    await db.flush()
+
+    first = await rollover_week(db, WEEK, promote=1, demote=1)
+    latecomer = await _member(db, "silver")  # пришёл после закрытия недели
+    second = await rollover_week(db, WEEK, promote=1, demote=1)
+
+    assert first == second == {"promoted": 1, "stayed": 1, "demoted": 1}
+    outcomes = await _outcomes(db)
+    assert outcomes[best] == ("promoted", "gold")
+    assert outcomes[middle] == ("stayed", "silver")
+    assert outcomes[idle] == ("demoted", "bronze")
+    assert latecomer not in outcomes
+    later = await db.scalar(
+        select(LeagueWeeklyXP.league).where(
+            LeagueWeeklyXP.week_start == NEXT_WEEK, LeagueWeeklyXP.user_id == best
+        )
+    )
+    assert later == "gold"
@@ -29,7 +29,19 @@ async def test_nearby_pois(client: AsyncClient):
     lat = 55.7539
     lon = 37.6208
     
-    response = await client.get(f"/api/v1/pois/?latitude={lat}&longitude={lon}&radius=1000")
+    response = await client.get(f"/api/v1/pois/?latitude={lat}&longitude={lon}&radius_m=1000")
     assert response.status_code == 200
     data = response.json()
     assert isinstance(data, list)
+    distances = [p["distance_m"] for p in data]
+    assert all(d <= 1000 for d in distances)
+    assert distances == sorted(distances)
+
+@pytest.mark.asyncio
+async def test_poi_summary_projection(client: AsyncClient):
+    response = await client.get("/api/v1/pois/?fields=summary")
+    assert response.status_code == 200
+    for poi in response.json():
+        assert "full_article" not in poi
+        assert "photos" not in poi
+        assert {"id", "title", "latitude", "longitude", "thumbnail_url"} <= poi.keys()
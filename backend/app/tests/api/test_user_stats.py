@@ -0,0 +1,64 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.user_stats import reconcile_user_stats
+from app.models.user_stats import UserStats
+
+
+@pytest.fixture(scope="function")
+async def db(test_engine):
+    # reconcile_user_stats делает commit — он закрывает только savepoint,
+    # внешняя транзакция откатывается в конце
+    async with test_engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(
+            bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint"
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await trans.rollback()
+
+
+async def _user(db: AsyncSession, route_id: int, *, stored: int) -> int:
+    """User with 3 checked-in points of history but ``stored`` in user_stats."""
+    user = models.User(username=f"stats-{uuid.uuid4().hex[:12]}")
+    db.add(user)
+    await db.flush()
+    db.add(models.UserProgress(
+        user_id=user.id, route_id=route_id, status="completed", completed_points_count=3,
+    ))
+    db.add(UserStats(user_id=user.id, checked_in_points=stored, completed_routes=0, correct_quizzes=0))
+    await db.flush()
+    return user.id
+
+
+async def _stats(db: AsyncSession, user_ids) -> dict[int, tuple[int, int]]:
+    result = await db.execute(
+        select(UserStats.user_id, UserStats.checked_in_points, UserStats.completed_routes)
+        .where(UserStats.user_id.in_(list(user_ids)))
+        .execution_options(populate_existing=True)
+    )
+    return {user_id: (points, routes) for user_id, points, routes in result.all()}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_only_touches_the_given_users(db):
+    route = models.Route(title=f"stats-{uuid.uuid4().hex[:8]}")
+    db.add(route)
+    await db.flush()
+    drifted = [await _user(db, route.id, stored=99) for _ in range(2)]
+    others = [await _user(db, route.id, stored=42) for _ in range(2)]
+
+    written = await reconcile_user_stats(db, drifted)
+
+    assert written == len(drifted)
+    stats = await _stats(db, drifted + others)
+    assert all(stats[user_id] == (3, 1) for user_id in drifted)
+    # Не пересчитанные пользователи остались со своими (неверными) значениями
+    assert all(stats[user_id] == (42, 0) for user_id in others)
@@ -57,3 +57,46 @@ async def test_update_user_me(client: AsyncClient):
     assert response.status_code == 200
     data = response.json()
     assert data["bio"] == new_bio
+
+@pytest.mark.asyncio
+async def test_search_users_ranking_and_friend_flag(client: AsyncClient, test_engine):
+    import uuid
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app import models
+
+    base = f"zq{uuid.uuid4().hex[:8]}"
+    ids = {}
+    for name in (f"me_{base}", base, f"{base}_x", f"a_{base}"):
+        resp = await client.post(
+            "/api/v1/register",
+            json={"email": f"{name}@example.com", "username": name, "password": "password"},
+        )
+        ids[name] = resp.json()["id"]
+    login_resp = await client.post(
+        "/api/v1/login/access-token",
+        data={"username": f"me_{base}", "password": "password"}
+    )
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+
+    async with AsyncSession(test_engine) as session:
+        session.add(models.Friendship(user_id=ids[f"me_{base}"], friend_id=ids[f"a_{base}"]))
+        await session.commit()
+
+    # Триграммы: точное совпадение, затем префикс, затем подстрока
+    response = await client.get(f"/api/v1/profile/search?q={base.upper()}", headers=headers)
+    assert response.status_code == 200
+    found = [user for user in response.json() if user["id"] in ids.values()]
+    assert [user["username"] for user in found] == [base, f"{base}_x", f"a_{base}"]
+    assert [user["is_friend"] for user in found] == [False, False, True]
+
+    # Короткий запрос — только префикс
+    response = await client.get(f"/api/v1/profile/search?q={base[:2]}&limit=50", headers=headers)
+    assert response.status_code == 200
+    assert all(
+        user["username"].lower().startswith(base[:2])
+        or (user["display_name"] or "").lower().startswith(base[:2])
+        for user in response.json()
+    )
+
+    response = await client.get("/api/v1/profile/search?q=%20%20%20", headers=headers)
+    assert response.status_code == 422
@@ -0,0 +1,29 @@
+from app.core.achievements import AchievementCatalogue, CachedAchievement
+
+
+def _ach(id, condition_type, value):
+    return CachedAchievement(id, f"a{id}", "", "", "Award", 10, condition_type, value)
+
+
+def _catalogue():
+    catalogue = AchievementCatalogue()
+    catalogue.rebuild([
+        _ach(1, "points", 1), _ach(2, "points", 10), _ach(3, "points", 50),
+        _ach(4, "routes", 1), _ach(5, "points", 10),
+    ])
+    return catalogue
+
+
+def test_reached_thresholds_without_previous():
+    catalogue = _catalogue()
+    assert [a.id for a in catalogue.crossed("points", 10)] == [1, 2, 5]
+    assert catalogue.crossed("points", 0) == []
+    assert catalogue.crossed("quizzes", 100) == []
+
+
+def test_only_thresholds_crossed_since_previous():
+    catalogue = _catalogue()
+    assert [a.id for a in catalogue.crossed("points", 10, previous=9)] == [2, 5]
+    assert catalogue.crossed("points", 11, previous=10) == []
+    assert [a.id for a in catalogue.crossed("points", 60, previous=0)] == [1, 2, 5, 3]
+    assert [a.id for a in catalogue.crossed("routes", 1, previous=0)] == [4]
@@ -0,0 +1,87 @@
+from app.core.cache_bus import CACHE_BUS_CHANNEL, MAX_PAYLOAD_BYTES, CacheBus
+from app.core.pg_listener import PGListener
+
+
+def _deliver_all(listener: PGListener, *buses: CacheBus) -> None:
+    """Play queued NOTIFYs back to every listener, like Postgres would."""
+    while not listener._outbox.empty():
+        channel, payload = listener._outbox.get_nowait()
+        for bus in buses:
+            bus._listener._dispatch(None, 1, channel, payload)
+
+
+def test_publish_reaches_other_processes_only():
+    shared = PGListener()
+    here, there = CacheBus(shared), CacheBus(PGListener())
+    seen_here, seen_there = [], []
+    here.subscribe("settings", seen_here.append)
+    there.subscribe("settings", seen_there.append)
+
+    here.publish("settings", key="AI_MODEL")
+    _deliver_all(shared, here, there)
+
+    assert seen_here == []
+    assert seen_there == [{"key": "AI_MODEL"}]
+    assert here.stats()["published"] == 1 and there.stats()["received"] == 1
+
+
+def test_unknown_kind_and_failing_handler_are_ignored():
+    bus = CacheBus(PGListener())
+    calls = []
+    bus.subscribe("route_cache", lambda data: 1 / 0)
+    bus.subscribe("route_cache", calls.append)
+
+    bus._on_message('{"origin": "other", "kind": "nope", "data": {}}')
+    bus._on_message('{"origin": "other", "kind": "route_cache", "data": {}}')
+
+    assert calls == [{}]
+    assert CACHE_BUS_CHANNEL in bus._listener.stats()["channels"]
+
+
+def test_oversized_payload_becomes_a_resync():
+    shared = PGListener()
+    here, there = CacheBus(shared), CacheBus(PGListener())
+    seen, resynced = [], []
+    there.subscribe("user", seen.append, resync=lambda: resynced.append("user"))
+
+    here.publish("user", ids=list(range(MAX_PAYLOAD_BYTES)))
+    channel, payload = shared._outbox.get_nowait()
+    assert len(payload.encode()) < MAX_PAYLOAD_BYTES
+    there._listener._dispatch(None, 1, channel, payload)
+
+    assert seen == []
+    assert resynced == ["user"]
+    assert here.stats()["oversized"] == 1
+
+
+def test_reconnect_resyncs_every_cache():
+    listener = PGListener()
+    bus = CacheBus(listener)
+    resynced = []
+    bus.subscribe("route_cache", lambda data: None, resync=lambda: resynced.append("route_cache"))
+    bus.subscribe("settings", lambda data: None, resync=lambda: resynced.append("settings"))
+    bus.subscribe("user_event", lambda data: None)
+
+    listener._run_connect_hooks()
+
+    assert sorted(resynced) == ["route_cache", "settings"]
+
+
+async def test_publish_in_notifies_within_the_session():
+    class Session:
+        def __init__(self):
+            self.executed = []
+
+        async def execute(self, statement, params):
+            self.executed.append((str(statement), params))
+
+    bus, db, seen = CacheBus(PGListener()), Session(), []
+    bus.subscribe("cosmetic_rules", seen.append)
+
+    await bus.publish_in(db, "cosmetic_rules")
+
+    (statement, params), = db.executed
+    assert "pg_notify" in statement and params["channel"] == CACHE_BUS_CHANNEL
+    # Так же, как его доставит Postgres после commit
+    bus._on_message(params["payload"].replace(bus.origin, "seed"))
+    assert seen == [{}]
@@ -0,0 +1,37 @@
+from app.core.cosmetics import CosmeticRules, UnlockableItem
+
+
+def _item(kind, id):
+    return UnlockableItem(kind, id, f"{kind}{id}", "common")
+
+
+def _rules():
+    rules = CosmeticRules()
+    rules.rebuild([
+        (_item("title", 1), "level", "5"),
+        (_item("frame", 1), "level", "2"),
+        (_item("badge", 1), "achievement", "first_step"),
+        (_item("title", 2), "achievement", "first_step"),
+        (_item("title", 3), "level", "oops"),
+        (_item("badge", 2), "special", "x"),
+        (_item("frame", 2), "level", None),
+    ])
+    return rules
+
+
+def test_level_rules_are_thresholds():
+    rules = _rules()
+    assert rules.unlockable(1, []) == []
+    assert rules.unlockable(2, []) == [_item("frame", 1)]
+    assert rules.unlockable(10, []) == [_item("frame", 1), _item("title", 1)]
+
+
+def test_achievement_rules_by_code():
+    rules = _rules()
+    assert rules.unlockable(1, ["first_step", "unknown"]) == [_item("badge", 1), _item("title", 2)]
+
+
+def test_unlockable_does_not_mutate_index():
+    rules = _rules()
+    rules.unlockable(10, ["first_step"])
+    assert rules.unlockable(10, []) == [_item("frame", 1), _item("title", 1)]
@@ -0,0 +1,104 @@
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.db import session
+from app.db.session import DBStats, TimedQueuePool, _instrument
+
+
+class FakePool:
+    def size(self):
+        return 5
+
+    def checkedout(self):
+        return 2
+
+    def checkedin(self):
+        return 3
+
+    def overflow(self):
+        return -3
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    fresh = DBStats()
+    monkeypatch.setattr(session, "db_stats", fresh)
+    return fresh
+
+
+def test_snapshot_reports_pool_and_wait_counters():
+    stats = DBStats()
+    assert stats.snapshot(SimpleNamespace(pool=FakePool()))["avg_wait_ms"] == 0.0
+
+    stats.record_wait(0.010)
+    stats.record_wait(0.030)
+    snapshot = stats.snapshot(SimpleNamespace(pool=FakePool()))
+    assert snapshot["checkouts"] == 2
+    assert snapshot["avg_wait_ms"] == 20.0
+    assert snapshot["max_wait_ms"] == 30.0
+    assert (snapshot["pool_size"], snapshot["checked_out"], snapshot["checked_in"]) == (5, 2, 3)
+
+
+def test_pool_checkout_wait_is_recorded(monkeypatch, stats):
+    def slow_get(pool):
+        time.sleep(0.02)
+        return "connection"
+
+    monkeypatch.setattr(AsyncAdaptedQueuePool, "_do_get", slow_get)
+    pool = TimedQueuePool.__new__(TimedQueuePool)
+
+    assert pool._do_get() == "connection"
+    assert stats.checkouts == 1
+    assert stats.max_wait_seconds >= 0.02
+
+
+def test_pool_timeout_still_counts_the_wait(monkeypatch, stats):
+    def exhausted(pool):
+        raise TimeoutError("QueuePool limit reached")
+
+    monkeypatch.setattr(AsyncAdaptedQueuePool, "_do_get", exhausted)
+    pool = TimedQueuePool.__new__(TimedQueuePool)
+
+    with pytest.raises(TimeoutError):
+        pool._do_get()
+    assert stats.checkouts == 1
+
+
+def _instrumented_engine():
+    engine = create_engine("sqlite://")
+    _instrument(SimpleNamespace(sync_engine=engine))
+    return engine
+
+
+def test_statement_over_threshold_is_logged_as_json(monkeypatch, stats, caplog):
+    monkeypatch.setattr(session.settings, "DB_SLOW_QUERY_MS", 0.0)
+    engine = _instrumented_engine()
+
+    with caplog.at_level(logging.WARNING, logger="app.db.slow_query"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT\n    1"))
+
+    assert stats.slow_queries == 1
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["event"] == "slow_query"
+    assert record["statement"] == "SELECT 1"
+    assert record["executemany"] is False
+    assert record["duration_ms"] >= 0
+
+
+def test_fast_statement_is_not_logged(monkeypatch, stats, caplog):
+    monkeypatch.setattr(session.settings, "DB_SLOW_QUERY_MS", 60_000.0)
+    engine = _instrumented_engine()
+
+    with caplog.at_level(logging.WARNING, logger="app.db.slow_query"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    assert stats.slow_queries == 0
+    assert not caplog.records
@@ -0,0 +1,22 @@
+import pytest
+
+from app.core.events import QUEUE_SIZE, UserEventBroker
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_only_that_users_streams():
+    broker = UserEventBroker()
+    async with broker.subscribe(1) as mine, broker.subscribe(2) as other:
+        broker.publish(1, "time_photo", {"id": 7})
+        assert mine.get_nowait() == ("time_photo", {"id": 7})
+        assert other.empty()
+    assert broker.stats() == {"users": 0, "connections": 0}
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_instead_of_blocking():
+    broker = UserEventBroker()
+    async with broker.subscribe(1) as queue:
+        for i in range(QUEUE_SIZE + 5):
+            broker.publish(1, "time_photo", {"id": i})
+        assert queue.qsize() == QUEUE_SIZE
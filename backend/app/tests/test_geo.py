@@ -0,0 +1,21 @@
+import numpy as np
+
+from app.core.geo import distance_matrix, distances_from, haversine_m, polyline_length_m, walking_minutes
+
+LATS = [55.7539, 55.7601, 55.7446]
+LONS = [37.6208, 37.6186, 37.6055]
+
+
+def test_distance_matrix_matches_scalar():
+    matrix = distance_matrix(LATS, LONS, LATS, LONS)
+    expected = [[haversine_m(a, b, c, d) for c, d in zip(LATS, LONS)] for a, b in zip(LATS, LONS)]
+    assert np.allclose(matrix, expected)
+    assert np.allclose(distances_from(LATS[0], LONS[0], LATS, LONS), expected[0])
+
+
+def test_polyline_length_sums_legs():
+    legs = haversine_m(LATS[0], LONS[0], LATS[1], LONS[1]) + haversine_m(LATS[1], LONS[1], LATS[2], LONS[2])
+    assert np.isclose(polyline_length_m(LATS, LONS), legs)
+    assert polyline_length_m(LATS[:1], LONS[:1]) == 0.0
+    assert walking_minutes(0) == 0
+    assert walking_minutes(76) == 2
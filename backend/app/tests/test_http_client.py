@@ -0,0 +1,51 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.http_client import HTTPClientRegistry, ProviderConfig
+
+
+@pytest.mark.asyncio
+async def test_requests_are_counted_per_provider():
+    registry = HTTPClientRegistry({"test": ProviderConfig(max_concurrency=2)})
+    provider = registry.get("test")
+    assert registry.get("test") is provider
+    provider._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+    )
+
+    resp = await provider.get("https://example.test/ping")
+    assert resp.json() == {"ok": True}
+    stats = registry.stats()["test"]
+    assert stats["requests"] == 1
+    assert stats["errors"] == 0
+    assert stats["in_flight"] == 0
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_not_left_in_waiting():
+    registry = HTTPClientRegistry({"test": ProviderConfig(max_concurrency=1)})
+    provider = registry.get("test")
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return httpx.Response(200)
+
+    provider._client = httpx.AsyncClient(transport=httpx.MockTransport(slow))
+    holder = asyncio.create_task(provider.get("https://example.test/slow"))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(provider.get("https://example.test/queued"))
+    await asyncio.sleep(0)
+    assert provider.stats()["waiting"] == 1
+
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert provider.stats()["waiting"] == 0
+
+    release.set()
+    await holder
+    assert provider.stats()["in_flight"] == 0
+    await registry.aclose()
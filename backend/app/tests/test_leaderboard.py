@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core import leaderboard as leaderboard_module
+from app.core import user_cache as user_cache_module
+from app.core.leaderboard import MAX_PUBLISHED_CHANGES, Leaderboard
+
+
+def _board():
+    board = Leaderboard()
+    board.rebuild([(1, 100), (2, 300), (3, 200), (4, 200), (5, 0)])
+    return board
+
+
+def test_rank_orders_by_xp_then_id():
+    board = _board()
+    assert [board.rank(user_id) for user_id in (2, 3, 4, 1, 5)] == [1, 2, 3, 4, 5]
+    assert board.rank(99) is None
+
+
+def test_keyset_pages():
+    board = _board()
+    first = board.page(2)
+    assert first == [(1, 2, 300.0), (2, 3, 200.0)]
+    _, last_id, last_xp = first[-1]
+    assert board.page(2, after=(last_xp, last_id)) == [(3, 4, 200.0), (4, 1, 100.0)]
+    assert board.page(2, after=(0.0, 5)) == []
+
+
+def test_around_is_clamped_at_the_top():
+    board = _board()
+    assert [user_id for _, user_id, _ in board.around(3, 1)] == [2, 3, 4]
+    assert [user_id for _, user_id, _ in board.around(2, 2)] == [2, 3, 4]
+    assert board.around(99, 2) == []
+
+
+def test_incremental_updates():
+    board = _board()
+    board.set(5, 250)
+    assert board.rank(5) == 2 and board.rank(3) == 3
+    board.set(2, None)
+    assert board.rank(2) is None and board.rank(5) == 1
+    board.set(6, 1000)
+    assert board.page(1) == [(1, 6, 1000.0)]
+    assert len(board) == 5
+
+
+def test_large_commit_publishes_a_full_reload(monkeypatch):
+    published = []
+    bus = SimpleNamespace(publish=lambda kind, **data: published.append((kind, data)))
+    monkeypatch.setattr(leaderboard_module, "cache_bus", bus)
+    monkeypatch.setattr(user_cache_module, "cache_bus", bus)
+    engine = create_engine("sqlite://")
+    models.User.__table__.create(engine)
+
+    def commit_users(first_id, count):
+        with Session(engine) as session:
+            session.add_all(
+                models.User(id=i, username=f"u{i}", xp=float(i), is_active=True, show_on_leaderboard=True)
+                for i in range(first_id, first_id + count)
+            )
+            session.commit()
+
+    commit_users(1, 2)
+    assert ("leaderboard", {"changes": [(1, 1.0), (2, 2.0)]}) in published
+    assert ("user", {"ids": [1, 2]}) in published
+
+    published.clear()
+    commit_users(10, MAX_PUBLISHED_CHANGES + user_cache_module.MAX_PUBLISHED_IDS)
+    assert ("leaderboard", {"changes": None}) in published
+    assert ("user", {"ids": None}) in published
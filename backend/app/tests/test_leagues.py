@@ -0,0 +1,24 @@
+from datetime import date, datetime, timezone
+
+from app.core.leagues import FILL_IDLE_MEMBERS_SQL, MARK_OUTCOMES_SQL, _shift_case, week_start
+
+
+def test_week_starts_on_monday_utc():
+    assert week_start(datetime(2026, 10, 17, 23, 0, tzinfo=timezone.utc)) == date(2026, 10, 12)
+    assert week_start(datetime(2026, 10, 12, 0, 0, tzinfo=timezone.utc)) == date(2026, 10, 12)
+
+
+def test_league_shift_is_clamped():
+    up = _shift_case("league", 1)
+    down = _shift_case("league", -1)
+    assert "WHEN 'bronze' THEN 'silver'" in up
+    assert "WHEN 'diamond' THEN 'diamond'" in up
+    assert "WHEN 'silver' THEN 'bronze'" in down
+    assert "WHEN 'bronze' THEN 'bronze'" in down
+
+
+def test_idle_members_are_ranked_and_counts_capped():
+    assert "FROM user_learning_progress p" in FILL_IDLE_MEMBERS_SQL
+    assert "outcome IS NULL" in FILL_IDLE_MEMBERS_SQL  # закрытую неделю не дополняем
+    assert "LEAST(:promote, size / 2)" in MARK_OUTCOMES_SQL
+    assert "LEAST(:demote, r.size - r.promote_n - 1)" in MARK_OUTCOMES_SQL
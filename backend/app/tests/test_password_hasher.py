@@ -0,0 +1,46 @@
+import pytest
+from passlib.context import CryptContext
+
+from app.core import security
+from app.core.security import PasswordHasher, PasswordHasherBusy
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_off_loop():
+    hasher = PasswordHasher(workers=1, max_queue=4)
+    try:
+        hashed = await hasher.hash("secret")
+        assert await hasher.verify_and_update("secret", hashed) == (True, None)
+        assert (await hasher.verify_and_update("wrong", hashed))[0] is False
+        assert (await hasher.verify_and_update("secret", None))[0] is False
+        assert hasher.stats()["completed"] == 4
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_legacy_hash_is_upgraded():
+    legacy = CryptContext(schemes=["bcrypt"]).hash("secret", rounds=4)
+    hasher = PasswordHasher(workers=1, max_queue=4)
+    try:
+        ok, new_hash = await hasher.verify_and_update("secret", legacy)
+        assert ok and new_hash
+        assert f"${security.settings.BCRYPT_ROUNDS:02d}$" in new_hash
+        assert hasher.stats()["rehashed"] == 1
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_queue_overflow_is_rejected(monkeypatch):
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    monkeypatch.setattr(security.pwd_context, "hash", lambda password: "x")
+    try:
+        hasher.in_flight = 2  # один в работе, один в очереди
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash("secret")
+        assert hasher.stats()["rejected"] == 1
+        hasher.in_flight = 0
+        assert await hasher.hash("secret") == "x"
+    finally:
+        hasher.shutdown()
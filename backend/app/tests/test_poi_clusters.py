@@ -0,0 +1,40 @@
+from app.core.poi_clusters import MAX_CLUSTER_ZOOM, POIClusterIndex, project
+from app.core.poi_index import IndexedPOI
+
+POINTS = [
+    IndexedPOI(1, "Red Square", 55.7539, 37.6208),
+    IndexedPOI(2, "Bolshoi Theatre", 55.7601, 37.6186),
+    IndexedPOI(3, "Christ the Saviour", 55.7446, 37.6055),
+    IndexedPOI(4, "VDNKh", 55.8294, 37.6330),
+]
+
+
+def _tile_of(poi: IndexedPOI, z: int) -> tuple[int, int]:
+    x, y = project([poi.latitude], [poi.longitude])
+    return int(x[0] * (1 << z)), int(y[0] * (1 << z))
+
+
+def test_low_zoom_clusters_everything():
+    index = POIClusterIndex()
+    index.build(POINTS)
+    features = index.tile(0, 0, 0)
+    assert len(features) == 1
+    assert features[0].count == len(POINTS)
+    assert features[0].id is None
+
+
+def test_counts_preserved_at_every_zoom():
+    index = POIClusterIndex()
+    index.build(POINTS)
+    for z in range(MAX_CLUSTER_ZOOM + 1):
+        tiles = {_tile_of(p, z) for p in POINTS}
+        assert sum(f.count for t in tiles for f in index.tile(z, *t)) == len(POINTS)
+
+
+def test_high_zoom_returns_single_points():
+    index = POIClusterIndex()
+    index.build(POINTS)
+    z = MAX_CLUSTER_ZOOM + 2
+    features = index.tile(z, *_tile_of(POINTS[0], z))
+    assert [(f.id, f.count) for f in features] == [(1, 1)]
+    assert index.tile(z, 0, 0) == []
@@ -0,0 +1,34 @@
+from app.core.geo import haversine_m
+from app.core.poi_index import IndexedPOI, POIGridIndex
+
+
+def _index() -> POIGridIndex:
+    index = POIGridIndex()
+    index.rebuild([
+        IndexedPOI(1, "Red Square", 55.7539, 37.6208),
+        IndexedPOI(2, "Bolshoi Theatre", 55.7601, 37.6186),
+        IndexedPOI(3, "Christ the Saviour", 55.7446, 37.6055),
+        IndexedPOI(4, "VDNKh", 55.8294, 37.6330),
+    ])
+    return index
+
+
+def test_within_radius_sorted_by_distance():
+    index = _index()
+    hits = index.within(55.7539, 37.6208, 2000)
+    assert [poi.id for poi, _ in hits] == [1, 2, 3]
+    assert hits[0][1] == 0
+
+
+def test_nearest_matches_brute_force():
+    index = _index()
+    lat, lon = 55.80, 37.63
+    expected = sorted(index.all(), key=lambda p: haversine_m(lat, lon, p.latitude, p.longitude))
+    assert [poi.id for poi, _ in index.nearest(lat, lon, 2)] == [p.id for p in expected[:2]]
+
+
+def test_remove_drops_point():
+    index = _index()
+    index.remove(1)
+    assert index.get(1) is None
+    assert [poi.id for poi, _ in index.within(55.7539, 37.6208, 100)] == []
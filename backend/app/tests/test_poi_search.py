@@ -0,0 +1,7 @@
+from app.api.v1.endpoints.pois import _MARK_START, _MARK_STOP, _highlight
+
+
+def test_highlight_escapes_text_but_keeps_marks():
+    text = f"<script>x</script> {_MARK_START}Храм{_MARK_STOP} Христа"
+    assert _highlight(text) == "&lt;script&gt;x&lt;/script&gt; <mark>Храм</mark> Христа"
+    assert _highlight(None) is None
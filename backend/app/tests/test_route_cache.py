@@ -0,0 +1,53 @@
+import pytest
+
+from app.core.route_cache import RouteCatalogueCache, etag_matches
+
+
+def test_etag_matches_handles_lists_and_weak_tags():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+@pytest.mark.asyncio
+async def test_build_once_until_invalidated():
+    cache = RouteCatalogueCache()
+    calls = []
+
+    async def build() -> bytes:
+        calls.append(1)
+        return b"[]"
+
+    first = await cache.get_or_build((0, 100), build)
+    assert await cache.get_or_build((0, 100), build) == first
+    assert len(calls) == 1
+    cache.invalidate()
+    await cache.get_or_build((0, 100), build)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_result_not_stored_if_invalidated_mid_build():
+    cache = RouteCatalogueCache()
+
+    async def build() -> bytes:
+        cache.invalidate()
+        return b"[]"
+
+    await cache.get_or_build("k", build)
+    assert cache._entries == {}
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_page_is_evicted():
+    cache = RouteCatalogueCache(max_entries=2)
+
+    async def build() -> bytes:
+        return b"[]"
+
+    await cache.get_or_build((0, 100), build)
+    await cache.get_or_build((100, 100), build)
+    await cache.get_or_build((0, 100), build)
+    await cache.get_or_build((200, 100), build)
+    assert list(cache._entries) == [(0, 100), (200, 100)]
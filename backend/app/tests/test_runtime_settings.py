@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.core import runtime_settings
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _CountingDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return _Result(self.rows)
+
+
+class _BlockingDB(_CountingDB):
+    """Returns the rows current when the query *started*, after ``release``."""
+
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def execute(self, statement):
+        rows = self.rows
+        self.queries += 1
+        self.started.set()
+        await self.release.wait()
+        return _Result(rows)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_snapshot(monkeypatch):
+    monkeypatch.setattr(runtime_settings, "_snapshot", runtime_settings.MappingProxyType({}))
+    monkeypatch.setattr(runtime_settings, "_loaded_at", None)
+    monkeypatch.setattr(runtime_settings, "_refresh_task", None)
+    monkeypatch.setattr(runtime_settings, "_refresh_again", False)
+
+
+@pytest.mark.asyncio
+async def test_whole_table_loaded_once_then_served_from_snapshot():
+    db = _CountingDB([("AI_MODEL", "qwen"), ("TIME_MACHINE_MODE", "full"), ("KIE_API_KEY", "")])
+
+    assert await runtime_settings.get_setting(db, "AI_MODEL") == "qwen"
+    assert await runtime_settings.get_setting(db, "TIME_MACHINE_MODE") == "full"
+    assert await runtime_settings.get_setting(db, "TIME_MACHINE_PROVIDER") == runtime_settings._env_fallback("TIME_MACHINE_PROVIDER")
+    assert db.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_values_fall_back_to_env(monkeypatch):
+    monkeypatch.setattr(runtime_settings.env_settings, "AI_MODEL", "from-env")
+    db = _CountingDB([("AI_MODEL", "")])
+
+    assert await runtime_settings.get_setting(db, "AI_MODEL") == "from-env"
+    with pytest.raises(TypeError):
+        runtime_settings._snapshot["AI_MODEL"] = "x"
+
+
+@pytest.mark.asyncio
+async def test_load_started_before_local_set_is_dropped():
+    db = _BlockingDB([("AI_MODEL", "old")])
+    load = asyncio.create_task(runtime_settings.load_settings(db))
+    await db.started.wait()
+
+    runtime_settings._swap({"AI_MODEL": "new"})  # как set_setting после commit
+    db.release.set()
+
+    assert await load is False
+    assert runtime_settings._snapshot["AI_MODEL"] == "new"
+
+
+@pytest.mark.asyncio
+async def test_notify_during_refresh_triggers_another_load(monkeypatch):
+    db = _BlockingDB([("AI_MODEL", "v1")])
+
+    class _Session:
+        async def __aenter__(self):
+            return db
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(runtime_settings, "AsyncSessionLocal", _Session)
+    runtime_settings._schedule_refresh()
+    await db.started.wait()
+
+    db.rows = [("AI_MODEL", "v2")]  # другой процесс записал и прислал NOTIFY
+    runtime_settings._schedule_refresh()
+    db.release.set()
+    await runtime_settings._refresh_task
+
+    assert db.queries == 2
+    assert runtime_settings._snapshot["AI_MODEL"] == "v2"
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+
+from app.api.v1.endpoints import auth
+from app.core.pg_listener import PGListener, TELEGRAM_AUTH_CHANNEL
+
+
+def test_listener_dispatches_by_channel():
+    listener = PGListener()
+    received = []
+    listener.add_handler("a", received.append)
+    listener.add_handler("b", lambda payload: received.append("b:" + payload))
+
+    listener._dispatch(None, 1, "a", "x")
+    listener._dispatch(None, 1, "b", "y")
+    listener._dispatch(None, 1, "c", "z")
+
+    assert received == ["x", "b:y"]
+    assert listener.stats()["notifications"] == 3
+
+
+@pytest.mark.asyncio
+async def test_auth_status_wakes_on_notify(monkeypatch):
+    statuses = iter(["pending", "ready"])
+    reads = []
+
+    async def fake_read(session_id):
+        reads.append(session_id)
+        return next(statuses)
+
+    monkeypatch.setattr(auth, "_read_auth_status", fake_read)
+    monkeypatch.setattr(auth, "AUTH_STATUS_RECHECK_SECONDS", 10.0)
+
+    async def notify():
+        await asyncio.sleep(0.05)
+        auth.pg_listener._dispatch(None, 1, TELEGRAM_AUTH_CHANNEL, "s1")
+
+    started = time.monotonic()
+    result, _ = await asyncio.gather(auth.get_telegram_auth_status("s1", wait=5), notify())
+
+    assert result == {"status": "ready"}
+    assert reads == ["s1", "s1"]
+    assert time.monotonic() - started < 1.0
+    assert "s1" not in auth._auth_waiters
+
+
+@pytest.mark.asyncio
+async def test_auth_status_without_wait_reads_once(monkeypatch):
+    reads = []
+
+    async def fake_read(session_id):
+        reads.append(session_id)
+        return "pending"
+
+    monkeypatch.setattr(auth, "_read_auth_status", fake_read)
+
+    assert await auth.get_telegram_auth_status("s2", wait=0) == {"status": "pending"}
+    assert reads == ["s2"]
@@ -0,0 +1,289 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.api.v1.endpoints import time_machine as tm
+from app.core.config import settings
+from app.core.http_client import HTTPClientRegistry, ProviderConfig
+from app.models.time_photo import TimePhoto, TimePhotoJob
+from app.workers import time_machine as worker
+from app.workers import geminigen_poller as poller_module
+from app.workers.geminigen_poller import GeminiGenPoller, expire_if_stale, poll_interval
+from app.workers.time_machine import MAX_BACKOFF_SECONDS, _is_permanent, retry_delay
+
+
+def _status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://provider.test/generate")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(code, request=request))
+
+
+def test_retry_delay_grows_exponentially_and_caps():
+    base = settings.TIME_MACHINE_RETRY_BACKOFF_SECONDS
+    assert retry_delay(1) == base
+    assert retry_delay(3) == base * 4
+    assert retry_delay(50) == MAX_BACKOFF_SECONDS
+
+
+def test_client_errors_are_permanent_except_throttling():
+    assert _is_permanent(_status_error(400))
+    assert not _is_permanent(_status_error(429))
+    assert not _is_permanent(_status_error(503))
+    assert not _is_permanent(httpx.ConnectTimeout("timeout"))
+
+
+def test_poll_interval_backs_off_with_age():
+    assert poll_interval(10) < poll_interval(120) < poll_interval(900)
+
+
+def test_stale_processing_photo_is_expired_for_any_provider():
+    now = datetime(2026, 10, 17, 12, 0)
+    timeout = timedelta(minutes=settings.TIME_MACHINE_JOB_TIMEOUT_MINUTES)
+    for provider in ("geminigen", "kie"):
+        fresh = TimePhoto(provider=provider, status="processing", created_at=now - timeout / 2)
+        stale = TimePhoto(provider=provider, status="processing", created_at=now - timeout * 2)
+        assert not expire_if_stale(fresh, now)
+        assert fresh.status == "processing"
+        assert expire_if_stale(stale, now)
+        assert stale.status == "failed"
+        assert not expire_if_stale(stale, now)  # второй раз не возвращаем кристалл
+
+
+# ── Job state machine (fake sessions, no DB) ──────────────────
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return self._rows[0] if self._rows else None
+
+    def all(self):
+        return list(self._rows)
+
+
+class _Store:
+    def __init__(self, job, photo, selected=()):
+        self.objects = {TimePhotoJob: {job.id: job}, TimePhoto: {photo.id: photo}}
+        self.selected = list(selected)  # что вернёт SELECT claim/reaper
+        self.in_transaction = 0
+
+
+class _Session:
+    def __init__(self, store):
+        self.store = store
+        self.active = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._end()
+
+    def _begin(self):
+        if not self.active:
+            self.active = True
+            self.store.in_transaction += 1
+
+    def _end(self):
+        if self.active:
+            self.active = False
+            self.store.in_transaction -= 1
+
+    async def get(self, model, obj_id):
+        self._begin()
+        return self.store.objects[model].get(obj_id)
+
+    async def execute(self, statement):
+        self._begin()
+        return _Result(self.store.selected)
+
+    async def commit(self):
+        self._end()
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    job = TimePhotoJob(id=1, photo_id=10, status="queued", attempts=0,
+                       run_after=datetime.utcnow() - timedelta(seconds=1))
+    photo = TimePhoto(id=10, user_id=5, status="pending", prompt_used="prompt",
+                      original_image_url="/uploads/time_machine/a.jpg", provider="geminigen")
+    store = _Store(job, photo, selected=[job])
+    refunds, published = [], []
+
+    async def refund(db, user_id):
+        refunds.append(user_id)
+
+    async def no_setting(db, key):
+        return ""
+
+    monkeypatch.setattr(worker, "AsyncSessionLocal", lambda: _Session(store))
+    monkeypatch.setattr(worker, "get_setting", no_setting)
+    monkeypatch.setattr(tm, "_refund_crystal", refund)
+    monkeypatch.setattr(tm, "publish_photo_status", published.append)
+    return SimpleNamespace(job=job, photo=photo, store=store, refunds=refunds, published=published)
+
+
+def _provider(monkeypatch, queue, outcome):
+    async def generate(prompt, image_url, db, provider):
+        # Пока ждём провайдера, ни одна сессия не держит транзакцию
+        assert queue.store.in_transaction == 0
+        assert (prompt, provider) == ("prompt", "geminigen")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(tm, "_generate_with_provider", generate)
+
+
+async def _claim_and_process(queue):
+    job = await worker.claim_job(_Session(queue.store))
+    assert job is queue.job and job.status == "running" and job.locked_at is not None
+    await worker.process_job(job.id)
+
+
+@pytest.mark.asyncio
+async def test_claimed_job_is_submitted_without_holding_a_connection(monkeypatch, queue):
+    _provider(monkeypatch, queue, ("uuid-1", None, "processing", None))
+
+    await _claim_and_process(queue)
+
+    assert queue.job.status == "done"
+    assert (queue.photo.status, queue.photo.geminigen_uuid) == ("processing", "uuid-1")
+    assert queue.published == [queue.photo]
+    assert queue.store.in_transaction == 0
+
+
+@pytest.mark.asyncio
+async def test_transient_error_requeues_with_backoff(monkeypatch, queue):
+    _provider(monkeypatch, queue, httpx.ConnectTimeout("timeout"))
+
+    await _claim_and_process(queue)
+
+    assert (queue.job.status, queue.job.attempts) == ("queued", 1)
+    assert queue.job.run_after > datetime.utcnow()
+    assert queue.photo.status == "pending"
+    assert not queue.refunds
+
+
+@pytest.mark.asyncio
+async def test_last_attempt_fails_photo_and_refunds(monkeypatch, queue):
+    queue.job.attempts = settings.TIME_MACHINE_MAX_ATTEMPTS - 1
+    _provider(monkeypatch, queue, httpx.ConnectTimeout("timeout"))
+
+    await _claim_and_process(queue)
+
+    assert queue.job.status == "failed"
+    assert queue.photo.status == "failed"
+    assert queue.refunds == [5]
+    assert queue.published == [queue.photo]
+
+
+@pytest.mark.asyncio
+async def test_stuck_job_counts_as_an_attempt(queue):
+    queue.job.status = "running"
+    queue.job.attempts = settings.TIME_MACHINE_MAX_ATTEMPTS - 2
+
+    assert await worker.requeue_stuck_jobs(_Session(queue.store)) == 1
+    assert (queue.job.status, queue.job.attempts) == ("queued", settings.TIME_MACHINE_MAX_ATTEMPTS - 1)
+
+    queue.job.status = "running"
+    await worker.requeue_stuck_jobs(_Session(queue.store))
+    assert queue.job.status == "failed"
+    assert queue.photo.status == "failed"
+    assert queue.refunds == [5]
+
+
+@pytest.mark.asyncio
+async def test_stuck_job_already_accepted_by_provider_is_not_resubmitted(queue):
+    queue.job.status = "running"
+    queue.photo.geminigen_uuid = "uuid-1"
+
+    await worker.requeue_stuck_jobs(_Session(queue.store))
+
+    assert (queue.job.status, queue.job.attempts) == ("done", 0)
+    assert not queue.refunds
+
+
+# ── GeminiGen poller ──────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_histories_are_paged_until_every_uuid_is_found(monkeypatch):
+    size = tm.GEMINIGEN_HISTORIES_PAGE_SIZE
+    pages = {1: [f"old{i}" for i in range(size)], 2: ["target"]}
+
+    def handler(request):
+        page = int(request.url.params["page"])
+        return httpx.Response(200, json={"result": [{"uuid": u} for u in pages.get(page, [])]})
+
+    registry = HTTPClientRegistry({"geminigen": ProviderConfig()})
+    registry.get("geminigen")._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(tm, "http_clients", registry)
+
+    items, read = await tm._fetch_geminigen_histories({"old1"})
+    assert read == 1 and "old1" in items
+    items, read = await tm._fetch_geminigen_histories({"old1", "target"})
+    assert read == 2 and "target" in items
+    await registry.aclose()
+
+
+class _PollerSession:
+    def __init__(self, photos):
+        self.photos = photos
+        self.updates = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        if params is not None:
+            self.updates.append(params)
+        return _Result(self.photos)
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_poll_round_stores_next_check_and_expires_kie(monkeypatch):
+    now = datetime.utcnow()
+    timeout = timedelta(minutes=settings.TIME_MACHINE_JOB_TIMEOUT_MINUTES)
+    running = TimePhoto(id=1, user_id=1, provider="geminigen", geminigen_uuid="run",
+                        status="processing", created_at=now - timedelta(seconds=30))
+    done = TimePhoto(id=2, user_id=1, provider="geminigen", geminigen_uuid="done",
+                     status="processing", created_at=now - timedelta(seconds=30))
+    lost_kie = TimePhoto(id=3, user_id=2, provider="kie", geminigen_uuid="task",
+                         status="processing", created_at=now - timeout * 2)
+    session = _PollerSession([running, done, lost_kie])
+    published = []
+
+    async def histories(wanted, db):
+        assert wanted == {"run", "done"}
+        return {"run": {"status": 1}, "done": {"status": 2, "generate_result": "https://x/r.jpg"}}, 1
+
+    async def locked(db, key):
+        return True
+
+    monkeypatch.setattr(poller_module, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(poller_module, "try_advisory_xact_lock", locked)
+    monkeypatch.setattr(tm, "_fetch_geminigen_histories", histories)
+    monkeypatch.setattr(tm, "publish_photo_status", published.append)
+
+    poller = GeminiGenPoller()
+    await poller.poll_once()
+
+    # Следующая проверка — в БД, её увидит любой процесс, взявший блокировку
+    assert running.status == "processing"
+    assert running.next_poll_at > now
+    assert done.status == "completed"
+    assert lost_kie.status == "failed"
+    assert session.updates == [[{"uid": 2, "n": 1}]]
+    assert published == [lost_kie, done]
+    assert poller.stats()["provider_requests"] == 1
@@ -0,0 +1,57 @@
+from sqlalchemy import create_engine, inspect, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core import user_cache as user_cache_module
+from app.core.user_cache import UserCache
+
+
+def _user(user_id, **kw):
+    return models.User(id=user_id, username=f"u{user_id}", is_active=True, **kw)
+
+
+def test_hit_returns_a_new_detached_copy():
+    cache = UserCache(max_size=10, ttl_seconds=60)
+    cache.put(_user(1, xp=10.0))
+
+    first, second = cache.get(1), cache.get(1)
+    assert first is not second
+    assert first.username == "u1" and first.xp == 10.0
+    assert inspect(first).detached
+    assert cache.stats() == {"size": 1, "hits": 2, "misses": 0}
+
+
+def test_expired_and_evicted_entries_miss():
+    cache = UserCache(max_size=2, ttl_seconds=0)
+    cache.put(_user(1))
+    assert cache.get(1) is None
+
+    cache = UserCache(max_size=2, ttl_seconds=60)
+    for user_id in (1, 2):
+        cache.put(_user(user_id))
+    cache.get(1)  # 1 — самый свежий, вытесняется 2
+    cache.put(_user(3))
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+
+
+def test_flush_and_bulk_update_invalidate(monkeypatch):
+    cache = UserCache(max_size=10, ttl_seconds=60)
+    monkeypatch.setattr(user_cache_module, "user_cache", cache)
+    engine = create_engine("sqlite://")
+    models.User.__table__.create(engine)
+
+    with Session(engine) as session:
+        session.add_all([_user(1), _user(2)])
+        session.commit()
+        cache.put(session.get(models.User, 1))
+        cache.put(session.get(models.User, 2))
+
+        session.get(models.User, 1).xp = 50.0
+        session.commit()
+        assert cache.get(1) is None
+        assert cache.get(2) is not None
+
+        session.execute(update(models.User).values(chrono_crystals=9))
+        session.commit()
+        assert cache.get(2) is None
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints.profile import _like_escape, search_users
+
+
+def test_like_wildcards_are_escaped():
+    assert _like_escape("a_b%c") == "a\\_b\\%c"
+    assert _like_escape("back\\slash") == "back\\\\slash"
+    assert _like_escape("plain") == "plain"
+
+
+class _CapturingDB:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.sql = None
+
+    async def execute(self, statement):
+        self.sql = str(statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        ))
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+async def _search(q, rows=()):
+    db = _CapturingDB(rows)
+    results = await search_users(q=q, db=db, current_user=SimpleNamespace(id=1), limit=20)
+    return db.sql, results
+
+
+@pytest.mark.asyncio
+async def test_short_term_uses_prefix_only():
+    sql, _ = await _search(" Iv ")
+    assert "LIKE 'iv%%'" in sql
+    assert "LIKE '%%iv" not in sql
+    assert "similarity" not in sql
+    assert "ORDER BY lower(\"user\".username) = 'iv' DESC, length(\"user\".username)" in sql
+
+
+@pytest.mark.asyncio
+async def test_long_term_uses_trigrams_and_ranks_prefix_first():
+    sql, _ = await _search("Ivan")
+    assert "LIKE '%%ivan%%'" in sql
+    assert "(lower(\"user\".username) %% 'ivan')" in sql
+    order_by = sql[sql.index("ORDER BY"):]
+    exact = order_by.index("= 'ivan' DESC")
+    prefix = order_by.index("LIKE 'ivan%%' DESC")
+    similarity = order_by.index("similarity(")
+    assert exact < prefix < similarity
+
+
+@pytest.mark.asyncio
+async def test_whitespace_only_query_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        await _search("   ")
+    assert exc.value.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_friend_flag_comes_from_the_join():
+    row = SimpleNamespace(
+        id=2, username="ivan", display_name=None, avatar_url=None, level=3,
+        Title=None, ProfileFrame=None, is_friend=True,
+    )
+    sql, results = await _search("ivan", [row])
+    assert "friendship.id IS NOT NULL AS is_friend" in sql
+    assert "friendship.user_id = 1 AND friendship.friend_id = \"user\".id" in sql
+    assert results[0].is_friend is True
@@ -0,0 +1,115 @@
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from app import models, schemas
+from app.api.v1.endpoints import progress as progress_endpoint
+from app.core import user_stats
+
+
+class _Result:
+    def scalars(self):
+        return self
+
+    def first(self):
+        return None  # прогресса по маршруту ещё нет
+
+
+class ProgressDB:
+    """Just enough of AsyncSession for the progress endpoints."""
+
+    def __init__(self):
+        self.rows: dict[int, models.UserProgress] = {}
+
+    async def execute(self, statement):
+        return _Result()
+
+    def add(self, obj):
+        if obj.id is None:
+            obj.id = len(self.rows) + 1
+        self.rows[obj.id] = obj
+
+    async def get(self, model, obj_id):
+        return self.rows.get(obj_id)
+
+    async def delete(self, obj):
+        del self.rows[obj.id]
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+
+def _reconciled(rows) -> Counter:
+    """What RECONCILE_SQL computes from user_progress for one user."""
+    return Counter(
+        points=sum(row.completed_points_count or 0 for row in rows),
+        routes=sum(1 for row in rows if row.status == "completed"),
+    )
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    totals = Counter()
+
+    async def bump(db, user_id, *, points=0, routes=0, quizzes=0):
+        totals.update(points=points, routes=routes, quizzes=quizzes)
+
+    monkeypatch.setattr(progress_endpoint, "bump_user_stats", bump)
+    return totals
+
+
+def _assert_matches(counters, db):
+    expected = _reconciled(db.rows.values())
+    assert counters["points"] == expected["points"]
+    assert counters["routes"] == expected["routes"]
+
+
+@pytest.mark.asyncio
+async def test_progress_deltas_match_reconcile_after_create_update_delete(counters):
+    db = ProgressDB()
+    user = SimpleNamespace(id=7)
+
+    first = await progress_endpoint.create_progress(
+        db=db, current_user=user,
+        progress_in=schemas.UserProgressCreate(route_id=1, completed_points_count=2),
+    )
+    second = await progress_endpoint.create_progress(
+        db=db, current_user=user,
+        progress_in=schemas.UserProgressCreate(route_id=2, status="completed", completed_points_count=5),
+    )
+    _assert_matches(counters, db)
+
+    await progress_endpoint.update_progress(
+        db=db, current_user=user, progress_id=first.id,
+        progress_in=schemas.UserProgressUpdate(status="completed", completed_points_count=4),
+    )
+    _assert_matches(counters, db)
+
+    # Откат завершённого маршрута: счётчик маршрутов уменьшается
+    await progress_endpoint.update_progress(
+        db=db, current_user=user, progress_id=second.id,
+        progress_in=schemas.UserProgressUpdate(status="in_progress"),
+    )
+    _assert_matches(counters, db)
+
+    await progress_endpoint.delete_progress(db=db, current_user=user, progress_id=first.id)
+    _assert_matches(counters, db)
+    assert (counters["points"], counters["routes"]) == (5, 0)
+
+    await progress_endpoint.delete_progress(db=db, current_user=user, progress_id=second.id)
+    assert (counters["points"], counters["routes"]) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_zero_delta_does_not_touch_the_db():
+    class NoDB:
+        async def execute(self, statement):
+            raise AssertionError("no statement expected")
+
+    await user_stats.bump_user_stats(NoDB(), 1)
+    await user_stats.bump_user_stats(NoDB(), 1, points=0, routes=0, quizzes=0)
+
@@ -0,0 +1,84 @@
+"""
+Periodic cleanup of expired Telegram login sessions and codes.
+
+Rows older than ``TELEGRAM_AUTH_TTL_MINUTES`` are useless (every lookup
+filters them out), so they are deleted in small batches — one short
+transaction each, walking the ``created_at`` index — instead of piling up.
+Only one worker process sweeps at a time (advisory lock).
+"""
+import asyncio
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+
+from app.db.locks import AUTH_SWEEPER_LOCK, try_advisory_xact_lock
+from app.db.session import AsyncSessionLocal
+from app.models.telegram_auth import (
+    TELEGRAM_AUTH_TTL_MINUTES, TelegramAuthCode, TelegramAuthSession,
+)
+
+SWEEP_INTERVAL_SECONDS = 60.0
+BATCH_SIZE = 1000
+
+
+async def sweep_expired(model, batch_size: int = BATCH_SIZE) -> int:
+    """Delete expired rows of ``model`` batch by batch; returns the count."""
+    table = model.__table__
+    cutoff = func.now() - timedelta(minutes=TELEGRAM_AUTH_TTL_MINUTES)
+    expired_ids = (
+        select(table.c.id)
+        .where(table.c.created_at < cutoff)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(table).where(table.c.id.in_(expired_ids)))
+            await db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+class AuthSweeper:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.rounds = 0
+        self.deleted = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print(f"Auth sweeper error: {exc}")
+            await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+
+    async def sweep_once(self) -> None:
+        # Блокировка живёт, пока открыта транзакция lock_db
+        async with AsyncSessionLocal() as lock_db:
+            if not await try_advisory_xact_lock(lock_db, AUTH_SWEEPER_LOCK):
+                return
+            self.rounds += 1
+            for model in (TelegramAuthSession, TelegramAuthCode):
+                self.deleted += await sweep_expired(model)
+
+    def stats(self) -> dict:
+        return {"rounds": self.rounds, "deleted": self.deleted}
+
+
+auth_sweeper = AuthSweeper()
@@ -0,0 +1,152 @@
+"""
+Central status poller for GeminiGen generations.
+
+GeminiGen has no callback, so one loop checks every ``processing`` photo:
+one pass over the histories pages per round answers for all of them, each
+photo is re-checked on an interval that grows with its age (its
+``next_poll_at``, shared by all processes), and the round's changes are
+committed together. KIE photos are finished by its webhook;
+the loop only fails (and refunds) those whose callback never arrived
+within ``TIME_MACHINE_JOB_TIMEOUT_MINUTES``. Clients only read the DB.
+With several worker processes an advisory lock keeps rounds from
+overlapping.
+"""
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, bindparam, or_, select, update
+
+from app import models
+from app.core.config import settings
+from app.db.locks import GEMINIGEN_POLLER_LOCK, try_advisory_xact_lock
+from app.db.session import AsyncSessionLocal
+from app.models.time_photo import TimePhoto
+
+TICK_SECONDS = 2.0
+
+
+def poll_interval(age_seconds: float) -> float:
+    """Seconds until the next check: frequent at first, rarer as a job ages."""
+    base = settings.TIME_MACHINE_POLL_INTERVAL_SECONDS
+    if age_seconds < 60:
+        return base
+    if age_seconds < 300:
+        return base * 3
+    return base * 12
+
+
+def expire_if_stale(photo: TimePhoto, utcnow: datetime) -> bool:
+    """Fail a still-processing photo older than the job timeout; True if failed."""
+    timeout = timedelta(minutes=settings.TIME_MACHINE_JOB_TIMEOUT_MINUTES)
+    if photo.status != "processing" or utcnow - photo.created_at <= timeout:
+        return False
+    photo.status = "failed"
+    photo.error_message = "Generation timed out"
+    return True
+
+
+class GeminiGenPoller:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.rounds = 0
+        self.provider_requests = 0
+        self.last_due = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print(f"GeminiGen poller error: {exc}")
+            await asyncio.sleep(TICK_SECONDS)
+
+    async def poll_once(self) -> None:
+        from app.api.v1.endpoints import time_machine as tm
+
+        async with AsyncSessionLocal() as db:
+            if not await try_advisory_xact_lock(db, GEMINIGEN_POLLER_LOCK):
+                return  # раунд выполняет другой процесс
+            utcnow = datetime.utcnow()
+            timeout = timedelta(minutes=settings.TIME_MACHINE_JOB_TIMEOUT_MINUTES)
+            result = await db.execute(
+                select(TimePhoto).where(
+                    TimePhoto.status == "processing",
+                    or_(
+                        and_(
+                            TimePhoto.provider == "geminigen",
+                            TimePhoto.geminigen_uuid.isnot(None),
+                            or_(TimePhoto.next_poll_at.is_(None), TimePhoto.next_poll_at <= utcnow),
+                        ),
+                        # KIE отвечает на webhook; если callback так и не пришёл — истекаем по таймауту
+                        and_(TimePhoto.provider == "kie", TimePhoto.created_at < utcnow - timeout),
+                    ),
+                )
+            )
+            photos = result.scalars().all()
+            due = [p for p in photos if p.provider != "kie"]
+            self.last_due = len(due)
+            if not photos:
+                return
+
+            refunds: Counter[int] = Counter()
+            changed: list[TimePhoto] = []
+            for photo in photos:
+                if photo.provider == "kie" and expire_if_stale(photo, utcnow):
+                    refunds[photo.user_id] += 1
+                    changed.append(photo)
+
+            if due:
+                self.rounds += 1
+                items, pages = await tm._fetch_geminigen_histories(
+                    {p.geminigen_uuid for p in due}, db
+                )
+                self.provider_requests += pages
+
+            for photo in due:
+                item = items.get(photo.geminigen_uuid)
+                if item is not None and tm._apply_poll_result(photo, item):
+                    refunds[photo.user_id] += 1
+                elif expire_if_stale(photo, utcnow):
+                    refunds[photo.user_id] += 1
+                if photo.status == "processing":
+                    age = (utcnow - photo.created_at).total_seconds()
+                    photo.next_poll_at = utcnow + timedelta(seconds=poll_interval(age))
+                else:
+                    changed.append(photo)
+
+            if refunds:
+                users = models.User.__table__
+                await db.execute(
+                    update(users)
+                    .where(users.c.id == bindparam("uid"))
+                    .values(chrono_crystals=users.c.chrono_crystals + bindparam("n")),
+                    [{"uid": user_id, "n": n} for user_id, n in refunds.items()],
+                )
+            await db.commit()
+
+        for photo in changed:
+            tm.publish_photo_status(photo)
+
+    def stats(self) -> dict:
+        return {
+            "due": self.last_due,
+            "rounds": self.rounds,
+            "provider_requests": self.provider_requests,
+        }
+
+
+geminigen_poller = GeminiGenPoller()
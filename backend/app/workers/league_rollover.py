@@ -0,0 +1,69 @@
+"""
+Weekly league rollover.
+
+Every worker process runs this loop; a round takes an advisory lock, finds
+finished weeks that still have unranked rows (partial index
+``ix_league_weekly_xp_open``) and closes them with
+``app.core.leagues.rollover_week`` in the lock's transaction. Weeks missed while the service was
+down are caught up oldest first.
+"""
+import asyncio
+from typing import Optional
+
+from app.core.config import settings
+from app.core.leagues import pending_weeks, rollover_week, week_start
+from app.db.locks import LEAGUE_ROLLOVER_LOCK, try_advisory_xact_lock
+from app.db.session import AsyncSessionLocal
+
+CHECK_INTERVAL_SECONDS = 600.0
+
+
+class LeagueRollover:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.weeks = 0
+        self.promoted = 0
+        self.demoted = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.rollover_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print(f"League rollover error: {exc}")
+            await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+
+    async def rollover_once(self) -> None:
+        async with AsyncSessionLocal() as db:
+            # Блокировка и все недели — в одной транзакции
+            if not await try_advisory_xact_lock(db, LEAGUE_ROLLOVER_LOCK):
+                return
+            closed = {}
+            for week in await pending_weeks(db, before=week_start()):
+                closed[week] = await rollover_week(
+                    db, week, settings.LEAGUE_PROMOTE_COUNT, settings.LEAGUE_DEMOTE_COUNT
+                )
+            await db.commit()
+        for week, outcomes in closed.items():
+            self.weeks += 1
+            self.promoted += outcomes.get("promoted", 0)
+            self.demoted += outcomes.get("demoted", 0)
+            print(f"League week {week} closed: {outcomes}")
+
+    def stats(self) -> dict:
+        return {"weeks": self.weeks, "promoted": self.promoted, "demoted": self.demoted}
+
+
+league_rollover = LeagueRollover()
@@ -0,0 +1,229 @@
+"""
+Time Machine generation worker.
+
+Jobs live in ``time_photo_job``. Each worker task claims one at a time with
+``FOR UPDATE SKIP LOCKED``, so any number of tasks and processes can share
+the queue. A job submits the photo to its provider; afterwards the photo
+stays ``processing`` until the GeminiGen poller (workers/geminigen_poller.py)
+or the KIE webhook finalises it. No DB connection is held while the
+provider call runs: the job is read in one short session and its result
+written in another. Transient failures are retried with exponential
+backoff; permanent or exhausted jobs fail the photo and refund the crystal.
+A job left ``running`` by a crashed worker counts as a failed attempt.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+import httpx
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.runtime_settings import get_setting
+from app.db.session import AsyncSessionLocal
+from app.models.time_photo import TimePhoto, TimePhotoJob
+
+IDLE_SLEEP_SECONDS = 2.0
+STUCK_JOB_ERROR = "Worker stopped while the job was running"
+STUCK_CHECK_SECONDS = 60.0
+MAX_BACKOFF_SECONDS = 300.0
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before retry number ``attempts`` (1-based)."""
+    return min(settings.TIME_MACHINE_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+
+
+def _is_permanent(exc: Exception) -> bool:
+    # 4xx (кроме таймаута и rate limit) — повтор не поможет
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return 400 <= code < 500 and code not in (408, 429)
+    return isinstance(exc, FileNotFoundError)
+
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"API error: {exc.response.status_code} — {exc.response.text[:300]}"
+    return f"API request failed: {exc}"
+
+
+def _requeue(job: TimePhotoJob, delay: float) -> None:
+    job.status = "queued"
+    job.locked_at = None
+    job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+
+
+async def claim_job(db: AsyncSession) -> Optional[TimePhotoJob]:
+    """Take the next due job, skipping rows other workers have locked."""
+    result = await db.execute(
+        select(TimePhotoJob)
+        .where(TimePhotoJob.status == "queued", TimePhotoJob.run_after <= datetime.utcnow())
+        .order_by(TimePhotoJob.run_after)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = result.scalars().first()
+    if job is not None:
+        job.status = "running"
+        job.locked_at = datetime.utcnow()
+        await db.commit()
+    return job
+
+
+async def requeue_stuck_jobs(db: AsyncSession) -> int:
+    """Retry (or fail) jobs abandoned by a crashed/restarted worker."""
+    from app.api.v1.endpoints import time_machine as tm
+
+    cutoff = datetime.utcnow() - timedelta(minutes=settings.TIME_MACHINE_STUCK_JOB_MINUTES)
+    result = await db.execute(
+        select(TimePhotoJob)
+        .where(TimePhotoJob.status == "running", TimePhotoJob.locked_at < cutoff)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = result.scalars().all()
+    failed: list[TimePhoto] = []
+    for job in jobs:
+        photo = await db.get(TimePhoto, job.photo_id)
+        if photo is None or photo.geminigen_uuid or photo.status in ("completed", "failed"):
+            # Провайдер уже принял фото: повторная отправка списала бы второй раз
+            job.status = "done"
+            continue
+        await _handle_error(db, job, photo, RuntimeError(STUCK_JOB_ERROR))
+        if photo.status == "failed":
+            failed.append(photo)
+    await db.commit()
+    for photo in failed:
+        tm.publish_photo_status(photo)
+    return len(jobs)
+
+
+async def _load_request(job_id: int) -> Optional[tuple[str, str, str]]:
+    """``(prompt, image_url, provider)`` for a running job, or ``None`` if nothing to do."""
+    async with AsyncSessionLocal() as db:
+        job = await db.get(TimePhotoJob, job_id)
+        if job is None:
+            return None
+        photo = await db.get(TimePhoto, job.photo_id)
+        if photo is None or photo.status in ("completed", "failed"):
+            job.status = "done"
+            await db.commit()
+            return None
+        # Ключи провайдера — в snapshot заранее, чтобы вызов не трогал БД
+        await get_setting(db, "TIME_MACHINE_PROVIDER")
+        request = (photo.prompt_used, photo.original_image_url, photo.provider)
+        await db.commit()
+    return request
+
+
+def _record_submission(job: TimePhotoJob, photo: TimePhoto, outcome: tuple) -> None:
+    provider_uuid, result_url, photo_status, _ = outcome
+    photo.geminigen_uuid = provider_uuid or None
+    photo.status = photo_status
+    if photo_status == "completed":
+        photo.result_image_url = result_url
+        photo.completed_at = datetime.utcnow()
+    job.status = "done"
+
+
+async def _handle_error(db: AsyncSession, job: TimePhotoJob, photo: TimePhoto, exc: Exception) -> None:
+    from app.api.v1.endpoints import time_machine as tm
+
+    job.attempts += 1
+    job.last_error = str(exc)[:500]
+    if _is_permanent(exc) or job.attempts >= settings.TIME_MACHINE_MAX_ATTEMPTS:
+        photo.status = "failed"
+        photo.error_message = _error_message(exc)
+        await tm._refund_crystal(db, photo.user_id)
+        job.status = "failed"
+    else:
+        _requeue(job, retry_delay(job.attempts))
+
+
+async def process_job(job_id: int) -> None:
+    from app.api.v1.endpoints import time_machine as tm
+
+    request = await _load_request(job_id)
+    if request is None:
+        return
+    prompt, image_url, provider = request
+
+    outcome, error = None, None
+    try:
+        # Сессия берёт соединение только при первом запросе, а его здесь нет
+        async with AsyncSessionLocal() as settings_db:
+            outcome = await tm._generate_with_provider(prompt, image_url, settings_db, provider)
+    except Exception as exc:
+        print(f"Time Machine job {job_id} error: {exc}")
+        error = exc
+
+    async with AsyncSessionLocal() as db:
+        job = await db.get(TimePhotoJob, job_id)
+        photo = await db.get(TimePhoto, job.photo_id) if job is not None else None
+        if photo is None:
+            return
+        previous_status = photo.status
+        if error is None:
+            _record_submission(job, photo, outcome)
+        else:
+            await _handle_error(db, job, photo, error)
+        await db.commit()
+    if photo.status != previous_status:
+        tm.publish_photo_status(photo)
+
+
+class TimeMachineWorker:
+    def __init__(self):
+        self._tasks: list[asyncio.Task] = []
+        self._wake = asyncio.Event()
+
+    def wake(self) -> None:
+        """Nudge idle workers after a new job was queued."""
+        self._wake.set()
+
+    def start(self, concurrency: int) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(concurrency)]
+        self._tasks.append(asyncio.create_task(self._reap()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    job = await claim_job(db)
+                if job is not None:
+                    await process_job(job.id)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print(f"Time Machine worker error: {exc}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), IDLE_SLEEP_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _reap(self) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    recovered = await requeue_stuck_jobs(db)
+                if recovered:
+                    print(f"Time Machine: recovered {recovered} stuck job(s)")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print(f"Time Machine reaper error: {exc}")
+            await asyncio.sleep(STUCK_CHECK_SECONDS)
+
+
+time_machine_worker = TimeMachineWorker()
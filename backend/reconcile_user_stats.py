@@ -0,0 +1,19 @@
+"""Rebuild user_stats counters from user_progress / user_quiz_progress.
+
+Usage: python -m reconcile_user_stats [user_id ...]
+"""
+import asyncio
+import sys
+
+from app.core.user_stats import reconcile_user_stats
+from app.db.session import AsyncSessionLocal
+
+
+async def main(user_ids: list[int]) -> None:
+    async with AsyncSessionLocal() as db:
+        count = await reconcile_user_stats(db, user_ids or None)
+    print(f"Пересчитано строк user_stats: {count}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]]))
@@ -1,6 +1,8 @@
 """Seed cosmetics data - titles, frames, badges"""
 import asyncio
 from sqlalchemy import select
+from app.core.cache_bus import cache_bus
+from app.core.cosmetics import cosmetic_rules
 from app.db.session import AsyncSessionLocal
 from app.models import Title, ProfileFrame, Badge
 
@@ -91,7 +93,11 @@ async def seed_cosmetics():
                 db.add(badge)
                 print(f"  + {badge_data['name']}")
         
+        if db.new:
+            # Запущенные воркеры перечитают правила разблокировки после commit
+            await cache_bus.publish_in(db, "cosmetic_rules")
         await db.commit()
+        cosmetic_rules.invalidate()
         print("Готово!")
 
 
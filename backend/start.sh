@@ -4,37 +4,6 @@ set -e
 echo "Running database migrations..."
 alembic upgrade head
 
-echo "Creating Telegram auth tables..."
-python -c "
-import psycopg2, os
-db_url = os.environ['DATABASE_URL'].replace('+asyncpg', '').replace('postgresql+asyncpg', 'postgresql')
-conn = psycopg2.connect(db_url)
-cur = conn.cursor()
-cur.execute('''
-    CREATE TABLE IF NOT EXISTS telegram_auth_sessions (
-        id SERIAL PRIMARY KEY,
-        session_id VARCHAR NOT NULL UNIQUE,
-        telegram_id BIGINT,
-        telegram_username VARCHAR,
-        telegram_first_name VARCHAR,
-        telegram_photo_url VARCHAR,
-        created_at TIMESTAMP DEFAULT NOW()
-    );
-    CREATE TABLE IF NOT EXISTS telegram_auth_codes (
-        id SERIAL PRIMARY KEY,
-        code VARCHAR NOT NULL UNIQUE,
-        telegram_id BIGINT NOT NULL,
-        telegram_username VARCHAR,
-        telegram_first_name VARCHAR,
-        telegram_photo_url VARCHAR,
-        created_at TIMESTAMP DEFAULT NOW()
-    );
-''')
-conn.commit()
-conn.close()
-print('Telegram auth tables OK')
-" || true
-
 echo "Seeding cosmetics data..."
 python -m seed_cosmetics
 
@@ -48,5 +17,8 @@ except Exception as e:
     print(f'Seed data note: {e}')
 " || true
 
-echo "Starting server..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+# По воркеру на ядро; кэши процессов синхронизируются через Postgres NOTIFY
+WORKERS="${WEB_CONCURRENCY:-$(nproc)}"
+
+echo "Starting server with $WORKERS worker(s)..."
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS"